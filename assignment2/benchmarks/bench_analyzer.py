@@ -0,0 +1,178 @@
+"""
+Time and peak memory of loading, every analyzer method and the full report.
+
+Results are written as JSON; --check compares them with an earlier run and
+exits non-zero when anything got slower or bigger than the threshold allows.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from reports import print_analysis_results
+from sales_analysis import BACKENDS, SalesDataAnalyzer
+from synthetic import add_shape_arguments, shape_options, write_sales_csv
+
+METHODS: Dict[str, Callable[[SalesDataAnalyzer], Any]] = {
+    'get_total_revenue': lambda a: a.get_total_revenue(),
+    'get_revenue_by_category': lambda a: a.get_revenue_by_category(),
+    'get_revenue_by_region': lambda a: a.get_revenue_by_region(),
+    'get_top_products': lambda a: a.get_top_products(5),
+    'get_top_customers': lambda a: a.get_top_customers(5),
+    'get_sales_by_month': lambda a: a.get_sales_by_month(),
+    'get_average_order_value': lambda a: a.get_average_order_value(),
+    'get_sales_by_salesperson': lambda a: a.get_sales_by_salesperson(),
+    'get_category_statistics': lambda a: a.get_category_statistics(),
+    'get_high_value_customers': lambda a: a.get_high_value_customers(1000.0),
+    'get_revenue_between': lambda a: a.get_revenue_between('2024-01-01', '2024-01-31'),
+    'filter_by_category': lambda a: a.filter_by_category('Electronics'),
+    'filter_by_date_range': lambda a: a.filter_by_date_range('2024-01-01', '2024-01-31'),
+    'filter_by_minimum_amount': lambda a: a.filter_by_minimum_amount(500.0),
+}
+
+
+def parse_size(text: str) -> int:
+    """Row counts such as 10000, 10k or 1M."""
+    multipliers = {'k': 1_000, 'm': 1_000_000}
+    suffix = text[-1].lower()
+    if suffix in multipliers:
+        return int(float(text[:-1]) * multipliers[suffix])
+    return int(text)
+
+
+def measure(run: Callable[[], Any], repeat: int, memory: bool) -> Dict[str, float]:
+    """Best wall time over repeat runs, then peak traced allocation of one more run."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    result = {'seconds': min(timings)}
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        run()
+        result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def bench_dataset(csv_file: str, backend: str, repeat: int, memory: bool) -> Dict[str, Dict[str, float]]:
+    results = {}
+    analyzer = SalesDataAnalyzer(csv_file, backend=backend)
+    results['load_data'] = measure(analyzer._load_data, repeat, memory)
+    
+    for name, method in METHODS.items():
+        def cold():
+            analyzer.invalidate()
+            method(analyzer)
+        results[name] = measure(cold, repeat, memory)
+    
+    def report():
+        analyzer.invalidate()
+        with contextlib.redirect_stdout(io.StringIO()):
+            print_analysis_results(analyzer)
+    results['print_analysis_results'] = measure(report, repeat, memory)
+    return results
+
+
+def find_regressions(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float,
+                     min_seconds: float) -> List[str]:
+    """Benchmarks whose time or peak memory grew by more than threshold (0.2 = 20%).
+    
+    Timings below min_seconds in the baseline are too noisy to compare and are skipped.
+    """
+    regressions = []
+    for size, benchmarks in current['results'].items():
+        for name, now in benchmarks.items():
+            before = baseline['results'].get(size, {}).get(name)
+            if before is None:
+                continue
+            if before['seconds'] >= min_seconds and now['seconds'] > before['seconds'] * (1 + threshold):
+                regressions.append(f"{size} rows {name}: {before['seconds']:.4f}s -> {now['seconds']:.4f}s")
+            if 'peak_bytes' in before and 'peak_bytes' in now and (
+                    now['peak_bytes'] > before['peak_bytes'] * (1 + threshold)):
+                regressions.append(f"{size} rows {name}: {before['peak_bytes']:,} -> "
+                                   f"{now['peak_bytes']:,} peak bytes")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sales analyzer on synthetic data")
+    parser.add_argument('--sizes', nargs='+', default=['10k', '1M', '10M'],
+                        help="row counts to benchmark, e.g. 10k 1M 10M")
+    parser.add_argument('--backend', choices=BACKENDS, default='records')
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per benchmark; the best is kept")
+    parser.add_argument('--no-memory', action='store_true', help="skip the traced peak-memory run")
+    parser.add_argument('--data-dir', default=os.path.join(os.path.dirname(__file__), 'data'),
+                        help="where generated CSV files are kept between runs")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON results file")
+    parser.add_argument('--check', metavar='BASELINE',
+                        help="earlier JSON results; exit 1 on regressions beyond --threshold")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="allowed slowdown or memory growth as a fraction")
+    parser.add_argument('--min-seconds', type=float, default=0.001,
+                        help="ignore baseline timings shorter than this")
+    add_shape_arguments(parser)
+    args = parser.parse_args()
+    
+    shape = shape_options(args)
+    os.makedirs(args.data_dir, exist_ok=True)
+    output = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': args.backend,
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'shape': shape,
+        },
+        'results': {},
+    }
+    
+    for rows in map(parse_size, args.sizes):
+        shape_tag = '-'.join(str(value) for value in shape.values())
+        csv_file = os.path.join(args.data_dir, f"sales_{rows}_{args.seed}_{shape_tag}.csv")
+        if not os.path.exists(csv_file):
+            write_sales_csv(csv_file, rows, args.seed, **shape)
+        results = bench_dataset(csv_file, args.backend, args.repeat, not args.no_memory)
+        output['results'][str(rows)] = results
+        for name, result in results.items():
+            peak = f"{result['peak_bytes'] / 1e6:10.1f} MB" if 'peak_bytes' in result else ''
+            print(f"{rows:>10,} {name:28s} {result['seconds'] * 1000:12.2f} ms {peak}")
+    
+    with open(args.output, 'w') as file:
+        json.dump(output, file, indent=2)
+    print(f"Wrote {args.output}")
+    
+    if args.check:
+        with open(args.check) as file:
+            baseline = json.load(file)
+        for key in ('backend', 'seed', 'shape'):
+            if baseline['meta'].get(key) != output['meta'][key]:
+                print(f"Warning: baseline {key} {baseline['meta'].get(key)!r} differs from "
+                      f"{output['meta'][key]!r}")
+        regressions = find_regressions(baseline, output, args.threshold, args.min_seconds)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.check}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
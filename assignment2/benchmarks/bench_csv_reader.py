@@ -0,0 +1,121 @@
+"""
+Rows per second of the validating tuple reader against the csv.DictReader path.
+
+Both are timed parsing alone and loading into SalesRecord objects or a
+ColumnStore; --bad mixes malformed rows into the file to include the
+quarantine path.
+"""
+
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+from itertools import starmap
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from readers import SalesCsvReader
+from sales_analysis import ColumnStore, SalesRecord, paused_gc
+from bench_analyzer import measure, parse_size
+from synthetic import HEADER, add_shape_arguments, generate_rows, shape_options
+
+BAD_VALUES = {'price': 'n/a', 'quantity': '2.5', 'date': '2024-13-01'}
+
+
+def write_csv(path: str, rows: int, seed: int, bad: float, shape: dict) -> None:
+    """Synthetic rows with a bad fraction of them given one malformed field."""
+    rng = random.Random(seed)
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(HEADER)
+        for row in generate_rows(rows, seed, **shape):
+            if bad and rng.random() < bad:
+                field = rng.choice(list(BAD_VALUES))
+                row[HEADER.index(field)] = BAD_VALUES[field]
+            writer.writerow(row)
+
+
+def dict_rows(path: str) -> int:
+    with open(path, 'r') as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+
+def dict_records(path: str) -> int:
+    """The previous load path: one dict and one SalesRecord per row, bad rows skipped."""
+    count = 0
+    with open(path, 'r') as file:
+        for row in csv.DictReader(file):
+            try:
+                SalesRecord(row)
+            except ValueError:
+                continue
+            count += 1
+    return count
+
+
+def dict_columns(path: str) -> int:
+    store = ColumnStore()
+    with open(path, 'r') as file:
+        for row in csv.DictReader(file):
+            try:
+                store.append_row(row)
+            except ValueError:
+                continue
+    return len(store)
+
+
+def tuple_rows(path: str, quarantine: str) -> int:
+    return sum(map(len, SalesCsvReader(path, quarantine).chunks()))
+
+
+def tuple_records(path: str, quarantine: str) -> int:
+    with paused_gc():
+        return len(list(starmap(SalesRecord.from_values, SalesCsvReader(path, quarantine))))
+
+
+def tuple_columns(path: str, quarantine: str) -> int:
+    return len(ColumnStore.from_values(SalesCsvReader(path, quarantine).chunks()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CSV parsing throughput")
+    parser.add_argument('--rows', default='1M', help="row count, e.g. 100k or 1M")
+    parser.add_argument('--bad', type=float, default=0.0, help="fraction of malformed rows")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per reader; the best is kept")
+    add_shape_arguments(parser)
+    args = parser.parse_args()
+    
+    rows = parse_size(args.rows)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'sales.csv')
+        quarantine = os.path.join(directory, 'quarantine.csv')
+        write_csv(path, rows, args.seed, args.bad, shape_options(args))
+        
+        readers: Dict[str, Callable[[], int]] = {
+            'DictReader rows': lambda: dict_rows(path),
+            'SalesCsvReader tuples': lambda: tuple_rows(path, quarantine),
+            'DictReader + SalesRecord': lambda: dict_records(path),
+            'SalesCsvReader + SalesRecord': lambda: tuple_records(path, quarantine),
+            'DictReader + ColumnStore': lambda: dict_columns(path),
+            'SalesCsvReader + ColumnStore': lambda: tuple_columns(path, quarantine),
+        }
+        seconds = {name: measure(run, args.repeat, memory=False)['seconds']
+                   for name, run in readers.items()}
+        checked = SalesCsvReader(path, quarantine)
+        accepted = sum(1 for _ in checked)
+    
+    print(f"{rows:,} rows, {checked.rejected:,} malformed ({accepted:,} accepted)")
+    for name, elapsed in seconds.items():
+        print(f"{name:30s} {rows / elapsed:12,.0f} rows/s {elapsed:8.3f} s")
+    print(f"parse speedup {seconds['DictReader rows'] / seconds['SalesCsvReader tuples']:.2f}x "
+          f"(tuples are validated and typed, DictReader rows are neither)")
+    for target in ('SalesRecord', 'ColumnStore'):
+        speedup = seconds[f"DictReader + {target}"] / seconds[f"SalesCsvReader + {target}"]
+        print(f"{target} speedup {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Load time and peak memory of SalesDataAnalyzer for every input format.
+
+One synthetic dataset is written as plain, gzip, bz2, xz (and zstd when the
+zstandard package is installed) CSV, as plain and gzip JSON Lines, and as a
+binary column file. Peak memory is traced Python allocation, so the
+memory-mapped columns of the column file do not count towards it.
+"""
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+from typing import Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from readers import COMPRESSED_OPENERS, zstandard
+from sales_analysis import BACKENDS, SalesDataAnalyzer, write_sales_columns
+from bench_analyzer import measure, parse_size
+from synthetic import add_shape_arguments, shape_options, write_sales_csv
+
+
+def compress(path: str, suffix: str) -> str:
+    target = path + suffix
+    with open(path, 'rb') as source, COMPRESSED_OPENERS[suffix](target, 'wb') as file:
+        shutil.copyfileobj(source, file, 1 << 20)
+    return target
+
+
+def write_json_lines(csv_file: str, path: str) -> str:
+    with open(csv_file, newline='') as source, open(path, 'w') as file:
+        for row in csv.DictReader(source):
+            row['price'] = float(row['price'])
+            row['quantity'] = int(row['quantity'])
+            file.write(json.dumps(row) + '\n')
+    return path
+
+
+def write_formats(csv_file: str, directory: str) -> Dict[str, str]:
+    """Every benchmarked format of the CSV's rows, by label."""
+    files = {'csv': csv_file}
+    for suffix in ('.gz', '.bz2', '.xz') + (('.zst',) if zstandard is not None else ()):
+        files[f"csv{suffix}"] = compress(csv_file, suffix)
+    files['jsonl'] = write_json_lines(csv_file, os.path.join(directory, 'sales.jsonl'))
+    files['jsonl.gz'] = compress(files['jsonl'], '.gz')
+    files['salescol'] = os.path.join(directory, 'sales.salescol')
+    write_sales_columns(SalesDataAnalyzer(csv_file, backend='columnar').columns, files['salescol'])
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare load time and memory across input formats")
+    parser.add_argument('--rows', default='1M', help="row count, e.g. 100k or 1M")
+    parser.add_argument('--backend', choices=BACKENDS, default='columnar')
+    parser.add_argument('--repeat', type=int, default=3, help="timed loads per format; the best is kept")
+    parser.add_argument('--no-memory', action='store_true', help="skip the traced peak-memory run")
+    parser.add_argument('--output', help="also write the results as JSON")
+    add_shape_arguments(parser)
+    args = parser.parse_args()
+    
+    rows = parse_size(args.rows)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = write_sales_csv(os.path.join(directory, 'sales.csv'), rows, args.seed,
+                                   **shape_options(args))
+        for label, path in write_formats(csv_file, directory).items():
+            result = measure(lambda: SalesDataAnalyzer(path, backend=args.backend),
+                             args.repeat, not args.no_memory)
+            result['file_bytes'] = os.path.getsize(path)
+            results[label] = result
+    
+    print(f"{rows:,} rows, {args.backend} backend")
+    for label, result in results.items():
+        peak = f"{result['peak_bytes'] / 1e6:10.1f} MB peak" if 'peak_bytes' in result else ''
+        print(f"{label:10s} {result['file_bytes'] / 1e6:10.1f} MB file {result['seconds']:8.3f} s "
+              f"{rows / result['seconds']:12,.0f} rows/s {peak}")
+    if zstandard is None:
+        print("csv.zst skipped: zstandard is not installed")
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'rows': rows, 'backend': args.backend, 'results': results}, file, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
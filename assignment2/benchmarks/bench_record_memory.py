@@ -0,0 +1,70 @@
+"""
+Bytes per SalesRecord for the original dict-based layout and the slotted layout.
+"""
+
+import argparse
+import csv
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sales_analysis import SalesRecord
+from synthetic import write_sales_csv
+
+
+class DictSalesRecord:
+    """The record layout before __slots__: per-instance dict, eager datetime."""
+    
+    def __init__(self, row: Dict[str, str]):
+        self.order_id = row['order_id']
+        self.date = datetime.strptime(row['date'], '%Y-%m-%d')
+        self.product = row['product']
+        self.category = row['category']
+        self.price = float(row['price'])
+        self.quantity = int(row['quantity'])
+        self.region = row['region']
+        self.customer_id = row['customer_id']
+        self.salesperson = row['salesperson']
+    
+    @property
+    def total_amount(self) -> float:
+        return self.price * self.quantity
+
+
+def bytes_per_record(csv_file: str, factory: Callable[[Dict[str, str]], object]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    with open(csv_file, 'r') as file:
+        records = list(map(factory, csv.DictReader(file)))
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / max(len(records), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SalesRecord memory layouts")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--csv', help="existing sales CSV instead of a synthetic one")
+    args = parser.parse_args()
+    
+    csv_file = args.csv
+    if csv_file is None:
+        csv_file = os.path.join(tempfile.mkdtemp(), 'synthetic_sales.csv')
+        write_sales_csv(csv_file, args.rows)
+    
+    before = bytes_per_record(csv_file, DictSalesRecord)
+    after = bytes_per_record(csv_file, SalesRecord)
+    print(f"dict-based record : {before:8.1f} bytes/record")
+    print(f"slotted record    : {after:8.1f} bytes/record")
+    print(f"saving            : {1 - after / before:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Load test for the analysis service: latency percentiles and throughput.
+
+Without --port a local instance is started on a synthetic dataset (or --csv)
+and stopped afterwards. Each client keeps one connection open and sends
+requests drawn from a fixed mix of queries.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic import add_shape_arguments, shape_options, write_sales_csv
+
+SERVICE = os.path.join(os.path.dirname(__file__), '..', 'src', 'service.py')
+
+QUERIES = [
+    'get_total_revenue',
+    'get_revenue_by_category',
+    'get_revenue_by_region',
+    'get_top_products?n=5',
+    'get_top_products?n=10',
+    'get_top_customers?n=5',
+    'get_sales_by_month',
+    'get_category_statistics',
+    'get_sales_by_salesperson',
+    'get_high_value_customers?min_spending=40000',
+    'get_revenue_between?start_date=2024-01-01&end_date=2024-03-31',
+    'get_revenue_between?start_date=2024-04-01&end_date=2024-06-30',
+]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                  target: str) -> int:
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(host: str, port: int, targets: List[str],
+                 latencies: List[float]) -> int:
+    """Send targets in order over one connection; returns the number of non-200 responses."""
+    errors = 0
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for target in targets:
+            start = time.perf_counter()
+            if await request(reader, writer, target) != 200:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+    return errors
+
+
+async def run_load(host: str, port: int, dataset: str, requests: int, concurrency: int,
+                   seed: int) -> Tuple[List[float], int, float]:
+    rng = random.Random(seed)
+    targets = [f"/{dataset}/{rng.choice(QUERIES)}" for _ in range(requests)]
+    latencies: List[float] = []
+    start = time.perf_counter()
+    errors = await asyncio.gather(*(client(host, port, targets[i::concurrency], latencies)
+                                    for i in range(concurrency)))
+    return latencies, sum(errors), time.perf_counter() - start
+
+
+async def fetch_stats(host: str, port: int) -> dict:
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b"GET /stats HTTP/1.1\r\nConnection: close\r\n\r\n")
+    response = await reader.read()
+    writer.close()
+    return json.loads(response.partition(b'\r\n\r\n')[2])
+
+
+def start_service(csv_file: str, dataset: str, host: str, args) -> Tuple[subprocess.Popen, int]:
+    """Start service.py on a free port and wait until it is listening."""
+    process = subprocess.Popen(
+        [sys.executable, SERVICE, '--dataset', f"{dataset}={csv_file}", '--host', host,
+         '--port', '0', '--backend', args.backend, '--threads', str(args.threads),
+         '--ttl', str(args.ttl)],
+        stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith('Listening on'):
+        process.kill()
+        raise RuntimeError(f"service did not start: {line!r}")
+    return process, int(line.rsplit(':', 1)[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the analysis service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, help="target a running instance instead of starting one")
+    parser.add_argument('--dataset', default='sales', help="dataset name on the service")
+    parser.add_argument('--csv', help="CSV to serve; default is a generated one of --rows rows")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--backend', default='records', help="backend for the started instance")
+    parser.add_argument('--threads', type=int, default=4, help="executor threads for the started instance")
+    parser.add_argument('--ttl', type=float, default=60.0,
+                        help="cache TTL for the started instance; 0 measures uncached queries")
+    parser.add_argument('--data-dir', default=os.path.join(os.path.dirname(__file__), 'data'))
+    add_shape_arguments(parser)
+    args = parser.parse_args()
+    
+    process: Optional[subprocess.Popen] = None
+    port = args.port
+    if port is None:
+        csv_file = args.csv
+        if csv_file is None:
+            shape = shape_options(args)
+            shape_tag = '-'.join(str(value) for value in shape.values())
+            os.makedirs(args.data_dir, exist_ok=True)
+            csv_file = os.path.join(args.data_dir, f"sales_{args.rows}_{args.seed}_{shape_tag}.csv")
+            if not os.path.exists(csv_file):
+                write_sales_csv(csv_file, args.rows, args.seed, **shape)
+        process, port = start_service(csv_file, args.dataset, args.host, args)
+    
+    try:
+        latencies, errors, elapsed = asyncio.run(
+            run_load(args.host, port, args.dataset, args.requests, args.concurrency, args.seed))
+        stats = asyncio.run(fetch_stats(args.host, port))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    
+    latencies.sort()
+    print(f"requests     {len(latencies):,} ({errors} errors) with {args.concurrency} clients")
+    print(f"throughput   {len(latencies) / elapsed:,.0f} req/s")
+    print(f"latency p50  {percentile(latencies, 0.50) * 1000:.2f} ms")
+    print(f"latency p99  {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print(f"latency max  {latencies[-1] * 1000:.2f} ms")
+    print(f"service      {stats}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Deterministic synthetic sales data with the same columns as data/sales.csv.
+"""
+
+import argparse
+import csv
+import random
+from datetime import datetime, timedelta
+from typing import Iterator, List
+
+HEADER = ['order_id', 'date', 'product', 'category', 'price', 'quantity', 'region',
+          'customer_id', 'salesperson']
+CATEGORIES = ['Electronics', 'Furniture', 'Stationery']
+REGIONS = ['North', 'South', 'East', 'West']
+
+
+def names(base: List[str], count: int, prefix: str) -> List[str]:
+    """The first count base names, padded with generated ones."""
+    return base[:count] + [f"{prefix} {i:03d}" for i in range(len(base), count)]
+
+
+def generate_rows(rows: int, seed: int = 42, products: int = 500, customers: int = 50000,
+                  salespeople: int = 50, categories: int = len(CATEGORIES),
+                  regions: int = len(REGIONS), days: int = 365,
+                  start_date: str = '2024-01-01') -> Iterator[List[str]]:
+    rng = random.Random(seed)
+    category_names = names(CATEGORIES, categories, 'Category')
+    region_names = names(REGIONS, regions, 'Region')
+    catalog = [(f"Product {i:04d}", category_names[i % len(category_names)], rng.uniform(2.0, 1500.0))
+               for i in range(products)]
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    
+    for i in range(rows):
+        product, category, price = rng.choice(catalog)
+        yield [
+            str(1000 + i),
+            (start + timedelta(days=rng.randrange(days))).strftime('%Y-%m-%d'),
+            product,
+            category,
+            f"{price:.2f}",
+            str(rng.randint(1, 20)),
+            rng.choice(region_names),
+            f"C{rng.randrange(customers):05d}",
+            f"SP{rng.randrange(salespeople):03d}",
+        ]
+
+
+def write_sales_csv(path: str, rows: int, seed: int = 42, **cardinalities) -> str:
+    """Write rows synthetic sales; cardinalities are generate_rows keyword arguments."""
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(HEADER)
+        writer.writerows(generate_rows(rows, seed, **cardinalities))
+    return path
+
+
+def add_shape_arguments(parser: argparse.ArgumentParser) -> None:
+    """Options controlling cardinalities and the date span, shared by the benchmarks."""
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--products', type=int, default=500)
+    parser.add_argument('--customers', type=int, default=50000)
+    parser.add_argument('--salespeople', type=int, default=50)
+    parser.add_argument('--categories', type=int, default=len(CATEGORIES))
+    parser.add_argument('--regions', type=int, default=len(REGIONS))
+    parser.add_argument('--days', type=int, default=365, help="length of the date span")
+    parser.add_argument('--start-date', default='2024-01-01', help="first day of the date span")
+
+
+def shape_options(args: argparse.Namespace) -> dict:
+    return {
+        'products': args.products,
+        'customers': args.customers,
+        'salespeople': args.salespeople,
+        'categories': args.categories,
+        'regions': args.regions,
+        'days': args.days,
+        'start_date': args.start_date,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic sales CSV")
+    parser.add_argument('output', help="CSV file to write")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    add_shape_arguments(parser)
+    args = parser.parse_args()
+    write_sales_csv(args.output, args.rows, args.seed, **shape_options(args))
+    print(f"Wrote {args.rows:,} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
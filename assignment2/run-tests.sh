@@ -50,10 +50,10 @@ echo ""
 # Check if pytest-cov is available for coverage
 if $PYTHON_CMD -c "import pytest_cov" 2>/dev/null; then
     # Run with coverage
-    $PYTHON_CMD -m pytest tests/test_sales_analysis.py -v --cov=src --cov-report=term-missing
+    $PYTHON_CMD -m pytest tests/ -v --cov=src --cov-report=term-missing
 else
     # Run without coverage
-    $PYTHON_CMD -m pytest tests/test_sales_analysis.py -v
+    $PYTHON_CMD -m pytest tests/ -v
 fi
 
 # Capture exit code
@@ -0,0 +1,197 @@
+"""
+Binary column files: typed columns, string tables and source metadata in one
+memory-mappable file.
+
+Layout: magic, format version, header length, JSON header, then every column
+as raw native-endian bytes aligned to 8 bytes. Readers get zero-copy
+memoryviews over the mapped file.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+MAGIC = b'SALESCOL'
+VERSION = 1
+ALIGNMENT = 8
+PREAMBLE = struct.Struct('<8sIQ')
+
+
+class TextColumn(Sequence):
+    """Strings stored as one UTF-8 blob plus an offsets column."""
+
+    def __init__(self, blob: memoryview, offsets: Sequence[int]):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("text column index out of range")
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]]).decode()
+
+    def __iter__(self) -> Iterator[str]:
+        return map(self.__getitem__, range(len(self)))
+
+
+class ColumnFile:
+    """A mapped column file; columns stay valid while this object is alive."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._map)
+        if len(buffer) < PREAMBLE.size:
+            raise ValueError(f"Not a column file: {path}")
+        magic, version, header_length = PREAMBLE.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a version {VERSION} column file: {path}")
+
+        header = json.loads(bytes(buffer[PREAMBLE.size:PREAMBLE.size + header_length]))
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError(f"Column file was written with {header['byteorder']} byte order")
+        self.header: Dict[str, Any] = header
+        self.data_start = min((offset for _, offset, _ in header['columns'].values()),
+                              default=PREAMBLE.size + header_length)
+        self.meta: Dict[str, Any] = header['meta']
+        self.strings: Dict[str, List[str]] = header['strings']
+        self.columns: Dict[str, memoryview] = {}
+        for name, (typecode, offset, length) in header['columns'].items():
+            view = buffer[offset:offset + length]
+            self.columns[name] = view if typecode == 'B' else view.cast(typecode)
+        self.texts = {
+            name: TextColumn(self.columns[blob], self.columns[offsets])
+            for name, (blob, offsets) in header['texts'].items()
+        }
+
+
+def write_column_file(path: str, columns: Dict[str, array], strings: Dict[str, List[str]],
+                      texts: Dict[str, Sequence[str]], meta: Dict[str, Any]) -> None:
+    """Write columns atomically: readers never see a half-written file."""
+    sections: Dict[str, Any] = dict(columns)
+    text_layout = {}
+    for name, values in texts.items():
+        encoded = [value.encode() for value in values]
+        offsets = array('q', [0])
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+        sections[f"{name}.blob"] = b''.join(encoded)
+        sections[f"{name}.offsets"] = offsets
+        text_layout[name] = [f"{name}.blob", f"{name}.offsets"]
+
+    positions = {}
+    position = 0
+    for name, data in sections.items():
+        length = len(data) * data.itemsize if isinstance(data, array) else len(data)
+        positions[name] = (data.typecode if isinstance(data, array) else 'B', position, length)
+        position += _padded(length)
+
+    # Column offsets depend on the header length, so grow the data start until it fits.
+    data_start = 0
+    while True:
+        layout = {name: [typecode, data_start + offset, length]
+                  for name, (typecode, offset, length) in positions.items()}
+        header = {'byteorder': sys.byteorder, 'meta': meta, 'strings': strings,
+                  'texts': text_layout, 'columns': layout}
+        encoded = json.dumps(header).encode()
+        if PREAMBLE.size + len(encoded) <= data_start:
+            break
+        data_start = _padded(PREAMBLE.size + len(encoded))
+
+    temp_path = f"{path}.tmp{os.getpid()}"
+    with open(temp_path, 'wb') as file:
+        file.write(PREAMBLE.pack(MAGIC, VERSION, len(encoded)))
+        file.write(encoded)
+        file.write(b'\0' * (data_start - PREAMBLE.size - len(encoded)))
+        for data in sections.values():
+            raw = data.tobytes() if isinstance(data, array) else data
+            file.write(raw)
+            file.write(b'\0' * (_padded(len(raw)) - len(raw)))
+    os.replace(temp_path, path)
+
+
+def read_column_file(path: str) -> Optional[ColumnFile]:
+    """Map a column file, or return None if it is missing or unreadable."""
+    try:
+        return ColumnFile(path)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_signature(path: str) -> Dict[str, Any]:
+    stat = os.stat(path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': file_sha256(path)}
+
+
+def matches_source(signature: Dict[str, Any], path: str) -> bool:
+    """Cheap mtime/size check first; hash only when the size matches but mtime moved.
+
+    A hash match moves signature['mtime_ns'] to the mtime seen before hashing,
+    so storing the signature again makes the next check the cheap one.
+    """
+    stat = os.stat(path)
+    if stat.st_size != signature.get('size'):
+        return False
+    if stat.st_mtime_ns == signature.get('mtime_ns'):
+        return True
+    if file_sha256(path) != signature.get('sha256'):
+        return False
+    signature['mtime_ns'] = stat.st_mtime_ns
+    return True
+
+
+def column_file_matches(column_file: ColumnFile, source_path: str) -> bool:
+    """matches_source against the file's stored signature, writing back a moved mtime."""
+    signature = dict(column_file.meta.get('source', {}))
+    mtime_ns = signature.get('mtime_ns')
+    if not matches_source(signature, source_path):
+        return False
+    if signature['mtime_ns'] != mtime_ns:
+        rewrite_meta(column_file, dict(column_file.meta, source=signature))
+    return True
+
+
+def rewrite_meta(column_file: ColumnFile, meta: Dict[str, Any]) -> bool:
+    """Replace a column file's metadata in place, leaving the columns untouched.
+
+    Returns False when the new header does not fit before the first column or
+    the file is not writable. A reader that races the write sees a header that
+    fails to parse or a signature that does not match, and rebuilds.
+    """
+    header = dict(column_file.header, meta=meta)
+    encoded = json.dumps(header).encode()
+    padding = column_file.data_start - PREAMBLE.size - len(encoded)
+    if padding < 0:
+        return False
+    try:
+        with open(column_file.path, 'r+b') as file:
+            file.write(PREAMBLE.pack(MAGIC, VERSION, len(encoded)) + encoded + b'\0' * padding)
+    except OSError:
+        return False
+    column_file.header = header
+    column_file.meta = meta
+    return True
+
+
+def _padded(length: int) -> int:
+    return -(-length // ALIGNMENT) * ALIGNMENT
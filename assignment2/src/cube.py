@@ -0,0 +1,157 @@
+"""
+Sales cubes: sum/count/min/max cells over several dimensions, built in one scan.
+
+Rollups and slices are folded from the cells without touching the rows, and a
+cube round-trips through the binary column file format.
+"""
+
+from array import array
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from column_cache import read_column_file, write_column_file
+from sales_analysis import (GROUP_KEYS, GroupStats, SalesDataAnalyzer, SalesMetrics, groups_to_dollars,
+                            to_cents)
+
+Cell = Tuple[str, ...]
+MEASURES = {
+    'revenue': 'd',
+    'orders': 'q',
+    'quantity': 'q',
+    'price_total': 'd',
+    'max_order': 'd',
+    'min_order': 'd',
+}
+MONEY_MEASURES = ('revenue', 'price_total', 'max_order', 'min_order')
+CUBE_KIND = 'sales_cube'
+
+
+class SalesCube(SalesMetrics):
+    """GroupStats per combination of dimension values.
+
+    The SalesMetrics methods work for every dimension the cube was built over.
+    Cubes of exact analyzers keep their cells in integer cents, so rollups
+    add up exactly; measures and metrics are returned in dollars.
+    """
+
+    def __init__(self, dimensions: Sequence[str], cells: Dict[Cell, GroupStats], exact: bool = False):
+        self.dimensions = tuple(dimensions)
+        self.cells = cells
+        self.exact = exact
+        self.meta: Dict[str, Any] = {}
+        self._rollups: Dict[Tuple[str, ...], 'SalesCube'] = {}
+
+    @classmethod
+    def build(cls, analyzer: SalesDataAnalyzer, dimensions: Sequence[str]) -> 'SalesCube':
+        _check_dimensions(dimensions)
+        if not dimensions:
+            raise ValueError("A cube needs at least one dimension")
+        analyzer._record_scan(len(analyzer.sales_data))
+        exact = analyzer.exact
+        if analyzer.columns is not None:
+            return cls(dimensions, analyzer.columns.group_cells(dimensions, exact), exact)
+
+        key_funcs = [GROUP_KEYS[dimension] for dimension in dimensions]
+        cells: Dict[Cell, GroupStats] = {}
+        for r in analyzer.sales_data:
+            key = tuple(key_func(r) for key_func in key_funcs)
+            stats = cells.get(key)
+            if stats is None:
+                stats = cells[key] = GroupStats(0 if exact else 0.0)
+            stats.add(to_cents(r.price) if exact else r.price, r.quantity)
+        return cls(dimensions, cells, exact)
+
+    def rollup(self, *dimensions: str) -> 'SalesCube':
+        """A coarser cube over a subset of the dimensions, merged from these cells."""
+        cube = self._rollups.get(dimensions)
+        if cube is not None:
+            return cube
+        positions = self._positions(dimensions)
+        cells: Dict[Cell, GroupStats] = {}
+        for key, stats in self.cells.items():
+            coarse = tuple(key[p] for p in positions)
+            target = cells.get(coarse)
+            if target is None:
+                target = cells[coarse] = GroupStats(0 if self.exact else 0.0)
+            target.merge(stats)
+        cube = self._rollups[dimensions] = SalesCube(dimensions, cells, self.exact)
+        return cube
+
+    def slice(self, **values: str) -> 'SalesCube':
+        """Cells matching the given dimension values, without those dimensions."""
+        fixed = self._positions(tuple(values))
+        expected = tuple(values.values())
+        kept = [p for p in range(len(self.dimensions)) if p not in fixed]
+        return SalesCube(
+            [self.dimensions[p] for p in kept],
+            {
+                tuple(key[p] for p in kept): stats
+                for key, stats in self.cells.items()
+                if tuple(key[p] for p in fixed) == expected
+            },
+            self.exact
+        )
+
+    def measure(self, name: str = 'revenue') -> Dict[Cell, Any]:
+        if name not in MEASURES:
+            raise ValueError(f"Unknown measure '{name}', expected one of {tuple(MEASURES)}")
+        values = {key: getattr(stats, name) for key, stats in self.cells.items()}
+        if self.exact and name in MONEY_MEASURES:
+            return {key: value / 100 for key, value in values.items()}
+        return values
+
+    def get_total_revenue(self) -> float:
+        revenue = self.rollup().cells.get((), GroupStats()).revenue
+        return revenue / 100 if self.exact else revenue
+
+    def _group_stats(self, dimension: str) -> Dict[str, GroupStats]:
+        groups = {key[0]: stats for key, stats in self.rollup(dimension).cells.items()}
+        return groups_to_dollars(groups) if self.exact else groups
+
+    def _order_count(self) -> int:
+        return self.rollup().cells.get((), GroupStats()).orders
+
+    def _positions(self, dimensions: Sequence[str]) -> Tuple[int, ...]:
+        missing = [d for d in dimensions if d not in self.dimensions]
+        if missing:
+            raise ValueError(f"Cube over {self.dimensions} has no dimension {missing[0]!r}")
+        return tuple(map(self.dimensions.index, dimensions))
+
+    def save(self, path: str, meta: Optional[Dict[str, Any]] = None) -> None:
+        labels = {dimension: {} for dimension in self.dimensions}
+        columns = {f"cell.{d}": array('q') for d in self.dimensions}
+        columns.update((name, array('q' if self.exact and name in ('revenue', 'price_total') else typecode))
+                       for name, typecode in MEASURES.items())
+        for key, stats in self.cells.items():
+            for dimension, value in zip(self.dimensions, key):
+                codes = labels[dimension]
+                columns[f"cell.{dimension}"].append(codes.setdefault(value, len(codes)))
+            for name in MEASURES:
+                columns[name].append(getattr(stats, name))
+        header = {'kind': CUBE_KIND, 'dimensions': list(self.dimensions), 'exact': self.exact,
+                  'meta': meta or {}}
+        strings = {dimension: list(codes) for dimension, codes in labels.items()}
+        write_column_file(path, columns, strings, {}, header)
+
+    @classmethod
+    def load(cls, path: str) -> 'SalesCube':
+        column_file = read_column_file(path)
+        if column_file is None or column_file.meta.get('kind') != CUBE_KIND:
+            raise ValueError(f"Not a sales cube file: {path}")
+        dimensions = column_file.meta['dimensions']
+        keys = zip(*(
+            map(column_file.strings[d].__getitem__, column_file.columns[f"cell.{d}"])
+            for d in dimensions
+        ))
+        totals = zip(*(column_file.columns[name] for name in MEASURES))
+        cells = {key: GroupStats.from_totals(*values) for key, values in zip(keys, totals)}
+        cube = cls(dimensions, cells, column_file.meta.get('exact', False))
+        cube.meta = column_file.meta['meta']
+        return cube
+
+
+def _check_dimensions(dimensions: Sequence[str]) -> None:
+    unknown = [d for d in dimensions if d not in GROUP_KEYS]
+    if unknown:
+        raise ValueError(f"Unknown dimension '{unknown[0]}', expected one of {tuple(GROUP_KEYS)}")
+    if len(set(dimensions)) != len(dimensions):
+        raise ValueError(f"Repeated dimension in {tuple(dimensions)}")
@@ -0,0 +1,97 @@
+"""
+Vectorized NumPy kernels over ColumnStore columns.
+
+NumPy is optional: AVAILABLE is False when it is not installed, and the
+analyzer falls back to the pure-Python columnar backend.
+"""
+
+from typing import Callable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+AVAILABLE = np is not None
+
+GroupTotals = Tuple[int, float, int, int, float, float, float]
+
+
+def as_array(column: Sequence, dtype) -> 'np.ndarray':
+    """Zero-copy ndarray over an array or memoryview column.
+
+    The view pins the column's buffer, so callers drop it before the column
+    is appended to again.
+    """
+    return np.frombuffer(column, dtype=dtype)
+
+
+def total_revenue(price: Sequence[float], quantity: Sequence[int]) -> float:
+    return float((as_array(price, np.float64) * as_array(quantity, np.int64)).sum())
+
+
+def month_codes(day: Sequence[int], month_key: Callable[[int], int]) -> Tuple['np.ndarray', List[int]]:
+    """Map every row to a dense month code; month_key runs once per distinct day."""
+    unique_days, day_codes = np.unique(as_array(day, np.int64), return_inverse=True)
+    keys = np.array([month_key(int(d)) for d in unique_days], dtype=np.int64)
+    unique_keys, key_codes = np.unique(keys, return_inverse=True)
+    return key_codes[day_codes.ravel()], unique_keys.tolist()
+
+
+def grouped_totals(codes: Sequence[int], groups: int, price: Sequence[float],
+                   quantity: Sequence[int]) -> List[GroupTotals]:
+    """Per-group (code, revenue, orders, quantity, price total, max, min) in first-seen order."""
+    codes = codes if isinstance(codes, np.ndarray) else as_array(codes, np.int64)
+    prices = as_array(price, np.float64)
+    quantities = as_array(quantity, np.int64)
+    amounts = prices * quantities
+
+    revenue = np.bincount(codes, weights=amounts, minlength=groups)
+    orders = np.bincount(codes, minlength=groups)
+    price_total = np.bincount(codes, weights=prices, minlength=groups)
+    quantity_total = np.zeros(groups, dtype=np.int64)
+    np.add.at(quantity_total, codes, quantities)
+    max_order = np.full(groups, -np.inf)
+    np.maximum.at(max_order, codes, amounts)
+    min_order = np.full(groups, np.inf)
+    np.minimum.at(min_order, codes, amounts)
+    first_row = np.full(groups, len(codes), dtype=np.int64)
+    np.minimum.at(first_row, codes, np.arange(len(codes), dtype=np.int64))
+
+    present = np.flatnonzero(orders)
+    ordered = present[np.argsort(first_row[present], kind='stable')]
+    return [
+        (int(g), float(revenue[g]), int(orders[g]), int(quantity_total[g]),
+         float(price_total[g]), float(max_order[g]), float(min_order[g]))
+        for g in ordered
+    ]
+
+
+def daily_revenue(codes: Optional[Sequence[int]], groups: int, day: Sequence[int], first_day: int,
+                  days: int, price: Sequence[float], quantity: Sequence[int]) -> List[List[float]]:
+    """Revenue per group and day from first_day on, one list of days per group.
+
+    Without codes every row belongs to a single group.
+    """
+    cells = as_array(day, np.int64) - first_day
+    if codes is not None:
+        cells = cells + as_array(codes, np.int64) * days
+    amounts = as_array(price, np.float64) * as_array(quantity, np.int64)
+    return np.bincount(cells, weights=amounts, minlength=groups * days).reshape(groups, days).tolist()
+
+
+def rows_with_code(codes: Sequence[int], code: int) -> List[int]:
+    return np.flatnonzero(as_array(codes, np.int64) == code).tolist()
+
+
+def rows_in_day_range(day: Sequence[int], first_day: int, last_day: int) -> List[int]:
+    """Matching rows ordered by day, ties in file order, like the date index of the other backends."""
+    days = as_array(day, np.int64)
+    rows = np.flatnonzero((days >= first_day) & (days <= last_day))
+    return rows[np.argsort(days[rows], kind='stable')].tolist()
+
+
+def rows_with_min_amount(price: Sequence[float], quantity: Sequence[int],
+                         min_amount: float) -> List[int]:
+    amounts = as_array(price, np.float64) * as_array(quantity, np.int64)
+    return np.flatnonzero(amounts >= min_amount).tolist()
@@ -0,0 +1,186 @@
+"""
+Opt-in per-call instrumentation for the analyzer.
+
+Functions decorated with @profiled cost one global lookup while no profiler
+is active. Inside `with Profiler() as profiler:` every call records its
+wall time, the rows it scanned, the groups it produced and, with
+memory=True, its peak traced allocation. Hooks receive each record as it
+completes, and the summary can be written as JSON or in the Prometheus
+text format.
+"""
+
+import functools
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+_active: Optional['Profiler'] = None
+
+
+class CallProfile:
+    """Measurements of one profiled call; rows, groups and peak are None when unknown."""
+
+    __slots__ = ('name', 'depth', 'seconds', 'rows_scanned', 'groups', 'peak_bytes')
+
+    def __init__(self, name: str, depth: int):
+        self.name = name
+        self.depth = depth
+        self.seconds = 0.0
+        self.rows_scanned: Optional[int] = None
+        self.groups: Optional[int] = None
+        self.peak_bytes: Optional[int] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _Frame:
+    __slots__ = ('start_bytes', 'peak_bytes')
+
+    def __init__(self, start_bytes: int):
+        self.start_bytes = start_bytes
+        self.peak_bytes = start_bytes
+
+
+class Profiler:
+    """Collects CallProfiles while active and passes each one to the registered hooks."""
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.calls: List[CallProfile] = []
+        self.hooks: List[Callable[[CallProfile], None]] = []
+        self._frames: List[_Frame] = []
+        self._depth = 0
+        self._previous: Optional[Profiler] = None
+        self._started_tracing = False
+
+    def add_hook(self, hook: Callable[[CallProfile], None]) -> Callable[[CallProfile], None]:
+        self.hooks.append(hook)
+        return hook
+
+    def __enter__(self) -> 'Profiler':
+        global _active
+        self._previous, _active = _active, self
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        global _active
+        _active = self._previous
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def call(self, func: Callable, args: tuple, kwargs: dict) -> Any:
+        name = func.__name__
+        if '.' in func.__qualname__ and args:
+            name = f"{type(args[0]).__name__}.{name}"
+        profile = CallProfile(name, self._depth)
+        counter = next((a for a in args if hasattr(a, 'rows_scanned')), None)
+        rows_before = counter.rows_scanned if counter is not None else 0
+        if self.memory:
+            self._enter_frame()
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            profile.seconds = time.perf_counter() - start
+            self._depth -= 1
+            if self.memory:
+                profile.peak_bytes = self._exit_frame()
+        if counter is not None:
+            profile.rows_scanned = counter.rows_scanned - rows_before
+        if isinstance(result, dict):
+            profile.groups = len(result)
+        self.calls.append(profile)
+        for hook in self.hooks:
+            hook(profile)
+        return result
+
+    def _enter_frame(self) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        if self._frames:
+            parent = self._frames[-1]
+            parent.peak_bytes = max(parent.peak_bytes, peak)
+        if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+; older peaks include the parent's
+            tracemalloc.reset_peak()
+        self._frames.append(_Frame(current))
+
+    def _exit_frame(self) -> int:
+        frame = self._frames.pop()
+        peak = max(frame.peak_bytes, tracemalloc.get_traced_memory()[1])
+        if self._frames:
+            parent = self._frames[-1]
+            parent.peak_bytes = max(parent.peak_bytes, peak)
+        return peak - frame.start_bytes
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-name totals: calls, seconds, max_seconds, rows_scanned, groups and peak_bytes."""
+        totals: Dict[str, Dict[str, Any]] = {}
+        for call in self.calls:
+            entry = totals.setdefault(call.name, {
+                'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+                'rows_scanned': 0, 'groups': 0, 'peak_bytes': 0,
+            })
+            entry['calls'] += 1
+            entry['seconds'] += call.seconds
+            entry['max_seconds'] = max(entry['max_seconds'], call.seconds)
+            entry['rows_scanned'] += call.rows_scanned or 0
+            entry['groups'] = max(entry['groups'], call.groups or 0)
+            entry['peak_bytes'] = max(entry['peak_bytes'], call.peak_bytes or 0)
+        return totals
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'summary': self.summary(),
+            'calls': [call.as_dict() for call in self.calls],
+        }, indent=2)
+
+    def to_prometheus(self, prefix: str = 'sales_analysis') -> str:
+        """Summary in the Prometheus text exposition format, one label per method."""
+        metrics = [
+            ('calls_total', 'calls', 'counter', 'Profiled calls'),
+            ('seconds_total', 'seconds', 'counter', 'Wall time spent in the call'),
+            ('max_seconds', 'max_seconds', 'gauge', 'Slowest single call'),
+            ('rows_scanned_total', 'rows_scanned', 'counter', 'Rows read by the call'),
+            ('groups', 'groups', 'gauge', 'Largest number of groups returned'),
+            ('peak_bytes', 'peak_bytes', 'gauge', 'Largest peak traced allocation'),
+        ]
+        summary = self.summary()
+        lines = []
+        for suffix, key, kind, help_text in metrics:
+            metric = f"{prefix}_{suffix}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, entry in summary.items():
+                lines.append(f'{metric}{{method="{name}"}} {entry[key]}')
+        return '\n'.join(lines) + '\n'
+
+    def format_table(self) -> str:
+        rows = sorted(self.summary().items(), key=lambda item: item[1]['seconds'], reverse=True)
+        lines = [f"{'method':48s} {'calls':>6s} {'total ms':>10s} {'rows':>10s} "
+                 f"{'groups':>7s} {'peak KiB':>9s}"]
+        for name, entry in rows:
+            lines.append(f"{name:48s} {entry['calls']:6d} {entry['seconds'] * 1000:10.2f} "
+                         f"{entry['rows_scanned']:10d} {entry['groups']:7d} "
+                         f"{entry['peak_bytes'] / 1024:9.1f}")
+        return '\n'.join(lines)
+
+
+def profiled(func: Callable) -> Callable:
+    """Record calls to func while a Profiler is active."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _active
+        if profiler is None:
+            return func(*args, **kwargs)
+        return profiler.call(func, args, kwargs)
+    return wrapper
+
+
+def active() -> Optional[Profiler]:
+    return _active
@@ -0,0 +1,341 @@
+"""
+Input formats and validating row readers.
+
+Which file names hold CSV, JSON Lines or column data, text streams over them
+that decompress gzip, bz2, xz or zstd on the fly, and the readers that parse
+rows into typed tuples, skipping malformed ones into a quarantine file.
+
+zstandard is optional: .zst files raise ImportError when it is missing.
+"""
+
+import bz2
+import contextlib
+import csv
+import gzip
+import json
+import lzma
+import math
+import os
+import sys
+import warnings
+from datetime import datetime
+from functools import lru_cache
+from itertools import accumulate, chain, islice
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COLUMNS_SUFFIX = '.salescol'
+JSON_LINES_SUFFIXES = ('.jsonl', '.ndjson')
+INPUT_SUFFIXES = ('.csv', COLUMNS_SUFFIX) + JSON_LINES_SUFFIXES
+ROW_FIELDS = ('order_id', 'date', 'product', 'category', 'price', 'quantity', 'region',
+              'customer_id', 'salesperson')
+EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+DATE_CACHE_SIZE = 1 << 16
+PARSE_CHUNK_SIZE = 256  # rows converted column-wise at once; small enough to stay cheap for the GC
+PARSE_ROWS_BELOW = 8  # failing chunks are halved down to this many rows, then parsed row by row
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def to_epoch_day(date_str: str) -> int:
+    """Decode a YYYY-MM-DD string to days since 1970-01-01, cached per distinct date."""
+    year, month, day = date_str[:4], date_str[5:7], date_str[8:]
+    if (len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-'
+            and year.isdigit() and month.isdigit() and day.isdigit()):
+        return datetime(int(year), int(month), int(day)).toordinal() - EPOCH_ORDINAL
+    return datetime.strptime(date_str, '%Y-%m-%d').toordinal() - EPOCH_ORDINAL
+
+
+def to_cents(price: float) -> int:
+    """Whole cents of a price read from a decimal string with at most two decimals.
+
+    Exact for such prices: the float is the one nearest to cents / 100, so
+    scaling it by 100 lands within rounding distance of the integer.
+    """
+    return round(price * 100)
+
+
+def is_whole_cents(price: float) -> bool:
+    return to_cents(price) / 100 == price
+
+
+def warn_rejected(count: int, source: str, quarantine_path: Optional[str] = None) -> None:
+    if count:
+        where = f"; see {quarantine_path}" if quarantine_path else ""
+        warnings.warn(f"Skipped {count} malformed rows in {source}{where}")
+
+
+def write_quarantine(quarantine_path: str, header: List[str], rejected_rows: Iterable[List],
+                     mode: str = 'w') -> None:
+    with open(quarantine_path, mode, newline='') as file:
+        writer = csv.writer(file)
+        if not file.tell():
+            writer.writerow(['line', 'error'] + header)
+        writer.writerows(rejected_rows)
+
+
+def _open_zstd(path: str, mode: str, **options: Any) -> IO:
+    if zstandard is None:
+        raise ImportError(f"Reading {path} needs the zstandard package (pip install zstandard)")
+    return zstandard.open(path, mode, **options)
+
+
+COMPRESSED_OPENERS: Dict[str, Callable[..., IO]] = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+    '.zst': _open_zstd,
+}
+
+
+def _split_compression(path: str) -> Tuple[str, Optional[str]]:
+    stem, suffix = os.path.splitext(path.lower())
+    return (stem, suffix) if suffix in COMPRESSED_OPENERS else (path.lower(), None)
+
+
+def input_format(path: str) -> Tuple[str, Optional[str]]:
+    """('csv', 'jsonl' or 'columns', compression suffix or None) from the file name.
+
+    Names without a known extension are read as CSV, e.g. sales.jsonl.gz is
+    ('jsonl', '.gz') and sales.txt is ('csv', None).
+    """
+    stem, compression = _split_compression(path)
+    extension = os.path.splitext(stem)[1]
+    if extension in JSON_LINES_SUFFIXES:
+        return 'jsonl', compression
+    if extension == COLUMNS_SUFFIX:
+        if compression is not None:
+            raise ValueError(f"Column files are memory-mapped and cannot be compressed: {path}")
+        return 'columns', None
+    return 'csv', compression
+
+
+def is_input_file(path: str) -> bool:
+    return os.path.splitext(_split_compression(path)[0])[1] in INPUT_SUFFIXES
+
+
+def open_text(path: str) -> IO[str]:
+    """Open a CSV or JSON Lines file, decompressing it while it is read if the suffix says so."""
+    _, compression = input_format(path)
+    if compression is None:
+        return open(path, 'r', newline='')
+    return COMPRESSED_OPENERS[compression](path, 'rt', newline='')
+
+
+def sales_reader(path: str, quarantine_path: Optional[str] = None,
+                 chunk_size: int = PARSE_CHUNK_SIZE, exact: bool = False,
+                 keep_rejected: bool = False) -> 'SalesCsvReader':
+    """The validating reader for a CSV or JSON Lines file, compressed or not."""
+    source_format, _ = input_format(path)
+    if source_format == 'columns':
+        raise ValueError(f"{path} is a column file; load it with sales_analysis.load_sales_columns")
+    reader_class = SalesJsonLinesReader if source_format == 'jsonl' else SalesCsvReader
+    return reader_class(path, quarantine_path, chunk_size, exact, keep_rejected=keep_rejected)
+
+
+class SalesCsvReader:
+    """Validating CSV reader yielding SalesRecord.from_values argument tuples.
+
+    Header positions are looked up once and no dict is built per row: each
+    chunk of csv.reader rows is transposed and its columns converted with
+    map(). A chunk that fails to convert is halved until the bad rows are
+    isolated and only those small pieces are parsed row by row; a row
+    with the wrong number of fields or an unparsable date, price or quantity
+    is skipped and, with quarantine_path, written there with its line number
+    and the error. rows and rejected count accepted and skipped rows, and
+    with keep_rejected the skipped rows are also kept in rejected_rows. With
+    exact=True prices with fractions of a cent are rejected as well.
+    """
+
+    def __init__(self, csv_file_path: str, quarantine_path: Optional[str] = None,
+                 chunk_size: int = PARSE_CHUNK_SIZE, exact: bool = False, quarantine_mode: str = 'w',
+                 keep_rejected: bool = False):
+        self.csv_file_path = csv_file_path
+        self.quarantine_path = quarantine_path
+        self.quarantine_mode = quarantine_mode
+        self.rejected_rows: Optional[List[List]] = [] if keep_rejected else None
+        self.chunk_size = chunk_size
+        self.exact = exact
+        self.rows = 0
+        self.rejected = 0
+        self.bytes_read = 0
+        self.lines_read = 0
+
+    def __iter__(self) -> Iterator[Tuple]:
+        return chain.from_iterable(self.chunks())
+
+    def chunks(self) -> Iterator[List[Tuple]]:
+        """Lists of up to chunk_size parsed rows, in file order."""
+        self.rows = self.rejected = 0
+        with open_text(self.csv_file_path) as file:
+            reader = self._rows(file)
+            yield from self.parse_chunks(reader, next(reader, []))
+            self.lines_read = reader.line_num
+            self.bytes_read = file.buffer.tell()
+
+    def parse_chunks(self, reader: Iterator[List[str]], header: List[str],
+                     line_offset: int = 0) -> Iterator[List[Tuple]]:
+        """Parse the rows of a csv.reader-like reader under header, chunk by chunk.
+
+        Quarantined line numbers are line_offset plus the reader's line_num,
+        so a reader over the tail of a file passes the lines before it. An
+        empty header, as from a 0-byte file, means there are no rows.
+        """
+        self.header = header
+        if not header:
+            return
+        missing = [field for field in ROW_FIELDS if field not in self.header]
+        if missing:
+            raise ValueError(f"CSV header of {self.csv_file_path} is missing {', '.join(missing)}")
+        self._positions = [self.header.index(field) for field in ROW_FIELDS]
+        with contextlib.ExitStack() as stack:
+            self._quarantine = None
+            self._stack = stack
+
+            line = line_offset + reader.line_num + 1
+            chunk = list(islice(reader, self.chunk_size))
+            while chunk:
+                try:
+                    values = self._parse_columns(chunk)
+                except ValueError:
+                    values = self._parse_split(chunk, self._row_lines(chunk, line))
+                self.rows += len(values)
+                yield values
+                line = line_offset + reader.line_num + 1
+                chunk = list(islice(reader, self.chunk_size))
+
+    def _rows(self, file: IO[str]) -> Iterator[List[str]]:
+        """The header, then each row's fields; line_num counts the lines read so far."""
+        return csv.reader(file)
+
+    def _parse_columns(self, chunk: List[List[str]]) -> List[Tuple]:
+        """Convert a whole chunk column by column; raises ValueError if any row is bad."""
+        widths = set(map(len, chunk))
+        if widths == {len(self.header), 0}:
+            chunk = [fields for fields in chunk if fields]
+        elif widths != {len(self.header)}:
+            raise ValueError("rows of unexpected width")
+        columns = list(zip(*chunk))
+        (order_ids, dates, products, categories, prices, quantities, regions, customers,
+         salespeople) = (columns[i] for i in self._positions)
+        prices = list(map(float, prices))
+        if not all(map(math.isfinite, prices)):
+            raise ValueError("non-finite price")
+        if self.exact and not all(map(is_whole_cents, prices)):
+            raise ValueError("price with fractional cents")
+        intern = sys.intern
+        return list(zip(order_ids, map(to_epoch_day, dates), map(intern, products),
+                        map(intern, categories), prices, list(map(int, quantities)),
+                        map(intern, regions), map(intern, customers), map(intern, salespeople)))
+
+    @staticmethod
+    def _row_lines(chunk: List[List[str]], line: int) -> Sequence[int]:
+        """The line each row of a chunk starts on, given the chunk's first line."""
+        if '\n' not in ''.join(map(''.join, chunk)):
+            return range(line, line + len(chunk))
+        return list(accumulate((1 + sum(field.count('\n') for field in fields) for fields in chunk[:-1]),
+                               initial=line))
+
+    def _parse_split(self, chunk: List[List[str]], lines: Sequence[int]) -> List[Tuple]:
+        """Parse a chunk that failed as a whole by halving it.
+
+        Halves that convert column by column are kept and failing halves are
+        split again, so only the few rows around a bad one are validated row
+        by row.
+        """
+        if len(chunk) <= PARSE_ROWS_BELOW:
+            return self._parse_rows(chunk, lines)
+        middle = len(chunk) // 2
+        values = []
+        for part, part_lines in ((chunk[:middle], lines[:middle]), (chunk[middle:], lines[middle:])):
+            try:
+                values.extend(self._parse_columns(part))
+            except ValueError:
+                values.extend(self._parse_split(part, part_lines))
+        return values
+
+    def _parse_rows(self, chunk: List[List[str]], lines: Sequence[int]) -> List[Tuple]:
+        """Validate each row on its own, quarantining the bad ones; lines are the rows' line numbers."""
+        width = len(self.header)
+        order_id_at, date_at, product_at, category_at, price_at, quantity_at, region_at, \
+            customer_at, salesperson_at = self._positions
+        intern = sys.intern
+        values = []
+        for fields, line in zip(chunk, lines):
+            if not fields:
+                continue
+            try:
+                if len(fields) != width:
+                    raise ValueError(f"expected {width} fields, found {len(fields)}")
+                price = float(fields[price_at])
+                if not math.isfinite(price):
+                    raise ValueError(f"price is not a finite number: {fields[price_at]!r}")
+                if self.exact and not is_whole_cents(price):
+                    raise ValueError(f"price has fractional cents: {fields[price_at]!r}")
+                values.append((fields[order_id_at], to_epoch_day(fields[date_at]),
+                               intern(fields[product_at]), intern(fields[category_at]), price,
+                               int(fields[quantity_at]), intern(fields[region_at]),
+                               intern(fields[customer_at]), intern(fields[salesperson_at])))
+            except ValueError as e:
+                self._reject(line, str(e), fields)
+        return values
+
+    def _reject(self, line: int, error: str, fields: List[str]) -> None:
+        self.rejected += 1
+        if self.rejected_rows is not None:
+            self.rejected_rows.append([line, error] + fields)
+        if self.quarantine_path is None:
+            return
+        if self._quarantine is None:
+            file = self._stack.enter_context(open(self.quarantine_path, self.quarantine_mode, newline=''))
+            self._quarantine = csv.writer(file)
+            if not file.tell():
+                self._quarantine.writerow(['line', 'error'] + self.header)
+        self._quarantine.writerow([line, error] + fields)
+
+
+class JsonLinesRows:
+    """csv.reader-like rows of a JSON Lines file: ROW_FIELDS as the header, then field lists.
+
+    Values that are not strings are kept as their JSON text. A line that is
+    not a JSON object holding every column comes back with fewer fields, so
+    it is rejected like a CSV row of the wrong width.
+    """
+
+    def __init__(self, file: IO[str]):
+        self.file = file
+        self.line_num = 0
+        self._header_sent = False
+
+    def __iter__(self) -> 'JsonLinesRows':
+        return self
+
+    def __next__(self) -> List[str]:
+        if not self._header_sent:
+            self._header_sent = True
+            return list(ROW_FIELDS)
+        text = next(self.file)
+        self.line_num += 1
+        if not text.strip():
+            return []
+        try:
+            row = json.loads(text)
+        except ValueError:
+            return [text.rstrip('\r\n')]
+        if not isinstance(row, dict):
+            return [text.rstrip('\r\n')]
+        return [json_text(row[field]) for field in ROW_FIELDS if field in row]
+
+
+class SalesJsonLinesReader(SalesCsvReader):
+    """SalesCsvReader over JSON Lines: one object per line keyed by the CSV column names."""
+
+    def _rows(self, file: IO[str]) -> Iterator[List[str]]:
+        return JsonLinesRows(file)
+
+
+def json_text(value: Any) -> str:
+    return value if isinstance(value, str) else json.dumps(value)
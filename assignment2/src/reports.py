@@ -0,0 +1,255 @@
+"""
+Report pipeline: the report's sections, computed from any SalesMetrics, and
+renderers that write them as text, JSON or CSV in one buffered write.
+
+Batch mode writes one report per dataset from a process pool. This module
+does not import sales_analysis; datasets are loaded by the function passed
+to run_batch.
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from itertools import islice
+from typing import IO, TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from profiling import active, profiled
+
+if TYPE_CHECKING:
+    from sales_analysis import SalesMetrics
+
+REPORT_FORMATS = ('text', 'json', 'csv')
+REPORT_SUFFIXES = {'text': '.txt', 'json': '.json', 'csv': '.csv'}
+QUARANTINE_SUFFIX = '.rejected.csv'
+FILTER_TITLES = {
+    'electronics': 'Electronics sales count',
+    'january': 'January sales count',
+    'over_500': 'Sales over $500',
+}
+
+
+def _by_revenue(groups: Dict[str, Any], field: Optional[str] = None) -> Dict[str, Any]:
+    """groups ordered by revenue, highest first; field names the revenue of dict values."""
+    return dict(sorted(groups.items(), key=lambda item: item[1] if field is None else item[1][field],
+                       reverse=True))
+
+
+def _category_lines(stats: Dict[str, Dict[str, Any]]) -> List[str]:
+    lines = []
+    for cat, s in stats.items():
+        lines += ["", f"{cat}:",
+                  f"  Total Revenue: ${s['total_revenue']:,.2f}",
+                  f"  Total Orders: {s['total_orders']}",
+                  f"  Total Quantity: {s['total_quantity']}",
+                  f"  Average Price: ${s['average_price']:,.2f}",
+                  f"  Max Order: ${s['max_order']:,.2f}",
+                  f"  Min Order: ${s['min_order']:,.2f}"]
+    return lines
+
+
+# Report sections in order: name -> (text title, compute from the metrics, text lines of the value).
+# Values are plain dicts, lists and numbers so the JSON and CSV renderers need no per-section code.
+REPORT_SECTIONS: Dict[str, Tuple[str, Callable[['SalesMetrics'], Any], Callable[[Any], List[str]]]] = {
+    'total_revenue': (
+        "TOTAL REVENUE",
+        lambda m: m.get_total_revenue(),
+        lambda total: [f"Total Revenue: ${total:,.2f}"]),
+    'revenue_by_category': (
+        "REVENUE BY CATEGORY",
+        lambda m: _by_revenue(m.get_revenue_by_category()),
+        lambda revenue: [f"{cat:20s}: ${rev:,.2f}" for cat, rev in revenue.items()]),
+    'revenue_by_region': (
+        "REVENUE BY REGION",
+        lambda m: _by_revenue(m.get_revenue_by_region()),
+        lambda revenue: [f"{reg:20s}: ${rev:,.2f}" for reg, rev in revenue.items()]),
+    'top_products': (
+        "TOP 5 PRODUCTS BY REVENUE",
+        lambda m: m.get_top_products(5),
+        lambda products: [f"{i}. {p['product']:30s} - Revenue: ${p['revenue']:,.2f}, "
+                          f"Quantity: {p['quantity_sold']}" for i, p in enumerate(products, 1)]),
+    'revenue_by_month': (
+        "REVENUE BY MONTH",
+        lambda m: m.get_sales_by_month(),
+        lambda monthly: [f"{month}: ${rev:,.2f}" for month, rev in monthly.items()]),
+    'average_order_value': (
+        "AVERAGE ORDER VALUE",
+        lambda m: m.get_average_order_value(),
+        lambda avg: [f"Average Order Value: ${avg:,.2f}"]),
+    'salesperson_performance': (
+        "PERFORMANCE BY SALESPERSON",
+        lambda m: _by_revenue(m.get_sales_by_salesperson(), 'total_revenue'),
+        lambda stats: [f"{sp}: Revenue: ${s['total_revenue']:,.2f}, Orders: {s['total_orders']}, "
+                       f"Avg Order: ${s['average_order_value']:,.2f}" for sp, s in stats.items()]),
+    'category_statistics': (
+        "DETAILED CATEGORY STATISTICS",
+        lambda m: _by_revenue(m.get_category_statistics(), 'total_revenue'),
+        _category_lines),
+    'high_value_customers': (
+        "HIGH VALUE CUSTOMERS (>$1000)",
+        lambda m: sorted(m.get_high_value_customers(1000.0), key=lambda c: c['total_spending'],
+                         reverse=True),
+        lambda customers: [f"{c['customer_id']}: ${c['total_spending']:,.2f} ({c['order_count']} orders)"
+                           for c in customers]),
+}
+
+
+def build_report(analyzer: 'SalesMetrics', threads: int = 1) -> Dict[str, Any]:
+    """Every report section's value by name, in report order, plus filter_counts when the metrics have them.
+
+    The sections read analyzer.report_metrics(), which a SalesDataAnalyzer
+    reduces with one ReportPlan scan. They do not depend on each other, so
+    with threads > 1 they are computed in a thread pool. Threads are not
+    used while a Profiler is active, as it records one call stack.
+    """
+    analyzer = analyzer.report_metrics()
+    computes = {name: compute for name, (_, compute, _) in REPORT_SECTIONS.items()}
+    if threads > 1 and active() is None:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            futures = {name: pool.submit(compute, analyzer) for name, compute in computes.items()}
+            report = {name: future.result() for name, future in futures.items()}
+    else:
+        report = {name: compute(analyzer) for name, compute in computes.items()}
+    if getattr(analyzer, 'filter_counts', None):
+        report['filter_counts'] = dict(analyzer.filter_counts)
+    return report
+
+
+def render_text(report: Dict[str, Any]) -> str:
+    lines = ["=" * 80, "SALES DATA ANALYSIS REPORT", "=" * 80, ""]
+    for number, (name, (title, _, text_lines)) in enumerate(REPORT_SECTIONS.items(), 1):
+        lines += [f"{number}. {title}", "-" * 80, *text_lines(report[name]), ""]
+    lines.append("=" * 80)
+    if 'filter_counts' in report:
+        lines += [f"{len(REPORT_SECTIONS) + 1}. FILTERING EXAMPLES", "-" * 80]
+        lines += [f"{FILTER_TITLES.get(label, label)}: {count}"
+                  for label, count in report['filter_counts'].items()]
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def render_json(report: Dict[str, Any]) -> str:
+    return json.dumps(report, indent=2) + "\n"
+
+
+def report_rows(report: Dict[str, Any]) -> Iterator[Tuple[str, str, str, Any]]:
+    """(section, key, field, value) for every number in the report; key and field may be empty.
+
+    List sections are keyed by their first field (product or customer_id).
+    """
+    for section, value in report.items():
+        if isinstance(value, list):
+            value = {next(iter(item.values())): dict(islice(item.items(), 1, None)) for item in value}
+        if not isinstance(value, dict):
+            yield section, '', '', value
+            continue
+        for key, fields in value.items():
+            if isinstance(fields, dict):
+                yield from ((section, key, field, v) for field, v in fields.items())
+            else:
+                yield section, key, '', fields
+
+
+def render_csv(report: Dict[str, Any]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(('section', 'key', 'field', 'value'))
+    writer.writerows(report_rows(report))
+    return buffer.getvalue()
+
+
+RENDERERS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    'text': render_text,
+    'json': render_json,
+    'csv': render_csv,
+}
+
+
+def write_report(report: Dict[str, Any], output_format: str = 'text', file: Optional[IO[str]] = None) -> None:
+    """Render the whole report in memory and write it to file (stdout by default) at once."""
+    if output_format not in RENDERERS:
+        raise ValueError(f"Unknown report format '{output_format}', expected one of {REPORT_FORMATS}")
+    (file or sys.stdout).write(RENDERERS[output_format](report))
+
+
+@profiled
+def print_analysis_results(analyzer: 'SalesMetrics', output_format: str = 'text',
+                           file: Optional[IO[str]] = None, threads: int = 1) -> None:
+    write_report(build_report(analyzer, threads), output_format, file)
+
+
+def report_output_path(path: str, input_root: str, output_dir: str, output_format: str) -> str:
+    """Where batch mode writes path's report: its place under input_root mirrored under output_dir.
+
+    The format's suffix is appended to the whole file name (sales.csv.gz ->
+    sales.csv.gz.json), so inputs never share a report or get overwritten.
+    """
+    return os.path.join(output_dir, os.path.relpath(path, input_root) + REPORT_SUFFIXES[output_format])
+
+
+def report_dataset(path: str, output_path: str, output_format: str, threads: int,
+                   load: Callable[..., Tuple['SalesMetrics', int]], options: Dict[str, Any]) -> int:
+    """Load one dataset with load(path, **options), write its report to output_path and return its rows."""
+    if options.get('quarantine'):
+        os.makedirs(os.path.dirname(options['quarantine']) or '.', exist_ok=True)
+    metrics, rows = load(path, **options)
+    report = build_report(metrics, threads)
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w', newline='') as file:
+        write_report(report, output_format, file)
+    return rows
+
+
+def run_batch(paths: Sequence[str], output_dir: str, load: Callable[..., Tuple['SalesMetrics', int]],
+              output_format: str = 'json', jobs: int = 1, threads: int = 1,
+              quarantine_dir: Optional[str] = None, **load_options: Any) -> Dict[str, Any]:
+    """Write one report per dataset into output_dir, in a process pool when jobs > 1.
+
+    load(path, **load_options) returns a dataset's metrics and row count; it
+    must be a module-level function so worker processes can unpickle it. A
+    dataset that fails to load or write is recorded under 'failed' with
+    its error and the others carry on. With quarantine_dir each dataset's
+    malformed rows go to its own file there, laid out like the reports with
+    a QUARANTINE_SUFFIX. Returns the counts, elapsed seconds and the
+    throughput in datasets per minute.
+    """
+    if output_format not in RENDERERS:
+        raise ValueError(f"Unknown report format '{output_format}', expected one of {REPORT_FORMATS}")
+    input_root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths]) if paths else ''
+    start = time.perf_counter()
+    rows = 0
+    failed: Dict[str, str] = {}
+    tasks = []
+    for path in paths:
+        options = load_options
+        if quarantine_dir is not None:
+            quarantine = os.path.join(quarantine_dir, os.path.relpath(os.path.abspath(path), input_root))
+            options = dict(load_options, quarantine=quarantine + QUARANTINE_SUFFIX)
+        tasks.append((path, report_output_path(os.path.abspath(path), input_root, output_dir, output_format),
+                      output_format, threads, load, options))
+    if jobs <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            try:
+                rows += report_dataset(*task)
+            except Exception as e:
+                failed[task[0]] = str(e)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(report_dataset, *task): task[0] for task in tasks}
+            for future in as_completed(futures):
+                try:
+                    rows += future.result()
+                except Exception as e:
+                    failed[futures[future]] = str(e)
+    seconds = time.perf_counter() - start
+    written = len(tasks) - len(failed)
+    return {
+        'datasets': written,
+        'failed': failed,
+        'rows': rows,
+        'seconds': seconds,
+        'datasets_per_minute': written * 60 / seconds if seconds else 0.0,
+    }
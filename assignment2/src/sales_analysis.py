@@ -2,251 +2,2203 @@
 Sales data analysis using functional programming.
 """
 
+import argparse
+import contextlib
+import copy
 import csv
-from functools import reduce
-from typing import List, Dict, Any, Callable
+import gc
+import glob
+import hashlib
+import io
+import heapq
+import operator
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from array import array
+from functools import lru_cache, reduce
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple, Union
 from datetime import datetime
 import os
+import re
+import sys
+import time
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, chain, islice, repeat, starmap
+import warnings
+
+from column_cache import (ColumnFile, column_file_matches, read_column_file, source_signature,
+                          write_column_file)
+import numpy_backend
+from profiling import Profiler, profiled
+# The readers used to live in this module; names only imported here stay importable from it.
+from readers import (COLUMNS_SUFFIX, COMPRESSED_OPENERS, DATE_CACHE_SIZE, EPOCH_ORDINAL, INPUT_SUFFIXES,
+                     JSON_LINES_SUFFIXES, PARSE_CHUNK_SIZE, ROW_FIELDS, JsonLinesRows, SalesCsvReader,
+                     SalesJsonLinesReader, input_format, is_input_file, is_whole_cents, json_text, open_text,
+                     sales_reader, to_cents, to_epoch_day, warn_rejected, write_quarantine)
+import reports
+# The report pipeline used to live here too; run_batch below wraps reports.run_batch.
+from reports import (FILTER_TITLES, QUARANTINE_SUFFIX, RENDERERS, REPORT_FORMATS, REPORT_SECTIONS,
+                     REPORT_SUFFIXES, build_report, print_analysis_results, render_csv, render_json,
+                     render_text, report_dataset, report_output_path, report_rows, write_report)
+from sketches import HeavyHitters, HyperLogLog, KllSketch
+
+KEY_FIELDS = ('category', 'region', 'product', 'customer_id', 'salesperson')
+BACKENDS = ('records', 'columnar', 'numpy')
+DEFAULT_CHUNK_SIZE = 10000
+CACHE_SUFFIX = '.colcache'
+SUMMARY_SUFFIX = '.summary'
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def month_key(day: int) -> int:
+    date = to_datetime(day)
+    return date.year * 12 + date.month - 1
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def month_label(key: int) -> str:
+    return f"{key // 12:04d}-{key % 12 + 1:02d}"
+
+
+def to_datetime(day: int) -> datetime:
+    return datetime.fromordinal(day + EPOCH_ORDINAL)
+
 
 class SalesRecord:
+    """One order line. Records are treated as read-only: total_amount is computed once."""
+    
+    __slots__ = ('order_id', 'day', 'month_key', '_date', 'product', 'category', 'price',
+                 'quantity', 'total_amount', 'region', 'customer_id', 'salesperson')
     
     def __init__(self, row: Dict[str, str]):
         self.order_id = row['order_id']
-        self.date = datetime.strptime(row['date'], '%Y-%m-%d')
-        self.product = row['product']
-        self.category = row['category']
+        self.day = to_epoch_day(row['date'])
+        self.month_key = month_key(self.day)
+        self._date: Optional[datetime] = None
+        self.product = sys.intern(row['product'])
+        self.category = sys.intern(row['category'])
         self.price = float(row['price'])
         self.quantity = int(row['quantity'])
-        self.region = row['region']
-        self.customer_id = row['customer_id']
-        self.salesperson = row['salesperson']
+        self.total_amount = self.price * self.quantity
+        self.region = sys.intern(row['region'])
+        self.customer_id = sys.intern(row['customer_id'])
+        self.salesperson = sys.intern(row['salesperson'])
+    
+    @classmethod
+    def from_values(cls, order_id: str, day: int, product: str, category: str,
+                    price: float, quantity: int, region: str, customer_id: str,
+                    salesperson: str) -> 'SalesRecord':
+        record = cls.__new__(cls)
+        record.order_id = order_id
+        record.day = day
+        record.month_key = month_key(day)
+        record._date = None
+        record.product = product
+        record.category = category
+        record.price = price
+        record.quantity = quantity
+        record.total_amount = price * quantity
+        record.region = region
+        record.customer_id = customer_id
+        record.salesperson = salesperson
+        return record
     
     @property
-    def total_amount(self) -> float:
-        return self.price * self.quantity
+    def date(self) -> datetime:
+        if self._date is None:
+            self._date = to_datetime(self.day)
+        return self._date
+    
+    @date.setter
+    def date(self, value: datetime) -> None:
+        self.day = value.toordinal() - EPOCH_ORDINAL
+        self.month_key = month_key(self.day)
+        self._date = value
     
     def __repr__(self):
         return f"SalesRecord({self.order_id}, {self.product}, ${self.total_amount:.2f})"
 
 
-class SalesDataAnalyzer:
+class GroupStats:
+    """Running totals for one group; fed in row order so sums match a plain reduce."""
     
-    def __init__(self, csv_file_path: str):
-        self.csv_file_path = csv_file_path
-        self.sales_data: List[SalesRecord] = []
-        self._load_data()
+    __slots__ = ('revenue', 'orders', 'quantity', 'price_total', 'max_order', 'min_order')
     
-    def _load_data(self) -> None:
-        if not os.path.exists(self.csv_file_path):
-            raise FileNotFoundError(f"CSV file not found: {self.csv_file_path}")
-        
-        with open(self.csv_file_path, 'r') as file:
-            reader = csv.DictReader(file)
-            self.sales_data = list(map(lambda row: SalesRecord(row), reader))
+    def __init__(self, zero: Union[int, float] = 0.0):
+        self.revenue = zero
+        self.orders = 0
+        self.quantity = 0
+        self.price_total = zero
+        self.max_order = float('-inf')
+        self.min_order = float('inf')
     
-    def get_total_revenue(self) -> float:
-        return reduce(lambda acc, r: acc + r.total_amount, self.sales_data, 0.0)
+    @classmethod
+    def from_totals(cls, revenue: float, orders: int, quantity: int, price_total: float,
+                    max_order: float, min_order: float) -> 'GroupStats':
+        stats = cls()
+        stats.revenue = revenue
+        stats.orders = orders
+        stats.quantity = quantity
+        stats.price_total = price_total
+        stats.max_order = max_order
+        stats.min_order = min_order
+        return stats
     
-    def get_revenue_by_category(self) -> Dict[str, float]:
-        groups = self._group_by(lambda r: r.category)
+    def add(self, price: float, quantity: int) -> 'GroupStats':
+        amount = price * quantity
+        self.revenue += amount
+        self.orders += 1
+        self.quantity += quantity
+        self.price_total += price
+        if amount > self.max_order:
+            self.max_order = amount
+        if amount < self.min_order:
+            self.min_order = amount
+        return self
+    
+    def merge(self, other: 'GroupStats') -> 'GroupStats':
+        """Fold another group's totals into this one."""
+        self.revenue += other.revenue
+        self.orders += other.orders
+        self.quantity += other.quantity
+        self.price_total += other.price_total
+        if other.max_order > self.max_order:
+            self.max_order = other.max_order
+        if other.min_order < self.min_order:
+            self.min_order = other.min_order
+        return self
+    
+    def to_dollars(self) -> 'GroupStats':
+        """These totals, kept in integer cents, as dollar amounts."""
+        return GroupStats.from_totals(self.revenue / 100, self.orders, self.quantity,
+                                      self.price_total / 100, self.max_order / 100,
+                                      self.min_order / 100)
+
+
+def groups_to_dollars(groups: Dict[Any, GroupStats]) -> Dict[Any, GroupStats]:
+    return {key: stats.to_dollars() for key, stats in groups.items()}
+
+
+class ColumnStore:
+    """Typed column arrays with dictionary-encoded string fields.
+    
+    Columns are arrays, or read-only memoryviews when loaded from a column
+    file; those are copied into arrays on the first append.
+    """
+    
+    def __init__(self):
+        self.order_ids: Sequence[str] = []
+        self.price: Sequence[float] = array('d')
+        self.quantity: Sequence[int] = array('q')
+        self.day: Sequence[int] = array('q')
+        self.codes: Dict[str, Sequence[int]] = {field: array('q') for field in KEY_FIELDS}
+        self.dictionaries: Dict[str, List[str]] = {field: [] for field in KEY_FIELDS}
+        self._lookup: Dict[str, Dict[str, int]] = {field: {} for field in KEY_FIELDS}
+        self._read_only = False
+        self.source_bytes = 0
+        self.rejected = 0
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, str]]) -> 'ColumnStore':
+        store = cls()
+        for row in rows:
+            store.append_row(row)
+        return store
+    
+    @classmethod
+    def from_records(cls, records: Iterable[SalesRecord]) -> 'ColumnStore':
+        store = cls()
+        for record in records:
+            store.append_record(record)
+        return store
+    
+    @classmethod
+    def from_values(cls, chunks: Iterable[List[Tuple]]) -> 'ColumnStore':
+        """Store chunks of rows given as SalesRecord.from_values argument tuples."""
+        store = cls()
+        for rows in chunks:
+            store.extend_values(rows)
+        return store
+    
+    @classmethod
+    def from_column_file(cls, column_file: ColumnFile) -> 'ColumnStore':
+        store = cls()
+        store.order_ids = column_file.texts['order_id']
+        store.price = column_file.columns['price']
+        store.quantity = column_file.columns['quantity']
+        store.day = column_file.columns['day']
+        for field in KEY_FIELDS:
+            store.codes[field] = column_file.columns[f"codes.{field}"]
+            store.dictionaries[field] = column_file.strings[field]
+            store._lookup[field] = {value: code for code, value in enumerate(store.dictionaries[field])}
+        store._read_only = True
+        store.source_bytes = column_file.meta.get('source', {}).get('size', 0)
+        return store
+    
+    def write_column_file(self, path: str, meta: Dict[str, Any]) -> None:
+        self._make_writable()
+        columns = {'price': self.price, 'quantity': self.quantity, 'day': self.day}
+        columns.update((f"codes.{field}", self.codes[field]) for field in KEY_FIELDS)
+        write_column_file(path, columns, self.dictionaries, {'order_id': self.order_ids}, meta)
+    
+    def __len__(self) -> int:
+        return len(self.price)
+    
+    def _make_writable(self) -> None:
+        if not self._read_only:
+            return
+        self.order_ids = list(self.order_ids)
+        self.price = array('d', self.price)
+        self.quantity = array('q', self.quantity)
+        self.day = array('q', self.day)
+        self.codes = {field: array('q', codes) for field, codes in self.codes.items()}
+        self._read_only = False
+    
+    def extend(self, other: 'ColumnStore') -> None:
+        """Append another store's rows, remapping its dictionary codes onto ours."""
+        self._make_writable()
+        self.order_ids.extend(other.order_ids)
+        self.price.extend(other.price)
+        self.quantity.extend(other.quantity)
+        self.day.extend(other.day)
+        for field in KEY_FIELDS:
+            remap = [self.encode(field, value) for value in other.dictionaries[field]]
+            self.codes[field].extend(map(remap.__getitem__, other.codes[field]))
+    
+    def append_row(self, row: Dict[str, str]) -> None:
+        self.append_values(row['order_id'], to_epoch_day(row['date']), float(row['price']),
+                           int(row['quantity']), [row[field] for field in KEY_FIELDS])
+    
+    def append_record(self, record: SalesRecord) -> None:
+        self.append_values(record.order_id, record.day, record.price, record.quantity,
+                           [getattr(record, field) for field in KEY_FIELDS])
+    
+    def append_values(self, order_id: str, day: int, price: float, quantity: int,
+                      keys: List[str]) -> None:
+        if self._read_only:
+            self._make_writable()
+        self.order_ids.append(order_id)
+        self.price.append(price)
+        self.quantity.append(quantity)
+        self.day.append(day)
+        for field, value in zip(KEY_FIELDS, keys):
+            self.codes[field].append(self.encode(field, value))
+    
+    def extend_values(self, rows: List[Tuple]) -> None:
+        """Append SalesRecord.from_values argument tuples column by column."""
+        if not rows:
+            return
+        if self._read_only:
+            self._make_writable()
+        columns = dict(zip(ROW_FIELDS, zip(*rows)))
+        self.order_ids.extend(columns['order_id'])
+        self.price.extend(columns['price'])
+        self.quantity.extend(columns['quantity'])
+        self.day.extend(columns['date'])
+        for field in KEY_FIELDS:
+            values = columns[field]
+            lookup = self._lookup[field]
+            for value in dict.fromkeys(values):
+                if value not in lookup:
+                    self.encode(field, value)
+            self.codes[field].extend(map(lookup.__getitem__, values))
+    
+    def encode(self, field: str, value: str) -> int:
+        lookup = self._lookup[field]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self.dictionaries[field])
+            self.dictionaries[field].append(value)
+        return code
+    
+    def code_of(self, field: str, value: str) -> Optional[int]:
+        return self._lookup[field].get(value)
+    
+    def record(self, i: int) -> SalesRecord:
+        values = {field: self.dictionaries[field][self.codes[field][i]] for field in KEY_FIELDS}
+        return SalesRecord.from_values(
+            order_id=self.order_ids[i],
+            day=self.day[i],
+            price=self.price[i],
+            quantity=self.quantity[i],
+            **values
+        )
+    
+    def total_revenue(self, exact: bool = False) -> Union[float, int]:
+        """Revenue in dollars, or in integer cents when exact."""
+        if exact:
+            return sum(map(operator.mul, map(to_cents, self.price), self.quantity))
+        return reduce(lambda acc, pq: acc + pq[0] * pq[1], zip(self.price, self.quantity), 0.0)
+    
+    def group_stats(self, field: str, exact: bool = False) -> Dict[str, GroupStats]:
+        keys, label = self._group_keys(field)
+        prices = map(to_cents, self.price) if exact else self.price
+        zero = 0 if exact else 0.0
+        groups: Dict[Any, GroupStats] = {}
+        for key, price, quantity in zip(keys, prices, self.quantity):
+            stats = groups.get(key)
+            if stats is None:
+                stats = groups[key] = GroupStats(zero)
+            stats.add(price, quantity)
+        return {label(key): stats for key, stats in groups.items()}
+    
+    def group_cells(self, fields: Sequence[str], exact: bool = False) -> Dict[Tuple[str, ...], GroupStats]:
+        """GroupStats per combination of field values, in one pass over the rows; cents when exact."""
+        keyed = [self._group_keys(field) for field in fields]
+        prices = map(to_cents, self.price) if exact else self.price
+        zero = 0 if exact else 0.0
+        groups: Dict[Tuple[Any, ...], GroupStats] = {}
+        for key, price, quantity in zip(zip(*(keys for keys, _ in keyed)), prices, self.quantity):
+            stats = groups.get(key)
+            if stats is None:
+                stats = groups[key] = GroupStats(zero)
+            stats.add(price, quantity)
+        labels = [label for _, label in keyed]
         return {
-            cat: reduce(lambda acc, r: acc + r.total_amount, records, 0.0)
-            for cat, records in groups.items()
+            tuple(label(part) for label, part in zip(labels, key)): stats
+            for key, stats in groups.items()
         }
     
+    def group_rows(self, field: str) -> Dict[str, List[int]]:
+        keys, label = self._group_keys(field)
+        groups: Dict[Any, List[int]] = defaultdict(list)
+        for i, key in enumerate(keys):
+            groups[key].append(i)
+        return {label(key): rows for key, rows in groups.items()}
+    
+    def _group_keys(self, field: str):
+        if field == 'month':
+            return map(month_key, self.day), month_label
+        return self.codes[field], self.dictionaries[field].__getitem__
+    
+    def rows_where(self, predicate: Callable[[int], bool]) -> List[int]:
+        return list(filter(predicate, range(len(self))))
+
+
+def whole_cent_rows(columns: ColumnStore) -> ColumnStore:
+    """A copy of columns without the rows priced in fractions of a cent, counted in rejected."""
+    kept = ColumnStore()
+    for record in RecordView(columns):
+        if is_whole_cents(record.price):
+            kept.append_record(record)
+    kept.source_bytes = columns.source_bytes
+    kept.rejected = columns.rejected + len(columns) - len(kept)
+    return kept
+
+
+class RecordView(Sequence):
+    """Read-only sequence over a ColumnStore that builds SalesRecords on access."""
+    
+    def __init__(self, store: ColumnStore, rows: Optional[Sequence[int]] = None):
+        self.store = store
+        self.rows = rows
+    
+    def __len__(self) -> int:
+        return len(self.store) if self.rows is None else len(self.rows)
+    
+    def __getitem__(self, index):
+        rows = range(len(self.store)) if self.rows is None else self.rows
+        if isinstance(index, slice):
+            return RecordView(self.store, rows[index])
+        return self.store.record(rows[index])
+    
+    def __iter__(self) -> Iterator[SalesRecord]:
+        rows = range(len(self.store)) if self.rows is None else self.rows
+        return map(self.store.record, rows)
+    
+    def __repr__(self):
+        return f"RecordView({len(self)} records)"
+
+
+class SequenceSlice(Sequence):
+    """Window over another sequence that does not copy it."""
+    
+    def __init__(self, base: Sequence, start: int, stop: int):
+        self.base = base
+        self.positions = range(start, max(start, stop))
+    
+    def __len__(self) -> int:
+        return len(self.positions)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            positions = self.positions[index]
+            if positions.step == 1:
+                return SequenceSlice(self.base, positions.start, positions.stop)
+            return [self.base[i] for i in positions]
+        return self.base[self.positions[index]]
+    
+    def __iter__(self) -> Iterator:
+        return map(self.base.__getitem__, self.positions)
+
+
+class DateIndex:
+    """Rows sorted by date plus a revenue prefix sum for range queries."""
+    
+    def __init__(self, days: Sequence[int], amounts: Sequence[float], rows: Sequence):
+        order = sorted(range(len(days)), key=days.__getitem__)
+        self.days = [days[i] for i in order]
+        self.rows = [rows[i] for i in order]
+        self.revenue = list(accumulate((amounts[i] for i in order), initial=0))
+    
+    def extend(self, days: Sequence[int], amounts: Sequence[float], rows: Sequence) -> bool:
+        """Append rows that sort after every indexed row; False if they would not."""
+        previous = self.days[-1] if self.days else days[0]
+        for day in days:
+            if day < previous:
+                return False
+            previous = day
+        self.days.extend(days)
+        self.rows.extend(rows)
+        total = self.revenue[-1]
+        for amount in amounts:
+            total += amount
+            self.revenue.append(total)
+        return True
+    
+    def bounds(self, first_day: int, last_day: int) -> Tuple[int, int]:
+        return bisect_left(self.days, first_day), bisect_right(self.days, last_day)
+    
+    def rows_between(self, first_day: int, last_day: int) -> SequenceSlice:
+        return SequenceSlice(self.rows, *self.bounds(first_day, last_day))
+    
+    def revenue_between(self, first_day: int, last_day: int) -> float:
+        lo, hi = self.bounds(first_day, last_day)
+        return self.revenue[hi] - self.revenue[lo] if hi > lo else 0.0
+    
+    def revenue_by_month(self) -> Dict[str, float]:
+        months = {}
+        lo = 0
+        while lo < len(self.days):
+            key = month_key(self.days[lo]) + 1
+            next_month = datetime(key // 12, key % 12 + 1, 1).toordinal() - EPOCH_ORDINAL
+            hi = bisect_left(self.days, next_month, lo)
+            months[month_label(key - 1)] = self.revenue[hi] - self.revenue[lo]
+            lo = hi
+        return months
+
+
+GROUP_KEYS: Dict[str, Callable[[SalesRecord], str]] = {
+    'category': lambda r: r.category,
+    'region': lambda r: r.region,
+    'product': lambda r: r.product,
+    'customer_id': lambda r: r.customer_id,
+    'salesperson': lambda r: r.salesperson,
+    'month': lambda r: month_label(r.month_key),
+}
+
+
+class SalesAggregates:
+    """Per-dimension GroupStats plus grand totals, updated one row at a time.
+    
+    With exact=True money is kept in integer cents, so totals do not depend
+    on row order or on how partial aggregates are merged; revenue() and
+    stats() convert back to dollars. Rows priced in fractions of a cent are
+    then skipped and counted in rejected, as a validating load would.
+    """
+    
+    def __init__(self, exact: bool = False):
+        self.exact = exact
+        self.total_revenue: Union[float, int] = 0 if exact else 0.0
+        self.order_count = 0
+        self.rejected = 0
+        self.groups: Dict[str, Dict[str, GroupStats]] = {dim: {} for dim in GROUP_KEYS}
+    
+    def add(self, price: float, quantity: int, **keys: str) -> bool:
+        """Add one row; False if exact mode skipped it for a sub-cent price."""
+        if self.exact:
+            if not is_whole_cents(price):
+                self.rejected += 1
+                return False
+            price = to_cents(price)
+        self.total_revenue += price * quantity
+        self.order_count += 1
+        for dimension, key in keys.items():
+            groups = self.groups[dimension]
+            stats = groups.get(key)
+            if stats is None:
+                stats = groups[key] = GroupStats(0 if self.exact else 0.0)
+            stats.add(price, quantity)
+        return True
+    
+    def revenue(self) -> float:
+        return self.total_revenue / 100 if self.exact else self.total_revenue
+    
+    def stats(self, dimension: str) -> Dict[str, GroupStats]:
+        groups = self.groups[dimension]
+        return groups_to_dollars(groups) if self.exact else groups
+    
+    def add_record(self, record: SalesRecord) -> bool:
+        return self.add(record.price, record.quantity,
+                 **{dim: key_func(record) for dim, key_func in GROUP_KEYS.items()})
+    
+    def merge(self, other: 'SalesAggregates') -> None:
+        """Fold in the aggregates of rows that come after ours."""
+        self.total_revenue += other.total_revenue
+        self.order_count += other.order_count
+        self.rejected += other.rejected
+        for dimension, other_groups in other.groups.items():
+            groups = self.groups[dimension]
+            for key, other_stats in other_groups.items():
+                stats = groups.get(key)
+                if stats is None:
+                    stats = groups[key] = GroupStats(0 if self.exact else 0.0)
+                stats.merge(other_stats)
+
+
+class SalesSketches:
+    """Approximate customer and order metrics from mergeable sketches.
+    
+    Memory grows with the number of categories and regions, not with rows or
+    customers. Error bounds are documented in the sketches module.
+    """
+    
+    DIMENSIONS = ('category', 'region')
+    
+    def __init__(self, precision: int = 12, k: int = 200, capacity: int = 100):
+        self.precision = precision
+        self.k = k
+        self.customers: Dict[str, Dict[str, HyperLogLog]] = {dim: {} for dim in self.DIMENSIONS}
+        self.amounts: Dict[str, KllSketch] = {}
+        self.spending = HeavyHitters(capacity)
+    
+    def add(self, amount: float, customer_id: str, category: str, region: str) -> None:
+        for dimension, key in (('category', category), ('region', region)):
+            sketches = self.customers[dimension]
+            sketch = sketches.get(key)
+            if sketch is None:
+                sketch = sketches[key] = HyperLogLog(self.precision)
+            sketch.add(customer_id)
+        amounts = self.amounts.get(category)
+        if amounts is None:
+            amounts = self.amounts[category] = KllSketch(self.k)
+        amounts.add(amount)
+        self.spending.add(customer_id, amount)
+    
+    def add_record(self, record: SalesRecord) -> None:
+        self.add(record.total_amount, record.customer_id, record.category, record.region)
+    
+    def merge(self, other: 'SalesSketches') -> 'SalesSketches':
+        for dimension, sketches in other.customers.items():
+            for key, sketch in sketches.items():
+                mine = self.customers[dimension].get(key)
+                if mine is None:
+                    mine = self.customers[dimension][key] = HyperLogLog(self.precision)
+                mine.merge(sketch)
+        for category, sketch in other.amounts.items():
+            mine = self.amounts.get(category)
+            if mine is None:
+                mine = self.amounts[category] = KllSketch(self.k)
+            mine.merge(sketch)
+        self.spending.merge(other.spending)
+        return self
+    
+    def distinct_customers(self, dimension: str = 'category') -> Dict[str, int]:
+        if dimension not in self.customers:
+            raise ValueError(f"Unknown dimension '{dimension}', expected one of {self.DIMENSIONS}")
+        return {key: sketch.count() for key, sketch in self.customers[dimension].items()}
+    
+    def order_quantiles(self, quantiles: Sequence[float] = (0.5, 0.95, 0.99)) -> Dict[str, Dict[float, float]]:
+        return {category: sketch.quantiles(quantiles) for category, sketch in self.amounts.items()}
+    
+    def get_top_customers(self, n: int = 5) -> List[Dict[str, Any]]:
+        """Heaviest spenders; each total is low by at most max_error."""
+        return [
+            {'customer_id': customer, 'total_spending': spending, 'max_error': self.spending.error}
+            for customer, spending in self.spending.top(n)
+        ]
+
+
+@profiled
+def sketch_csv(csv_file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               quarantine_path: Optional[str] = None, **options: int) -> SalesSketches:
+    """Build approximate metrics in one streaming pass over the CSV, skipping malformed rows."""
+    result = SalesSketches(**options)
+    chunks = RecordChunks(csv_file_path, chunk_size, quarantine_path)
+    for chunk in chunks:
+        for record in chunk:
+            result.add_record(record)
+    warn_rejected(chunks.rejected, csv_file_path, quarantine_path)
+    return result
+
+
+RANK_METRICS: Dict[str, Callable[[GroupStats], float]] = {
+    'revenue': lambda s: s.revenue,
+    'quantity': lambda s: s.quantity,
+    'orders': lambda s: s.orders,
+}
+
+
+def top_groups(groups: Dict[str, GroupStats], n: int,
+               metric: str = 'revenue') -> List[Tuple[str, GroupStats]]:
+    """Select the n largest groups with a bounded heap; ties go to the smaller key."""
+    if metric not in RANK_METRICS:
+        raise ValueError(f"Unknown metric '{metric}', expected one of {tuple(RANK_METRICS)}")
+    value_of = RANK_METRICS[metric]
+    return heapq.nsmallest(n, groups.items(), key=lambda item: (-value_of(item[1]), item[0]))
+
+
+@profiled
+def top_n_from_csv(csv_file_path: str, dimension: str, n: int = 5, metric: str = 'revenue',
+                   chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   quarantine_path: Optional[str] = None) -> List[Tuple[str, GroupStats]]:
+    """Rank one dimension in a single streaming pass, keeping only that dimension's groups."""
+    key_func = GROUP_KEYS[dimension]
+    groups: Dict[str, GroupStats] = {}
+    chunks = RecordChunks(csv_file_path, chunk_size, quarantine_path)
+    for chunk in chunks:
+        for record in chunk:
+            key = key_func(record)
+            stats = groups.get(key)
+            if stats is None:
+                stats = groups[key] = GroupStats()
+            stats.add(record.price, record.quantity)
+    warn_rejected(chunks.rejected, csv_file_path, quarantine_path)
+    return top_groups(groups, n, metric)
+
+
+class SalesMetrics(ABC):
+    """Report metrics derived from per-dimension GroupStats."""
+    
+    @abstractmethod
+    def get_total_revenue(self) -> float:
+        ...
+    
+    @abstractmethod
+    def _group_stats(self, dimension: str) -> Dict[str, GroupStats]:
+        ...
+    
+    @abstractmethod
+    def _order_count(self) -> int:
+        ...
+    
+    def report_metrics(self) -> 'SalesMetrics':
+        """What build_report reads: these metrics, or their one-scan reduction."""
+        return self
+    
+    @profiled
+    def get_revenue_by_category(self) -> Dict[str, float]:
+        return {cat: s.revenue for cat, s in self._group_stats('category').items()}
+    
+    @profiled
     def get_revenue_by_region(self) -> Dict[str, float]:
-        groups = self._group_by(lambda r: r.region)
-        return {
-            region: reduce(lambda acc, r: acc + r.total_amount, records, 0.0)
-            for region, records in groups.items()
-        }
+        return {region: s.revenue for region, s in self._group_stats('region').items()}
     
+    @profiled
     def get_top_products(self, n: int = 5) -> List[Dict[str, Any]]:
-        groups = self._group_by(lambda r: r.product)
-        
-        stats = [
+        return [
             {
                 'product': prod,
-                'revenue': reduce(lambda acc, r: acc + r.total_amount, recs, 0.0),
-                'quantity_sold': reduce(lambda acc, r: acc + r.quantity, recs, 0)
+                'revenue': s.revenue,
+                'quantity_sold': s.quantity
             }
-            for prod, recs in groups.items()
+            for prod, s in top_groups(self._group_stats('product'), n)
+        ]
+    
+    @profiled
+    def get_top(self, dimension: str, n: int = 5, metric: str = 'revenue') -> List[Dict[str, Any]]:
+        return [
+            {
+                dimension: key,
+                'revenue': s.revenue,
+                'quantity': s.quantity,
+                'orders': s.orders
+            }
+            for key, s in top_groups(self._group_stats(dimension), n, metric)
         ]
-        
-        return sorted(stats, key=lambda x: x['revenue'], reverse=True)[:n]
     
+    @profiled
+    def get_top_customers(self, n: int = 5, metric: str = 'revenue') -> List[Dict[str, Any]]:
+        return self.get_top('customer_id', n, metric)
+    
+    @profiled
+    def get_top_salespeople(self, n: int = 5, metric: str = 'revenue') -> List[Dict[str, Any]]:
+        return self.get_top('salesperson', n, metric)
+    
+    @profiled
+    def get_top_categories(self, n: int = 5, metric: str = 'revenue') -> List[Dict[str, Any]]:
+        return self.get_top('category', n, metric)
+    
+    @profiled
     def get_sales_by_month(self) -> Dict[str, float]:
-        groups = self._group_by(lambda r: r.date.strftime('%Y-%m'))
         return {
-            month: reduce(lambda acc, r: acc + r.total_amount, records, 0.0)
-            for month, records in sorted(groups.items())
+            month: s.revenue
+            for month, s in sorted(self._group_stats('month').items())
         }
     
+    @profiled
     def get_average_order_value(self) -> float:
-        if not self.sales_data:
+        count = self._order_count()
+        if not count:
             return 0.0
-        return self.get_total_revenue() / len(self.sales_data)
+        return self.get_total_revenue() / count
     
+    @profiled
     def get_sales_by_salesperson(self) -> Dict[str, Dict[str, Any]]:
-        groups = self._group_by(lambda r: r.salesperson)
-        
-        result = {}
-        for sp, records in groups.items():
-            total = reduce(lambda acc, r: acc + r.total_amount, records, 0.0)
-            result[sp] = {
-                'total_revenue': total,
-                'total_orders': len(records),
-                'average_order_value': total / len(records) if records else 0.0
+        return {
+            sp: {
+                'total_revenue': s.revenue,
+                'total_orders': s.orders,
+                'average_order_value': s.revenue / s.orders if s.orders else 0.0
             }
-        return result
-    
-    def filter_by_category(self, category: str) -> List[SalesRecord]:
-        return list(filter(lambda r: r.category == category, self.sales_data))
-    
-    def filter_by_date_range(self, start_date: str, end_date: str) -> List[SalesRecord]:
-        start = datetime.strptime(start_date, '%Y-%m-%d')
-        end = datetime.strptime(end_date, '%Y-%m-%d')
-        return list(filter(lambda r: start <= r.date <= end, self.sales_data))
-    
-    def filter_by_minimum_amount(self, min_amount: float) -> List[SalesRecord]:
-        return list(filter(lambda r: r.total_amount >= min_amount, self.sales_data))
+            for sp, s in self._group_stats('salesperson').items()
+        }
     
+    @profiled
     def get_category_statistics(self) -> Dict[str, Dict[str, Any]]:
-        groups = self._group_by(lambda r: r.category)
-        
-        stats = {}
-        for cat, records in groups.items():
-            amounts = list(map(lambda r: r.total_amount, records))
-            stats[cat] = {
-                'total_revenue': reduce(lambda acc, r: acc + r.total_amount, records, 0.0),
-                'total_orders': len(records),
-                'total_quantity': reduce(lambda acc, r: acc + r.quantity, records, 0),
-                'average_price': reduce(lambda acc, r: acc + r.price, records, 0.0) / len(records) if records else 0.0,
-                'max_order': max(amounts, default=0.0),
-                'min_order': min(amounts, default=0.0)
+        return {
+            cat: {
+                'total_revenue': s.revenue,
+                'total_orders': s.orders,
+                'total_quantity': s.quantity,
+                'average_price': s.price_total / s.orders if s.orders else 0.0,
+                'max_order': s.max_order,
+                'min_order': s.min_order
             }
-        return stats
+            for cat, s in self._group_stats('category').items()
+        }
     
+    @profiled
     def get_high_value_customers(self, min_spending: float = 1000.0) -> List[Dict[str, Any]]:
-        groups = self._group_by(lambda r: r.customer_id)
-        
         customers = [
             {
                 'customer_id': cust_id,
-                'total_spending': reduce(lambda acc, r: acc + r.total_amount, records, 0.0),
-                'order_count': len(records)
+                'total_spending': s.revenue,
+                'order_count': s.orders
             }
-            for cust_id, records in groups.items()
+            for cust_id, s in self._group_stats('customer_id').items()
         ]
         
         return list(filter(lambda c: c['total_spending'] >= min_spending, customers))
+
+
+class SalesDataAnalyzer(SalesMetrics):
+    
+    def __init__(self, csv_file_path: str, backend: str = 'records', workers: int = 1,
+                 cache: bool = False, quarantine: Optional[str] = None, exact: bool = False):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+        if backend == 'numpy' and not numpy_backend.AVAILABLE:
+            warnings.warn("NumPy is not installed; using the columnar backend instead")
+            backend = 'columnar'
+        if backend == 'numpy' and exact:
+            warnings.warn("The numpy backend sums floats; using the columnar backend for exact mode")
+            backend = 'columnar'
+        self.csv_file_path = csv_file_path
+        self.backend = backend
+        self.workers = workers
+        self.cache = cache
+        self.quarantine = quarantine
+        self.exact = exact
+        self.rejected_rows = 0
+        self.columns: Optional[ColumnStore] = None
+        self.scan_count = 0
+        self.rows_scanned = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._generation = 0
+        self._cache: Dict[Any, Tuple[int, Any]] = {}
+        self.sales_data: Sequence[SalesRecord] = []
+        self._source_lines: Optional[int] = None
+        self._load_data()
     
+    def report_metrics(self) -> 'ReportResult':
+        return ReportPlan().execute(self)
+    
+    @property
+    def sales_data(self) -> Sequence[SalesRecord]:
+        return self._sales_data
+    
+    @sales_data.setter
+    def sales_data(self, records: Sequence[SalesRecord]) -> None:
+        """Replace the rows; columnar and numpy analyzers rebuild their columns from them."""
+        if self.columns is not None and not (isinstance(records, RecordView) and records.rows is None
+                                             and records.store is self.columns):
+            self.columns = ColumnStore.from_records(records)
+            records = RecordView(self.columns)
+        self._sales_data = records
+        self.invalidate()
+    
+    def invalidate(self) -> None:
+        """Drop memoized indexes; call after mutating sales_data in place."""
+        self._generation += 1
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        return {
+            'generation': self._generation,
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'entries': sorted(map(str, (key for key, (gen, _) in self._cache.items()
+                                        if gen == self._generation))),
+        }
+    
+    @profiled
+    def _load_data(self) -> None:
+        if not os.path.exists(self.csv_file_path):
+            raise FileNotFoundError(f"CSV file not found: {self.csv_file_path}")
+        
+        source_format = input_format(self.csv_file_path)
+        if (self.workers > 1 or self.cache) and source_format != ('csv', None):
+            warnings.warn(f"Parallel and cached loads read plain CSV only; "
+                          f"loading {self.csv_file_path} in one process")
+            self.workers, self.cache = 1, False
+        
+        if self.workers > 1 or self.cache or source_format[0] == 'columns':
+            if source_format[0] == 'columns':
+                columns = load_sales_columns(self.csv_file_path)
+            elif self.cache:
+                columns = load_cached_columns(self.csv_file_path, self.workers,
+                                              quarantine_path=self.quarantine, exact=self.exact)
+            else:
+                columns = load_columns_parallel(self.csv_file_path, self.workers, self.quarantine,
+                                                self.exact)
+            self._source_bytes = columns.source_bytes
+            self._source_lines = None
+            self.rejected_rows = columns.rejected
+            warn_rejected(columns.rejected, self.csv_file_path, self.quarantine)
+            if self.exact and not all(map(is_whole_cents, columns.price)):
+                columns = whole_cent_rows(columns)
+                self.rejected_rows = columns.rejected
+                warn_rejected(columns.rejected, self.csv_file_path)
+            if self.backend != 'records':
+                self.columns = columns
+                self.sales_data = RecordView(columns)
+            else:
+                self.sales_data = list(RecordView(columns))
+            self.rows_scanned += len(self.sales_data)
+            return
+        
+        reader = sales_reader(self.csv_file_path, self.quarantine, exact=self.exact)
+        if self.backend != 'records':
+            self.columns = ColumnStore.from_values(reader.chunks())
+            self.sales_data = RecordView(self.columns)
+        else:
+            with paused_gc():
+                self.sales_data = list(starmap(SalesRecord.from_values, reader))
+        self._source_bytes = reader.bytes_read
+        self._source_lines = reader.lines_read
+        self.rejected_rows = reader.rejected
+        self.rows_scanned += len(self.sales_data)
+        warn_rejected(reader.rejected, self.csv_file_path, self.quarantine)
+    
+    @profiled
+    def append(self, records: Iterable[Union[SalesRecord, Dict[str, str]]]) -> int:
+        """Add records (or CSV row dicts), updating memoized aggregates in place.
+        
+        Cached totals, group stats and indexes are extended with the new rows
+        only, so results match a fresh load at a cost proportional to the
+        number of appended rows. In exact mode rows priced in fractions of a
+        cent are skipped like on a load: counted in rejected_rows and appended
+        to the quarantine file without a line number.
+        """
+        new = [r if isinstance(r, SalesRecord) else SalesRecord(r) for r in records]
+        if self.exact and not all(is_whole_cents(r.price) for r in new):
+            skipped = [r for r in new if not is_whole_cents(r.price)]
+            new = [r for r in new if is_whole_cents(r.price)]
+            self.rejected_rows += len(skipped)
+            if self.quarantine:
+                write_quarantine(self.quarantine, list(ROW_FIELDS), (
+                    ['', f"price has fractional cents: {r.price!r}", r.order_id, r.date.strftime('%Y-%m-%d')]
+                    + [getattr(r, field) for field in ROW_FIELDS[2:]] for r in skipped), mode='a')
+            warn_rejected(len(skipped), 'appended records', self.quarantine)
+        if not new:
+            return 0
+        start = len(self.sales_data)
+        if self.columns is not None:
+            for record in new:
+                self.columns.append_record(record)
+            handles: Sequence = range(start, start + len(new))
+        else:
+            if not isinstance(self._sales_data, list):
+                self._sales_data = list(self._sales_data)
+            self._sales_data.extend(new)
+            handles = new
+        self._extend_caches(new, handles)
+        return len(new)
+    
+    @profiled
+    def refresh(self) -> int:
+        """Append the complete rows written to the CSV since the last load or refresh.
+        
+        The new rows are validated like a load: malformed ones are skipped,
+        counted in rejected_rows and appended to the quarantine file. The
+        first refresh after a parallel or cached load counts the lines read
+        so far once, to number quarantined lines.
+        """
+        if input_format(self.csv_file_path) != ('csv', None):
+            raise ValueError(f"refresh() tails plain CSV files only: {self.csv_file_path}")
+        with open(self.csv_file_path, 'rb') as file:
+            header = file.readline()
+            fieldnames = next(csv.reader([header.decode()]))
+            if os.fstat(file.fileno()).st_size < self._source_bytes:
+                self._load_data()
+                return len(self.sales_data)
+            if not self._source_bytes and header.endswith(b'\n'):
+                # loaded while the file was empty: the header has been written since
+                self._source_bytes, self._source_lines = len(header), 1
+            if self._source_lines is None:
+                file.seek(0)
+                self._source_lines = file.read(self._source_bytes).count(b'\n')
+            file.seek(self._source_bytes)
+            tail = file.read()
+        
+        end = tail.rfind(b'\n') + 1
+        reader = SalesCsvReader(self.csv_file_path, self.quarantine, exact=self.exact, quarantine_mode='a')
+        rows = csv.reader(io.StringIO(tail[:end].decode(), newline=''))
+        values = list(chain.from_iterable(reader.parse_chunks(rows, fieldnames, self._source_lines)))
+        added = self.append(starmap(SalesRecord.from_values, values))
+        self._source_bytes += end
+        self._source_lines += tail.count(b'\n', 0, end)
+        self.rejected_rows += reader.rejected
+        warn_rejected(reader.rejected, self.csv_file_path, self.quarantine)
+        return added
+    
+    @profiled
+    def get_total_revenue(self) -> float:
+        total = self._memoized('total_revenue', self._compute_total_revenue)
+        return total / 100 if self.exact else total
+    
+    @profiled
+    def filter_by_category(self, category: str) -> List[SalesRecord]:
+        if self.backend == 'numpy':
+            code = self.columns.code_of('category', category)
+            if code is None:
+                return []
+            return self._column_records_at(
+                numpy_backend.rows_with_code(self.columns.codes['category'], code))
+        matches = self._index('category').get(category, [])
+        if self.columns is not None:
+            return list(RecordView(self.columns, matches))
+        return list(matches)
+    
+    @profiled
+    def filter_by_date_range(self, start_date: str, end_date: str) -> Sequence[SalesRecord]:
+        """Return a date-ordered view of the matching records, found by bisection.
+        
+        The numpy backend evaluates a boolean mask instead and sorts the
+        matches the same way: by date, ties in file order.
+        """
+        if self.backend == 'numpy':
+            return self._column_records_at(numpy_backend.rows_in_day_range(
+                self.columns.day, to_epoch_day(start_date), to_epoch_day(end_date)))
+        rows = self._date_index().rows_between(to_epoch_day(start_date), to_epoch_day(end_date))
+        if self.columns is not None:
+            return RecordView(self.columns, rows)
+        return rows
+    
+    def query(self) -> 'SalesQuery':
+        return SalesQuery(self)
+    
+    @profiled
+    def sketch(self, **options: int) -> SalesSketches:
+        """Approximate customer and order metrics over the loaded rows in one pass."""
+        self._record_scan(len(self.sales_data))
+        sketches = SalesSketches(**options)
+        if self.columns is None:
+            for r in self.sales_data:
+                sketches.add_record(r)
+            return sketches
+        columns = self.columns
+        customers, categories, regions = (
+            columns.dictionaries[field] for field in ('customer_id', 'category', 'region'))
+        for price, quantity, customer, category, region in zip(
+                columns.price, columns.quantity, columns.codes['customer_id'],
+                columns.codes['category'], columns.codes['region']):
+            sketches.add(price * quantity, customers[customer], categories[category], regions[region])
+        return sketches
+    
+    @profiled
+    def get_revenue_between(self, start_date: str, end_date: str) -> float:
+        revenue = self._date_index().revenue_between(to_epoch_day(start_date), to_epoch_day(end_date))
+        return revenue / 100 if self.exact else revenue
+    
+    @profiled
+    def get_sales_by_month(self) -> Dict[str, float]:
+        if self.backend == 'numpy':
+            return super().get_sales_by_month()
+        months = self._date_index().revenue_by_month()
+        if self.exact:
+            return {month: revenue / 100 for month, revenue in months.items()}
+        return months
+    
+    @profiled
+    def filter_by_minimum_amount(self, min_amount: float) -> List[SalesRecord]:
+        self._record_scan(len(self.sales_data))
+        if self.backend == 'numpy':
+            return self._column_records_at(numpy_backend.rows_with_min_amount(
+                self.columns.price, self.columns.quantity, min_amount))
+        if self.columns is not None:
+            price, quantity = self.columns.price, self.columns.quantity
+            return self._column_records(lambda i: price[i] * quantity[i] >= min_amount)
+        return list(filter(lambda r: r.total_amount >= min_amount, self.sales_data))
+    
+    @profiled
     def _group_by(self, key_func):
+        self._record_scan(len(self.sales_data))
         groups = defaultdict(list)
         for rec in self.sales_data:
             groups[key_func(rec)].append(rec)
         return dict(groups)
-
-
-def print_analysis_results(analyzer: SalesDataAnalyzer) -> None:
-    print("=" * 80)
-    print("SALES DATA ANALYSIS REPORT")
-    print("=" * 80)
-    print()
     
-    print("1. TOTAL REVENUE")
-    print("-" * 80)
-    total = analyzer.get_total_revenue()
-    print(f"Total Revenue: ${total:,.2f}")
-    print()
+    def _group_stats(self, dimension: str) -> Dict[str, GroupStats]:
+        groups = self._memoized(('stats', dimension), lambda: self._compute_group_stats(dimension))
+        return groups_to_dollars(groups) if self.exact else groups
     
-    print("2. REVENUE BY CATEGORY")
-    print("-" * 80)
-    cat_rev = analyzer.get_revenue_by_category()
-    for cat, rev in sorted(cat_rev.items(), key=lambda x: x[1], reverse=True):
-        print(f"{cat:20s}: ${rev:,.2f}")
-    print()
+    def _index(self, dimension: str) -> Dict[str, list]:
+        return self._memoized(('index', dimension), lambda: self._compute_index(dimension))
     
-    print("3. REVENUE BY REGION")
-    print("-" * 80)
-    reg_rev = analyzer.get_revenue_by_region()
-    for reg, rev in sorted(reg_rev.items(), key=lambda x: x[1], reverse=True):
-        print(f"{reg:20s}: ${rev:,.2f}")
-    print()
+    def _date_index(self) -> DateIndex:
+        return self._memoized('date_index', self._compute_date_index)
     
-    print("4. TOP 5 PRODUCTS BY REVENUE")
-    print("-" * 80)
-    top_prods = analyzer.get_top_products(5)
-    for i, p in enumerate(top_prods, 1):
-        print(f"{i}. {p['product']:30s} - Revenue: ${p['revenue']:,.2f}, Quantity: {p['quantity_sold']}")
-    print()
+    def _record_scan(self, rows: int) -> None:
+        self.scan_count += 1
+        self.rows_scanned += rows
     
-    print("5. REVENUE BY MONTH")
-    print("-" * 80)
-    monthly = analyzer.get_sales_by_month()
-    for month, rev in monthly.items():
-        print(f"{month}: ${rev:,.2f}")
-    print()
+    def _memoized(self, key: Any, compute: Callable[[], Any]) -> Any:
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] == self._generation:
+            self.cache_hits += 1
+            return entry[1]
+        self.cache_misses += 1
+        value = compute()
+        self._cache[key] = (self._generation, value)
+        return value
     
-    print("6. AVERAGE ORDER VALUE")
-    print("-" * 80)
-    avg = analyzer.get_average_order_value()
-    print(f"Average Order Value: ${avg:,.2f}")
-    print()
+    def _peek(self, key: Any) -> Any:
+        """The memoized value for key if it is current, without computing it."""
+        entry = self._cache.get(key)
+        return entry[1] if entry is not None and entry[0] == self._generation else None
     
-    print("7. PERFORMANCE BY SALESPERSON")
-    print("-" * 80)
-    sp_stats = analyzer.get_sales_by_salesperson()
-    for sp, stats in sorted(sp_stats.items(), key=lambda x: x[1]['total_revenue'], reverse=True):
-        print(f"{sp}: Revenue: ${stats['total_revenue']:,.2f}, Orders: {stats['total_orders']}, "
-              f"Avg Order: ${stats['average_order_value']:,.2f}")
-    print()
+    def _extend_caches(self, records: List[SalesRecord], handles: Sequence) -> None:
+        """Fold new records into current caches, which hold cents in exact mode."""
+        prices = [to_cents(r.price) if self.exact else r.price for r in records]
+        amounts = list(map(operator.mul, prices, (r.quantity for r in records)))
+        total = self._peek('total_revenue')
+        if total is not None:
+            total = reduce(operator.add, amounts, total)
+            self._cache['total_revenue'] = (self._generation, total)
+        
+        for dimension, key_func in GROUP_KEYS.items():
+            stats, index = self._peek(('stats', dimension)), self._peek(('index', dimension))
+            if stats is None and index is None:
+                continue
+            for record, price, handle in zip(records, prices, handles):
+                key = key_func(record)
+                if stats is not None:
+                    if key not in stats:
+                        stats[key] = GroupStats(0 if self.exact else 0.0)
+                    stats[key].add(price, record.quantity)
+                if index is not None:
+                    index.setdefault(key, []).append(handle)
+        
+        date_index = self._peek('date_index')
+        if date_index is not None and not date_index.extend(
+                [r.day for r in records], amounts, handles):
+            del self._cache['date_index']
     
-    print("8. DETAILED CATEGORY STATISTICS")
-    print("-" * 80)
-    cat_stats = analyzer.get_category_statistics()
-    for cat, stats in sorted(cat_stats.items(), key=lambda x: x[1]['total_revenue'], reverse=True):
-        print(f"\n{cat}:")
-        print(f"  Total Revenue: ${stats['total_revenue']:,.2f}")
-        print(f"  Total Orders: {stats['total_orders']}")
-        print(f"  Total Quantity: {stats['total_quantity']}")
-        print(f"  Average Price: ${stats['average_price']:,.2f}")
-        print(f"  Max Order: ${stats['max_order']:,.2f}")
-        print(f"  Min Order: ${stats['min_order']:,.2f}")
-    print()
+    @profiled
+    def _compute_total_revenue(self) -> float:
+        self._record_scan(len(self.sales_data))
+        if self.backend == 'numpy':
+            return numpy_backend.total_revenue(self.columns.price, self.columns.quantity)
+        if self.columns is not None:
+            return self.columns.total_revenue(self.exact)
+        if self.exact:
+            return reduce(lambda acc, r: acc + to_cents(r.price) * r.quantity, self.sales_data, 0)
+        return reduce(lambda acc, r: acc + r.total_amount, self.sales_data, 0.0)
     
-    print("9. HIGH VALUE CUSTOMERS (>$1000)")
-    print("-" * 80)
-    high_val = analyzer.get_high_value_customers(1000.0)
-    for c in sorted(high_val, key=lambda x: x['total_spending'], reverse=True):
-        print(f"{c['customer_id']}: ${c['total_spending']:,.2f} ({c['order_count']} orders)")
-    print()
+    @profiled
+    def _compute_group_stats(self, dimension: str) -> Dict[str, GroupStats]:
+        if self.backend == 'numpy':
+            self._record_scan(len(self.sales_data))
+            return self._vectorized_group_stats(dimension)
+        if self.columns is not None:
+            self._record_scan(len(self.sales_data))
+            return self.columns.group_stats(dimension, self.exact)
+        if self.exact:
+            return {
+                key: reduce(lambda s, r: s.add(to_cents(r.price), r.quantity), records, GroupStats(0))
+                for key, records in self._index(dimension).items()
+            }
+        return {
+            key: reduce(lambda s, r: s.add(r.price, r.quantity), records, GroupStats())
+            for key, records in self._index(dimension).items()
+        }
+    
+    def _vectorized_group_stats(self, dimension: str) -> Dict[str, GroupStats]:
+        columns = self.columns
+        if dimension == 'month':
+            codes, keys = numpy_backend.month_codes(columns.day, month_key)
+            labels = list(map(month_label, keys))
+        else:
+            codes, labels = columns.codes[dimension], columns.dictionaries[dimension]
+        totals = numpy_backend.grouped_totals(codes, len(labels), columns.price, columns.quantity)
+        return {labels[code]: GroupStats.from_totals(*values) for code, *values in totals}
     
-    print("=" * 80)
+    @profiled
+    def _compute_date_index(self) -> DateIndex:
+        self._record_scan(len(self.sales_data))
+        if self.columns is not None:
+            columns = self.columns
+            prices = map(to_cents, columns.price) if self.exact else columns.price
+            amounts = list(map(operator.mul, prices, columns.quantity))
+            return DateIndex(columns.day, amounts, range(len(columns)))
+        days = [r.day for r in self.sales_data]
+        if self.exact:
+            amounts = [to_cents(r.price) * r.quantity for r in self.sales_data]
+        else:
+            amounts = [r.total_amount for r in self.sales_data]
+        return DateIndex(days, amounts, self.sales_data)
+    
+    @profiled
+    def _compute_index(self, dimension: str) -> Dict[str, list]:
+        if self.columns is not None:
+            self._record_scan(len(self.sales_data))
+            return self.columns.group_rows(dimension)
+        return self._group_by(GROUP_KEYS[dimension])
+    
+    def _order_count(self) -> int:
+        return len(self.sales_data)
+    
+    def _column_records(self, predicate: Callable[[int], bool]) -> List[SalesRecord]:
+        return self._column_records_at(self.columns.rows_where(predicate))
+    
+    def _column_records_at(self, rows: Sequence[int]) -> List[SalesRecord]:
+        return list(RecordView(self.columns, rows))
 
 
-def main():
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    csv_file = os.path.join(current_dir, '..', 'data', 'sales.csv')
+class SalesQuery:
+    """Lazy, chainable query over a SalesDataAnalyzer.
     
-    try:
-        analyzer = SalesDataAnalyzer(csv_file)
-        print_analysis_results(analyzer)
+    Builder methods return a new query and read no rows. Each terminal method
+    (records, count, sum_revenue, stats) narrows the rows with the smallest
+    already built category/region/... or date index that matches a predicate,
+    then checks the remaining predicates and aggregates in one pass.
+    """
+    
+    def __init__(self, analyzer: SalesDataAnalyzer):
+        self.analyzer = analyzer
+        self.conditions: Tuple[Tuple[str, str], ...] = ()
+        self.day_range: Optional[Tuple[int, int]] = None
+        self.min_total: Optional[float] = None
+        self.group: Optional[str] = None
+    
+    def where(self, **conditions: str) -> 'SalesQuery':
+        """Keep rows whose dimension values equal the given ones, e.g. where(region='North')."""
+        for dimension in conditions:
+            self._check_dimension(dimension)
+        return self._replace(conditions=self.conditions + tuple(conditions.items()))
+    
+    def between(self, start_date: str, end_date: str) -> 'SalesQuery':
+        first, last = to_epoch_day(start_date), to_epoch_day(end_date)
+        if self.day_range is not None:
+            first, last = max(first, self.day_range[0]), min(last, self.day_range[1])
+        return self._replace(day_range=(first, last))
+    
+    def min_amount(self, min_amount: float) -> 'SalesQuery':
+        if self.min_total is not None:
+            min_amount = max(min_amount, self.min_total)
+        return self._replace(min_total=min_amount)
+    
+    def group_by(self, dimension: str) -> 'SalesQuery':
+        self._check_dimension(dimension)
+        return self._replace(group=dimension)
+    
+    def records(self) -> List[SalesRecord]:
+        """Matching records, in index order when an index narrowed the scan."""
+        rows, match = self._plan()
+        self.analyzer._record_scan(len(rows))
+        rows = list(filter(match, rows)) if match is not None else list(rows)
+        if self.analyzer.columns is not None:
+            return list(RecordView(self.analyzer.columns, rows))
+        return rows
+    
+    def stats(self) -> Union[GroupStats, Dict[str, GroupStats]]:
+        groups = self._aggregate()
+        if self.group is None:
+            return groups.get(None, GroupStats())
+        return groups
+    
+    def count(self) -> Union[int, Dict[str, int]]:
+        if self.group is None and self._range_only():
+            lo, hi = self.analyzer._date_index().bounds(*self.day_range)
+            return max(hi - lo, 0)
+        return self._project(lambda s: s.orders)
+    
+    def sum_revenue(self) -> Union[float, Dict[str, float]]:
+        if self.group is None and self._range_only():
+            revenue = self.analyzer._date_index().revenue_between(*self.day_range)
+            return revenue / 100 if self.analyzer.exact else revenue
+        return self._project(lambda s: s.revenue)
+    
+    def _project(self, value: Callable[[GroupStats], Any]) -> Any:
+        groups = self.stats()
+        if self.group is None:
+            return value(groups)
+        return {key: value(s) for key, s in groups.items()}
+    
+    def _aggregate(self) -> Dict[Optional[str], GroupStats]:
+        rows, match = self._plan()
+        self.analyzer._record_scan(len(rows))
+        key_of, values_of = self._accessors()
+        exact = self.analyzer.exact
+        groups: Dict[Optional[str], GroupStats] = {}
+        for row in (filter(match, rows) if match is not None else rows):
+            key = key_of(row) if key_of is not None else None
+            stats = groups.get(key)
+            if stats is None:
+                stats = groups[key] = GroupStats(0 if exact else 0.0)
+            price, quantity = values_of(row)
+            stats.add(to_cents(price) if exact else price, quantity)
+        return groups_to_dollars(groups) if exact else groups
+    
+    def _range_only(self) -> bool:
+        """True when prefix sums over a built date index answer the query alone."""
+        return (self.day_range is not None and not self.conditions and self.min_total is None
+                and self.analyzer._peek('date_index') is not None)
+    
+    def _plan(self) -> Tuple[Sequence, Optional[Callable[[Any], bool]]]:
+        """Pick candidate rows from the smallest usable index and fuse the other predicates."""
+        analyzer = self.analyzer
+        candidates = []
+        for position, (dimension, value) in enumerate(self.conditions):
+            index = analyzer._peek(('index', dimension))
+            if index is not None:
+                candidates.append((index.get(value, []), position))
+        date_index = analyzer._peek('date_index')
+        if self.day_range is not None and date_index is not None:
+            candidates.append((date_index.rows_between(*self.day_range), 'date'))
+        
+        if candidates:
+            rows, pushed = min(candidates, key=lambda c: len(c[0]))
+        elif analyzer.columns is not None:
+            rows, pushed = range(len(analyzer.columns)), None
+        else:
+            rows, pushed = analyzer.sales_data, None
         
-        print("10. FILTERING EXAMPLES")
-        print("-" * 80)
+        predicates = [
+            self._equals(dimension, value)
+            for position, (dimension, value) in enumerate(self.conditions)
+            if position != pushed
+        ]
+        if self.day_range is not None and pushed != 'date':
+            predicates.append(self._in_range(*self.day_range))
+        if self.min_total is not None:
+            predicates.append(self._at_least(self.min_total))
         
-        elec = analyzer.filter_by_category('Electronics')
-        print(f"Electronics sales count: {len(elec)}")
+        if not predicates:
+            return rows, None
+        if len(predicates) == 1:
+            return rows, predicates[0]
+        return rows, lambda row: all(predicate(row) for predicate in predicates)
+    
+    def _equals(self, dimension: str, value: str) -> Callable[[Any], bool]:
+        columns = self.analyzer.columns
+        if columns is None:
+            key_func = GROUP_KEYS[dimension]
+            return lambda r: key_func(r) == value
+        if dimension == 'month':
+            day = columns.day
+            return lambda i: month_label(month_key(day[i])) == value
+        code, codes = columns.code_of(dimension, value), columns.codes[dimension]
+        return lambda i: codes[i] == code
+    
+    def _in_range(self, first: int, last: int) -> Callable[[Any], bool]:
+        if self.analyzer.columns is None:
+            return lambda r: first <= r.day <= last
+        day = self.analyzer.columns.day
+        return lambda i: first <= day[i] <= last
+    
+    def _at_least(self, min_amount: float) -> Callable[[Any], bool]:
+        if self.analyzer.columns is None:
+            return lambda r: r.total_amount >= min_amount
+        price, quantity = self.analyzer.columns.price, self.analyzer.columns.quantity
+        return lambda i: price[i] * quantity[i] >= min_amount
+    
+    def _accessors(self) -> Tuple[Optional[Callable[[Any], str]], Callable[[Any], Tuple[float, int]]]:
+        columns = self.analyzer.columns
+        if columns is None:
+            key_of = GROUP_KEYS[self.group] if self.group is not None else None
+            return key_of, lambda r: (r.price, r.quantity)
+        price, quantity = columns.price, columns.quantity
+        if self.group is None:
+            key_of = None
+        elif self.group == 'month':
+            day = columns.day
+            key_of = lambda i: month_label(month_key(day[i]))
+        else:
+            codes, values = columns.codes[self.group], columns.dictionaries[self.group]
+            key_of = lambda i: values[codes[i]]
+        return key_of, lambda i: (price[i], quantity[i])
+    
+    def _replace(self, **changes: Any) -> 'SalesQuery':
+        query = copy.copy(self)
+        query.__dict__.update(changes)
+        return query
+    
+    @staticmethod
+    def _check_dimension(dimension: str) -> None:
+        if dimension not in GROUP_KEYS:
+            raise ValueError(f"Unknown dimension '{dimension}', expected one of {tuple(GROUP_KEYS)}")
+
+
+class StreamingSalesAnalyzer(SalesMetrics):
+    """Answers every report metric from one chunked pass without keeping rows.
+    
+    Memory grows with the number of distinct keys rather than the number of
+    rows. Malformed rows are skipped and quarantined as by SalesDataAnalyzer.
+    Filters rescan the file and only keep the matching records.
+    """
+    
+    def __init__(self, csv_file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 exact: bool = False, quarantine: Optional[str] = None):
+        self.csv_file_path = csv_file_path
+        self.chunk_size = chunk_size
+        self.exact = exact
+        self.quarantine = quarantine
+        self.aggregates = SalesAggregates(exact)
+        self._load_data()
+    
+    def _load_data(self) -> None:
+        chunks = RecordChunks(self.csv_file_path, self.chunk_size, self.quarantine, self.exact)
+        for chunk in chunks:
+            for record in chunk:
+                self.aggregates.add_record(record)
+        self.aggregates.rejected += chunks.rejected
+        warn_rejected(self.aggregates.rejected, self.csv_file_path, self.quarantine)
+    
+    def get_total_revenue(self) -> float:
+        return self.aggregates.revenue()
+    
+    def filter_by_category(self, category: str) -> List[SalesRecord]:
+        return self._scan(lambda r: r.category == category)
+    
+    def filter_by_date_range(self, start_date: str, end_date: str) -> List[SalesRecord]:
+        first, last = to_epoch_day(start_date), to_epoch_day(end_date)
+        return self._scan(lambda r: first <= r.day <= last)
+    
+    def filter_by_minimum_amount(self, min_amount: float) -> List[SalesRecord]:
+        return self._scan(lambda r: r.total_amount >= min_amount)
+    
+    def _group_stats(self, dimension: str) -> Dict[str, GroupStats]:
+        return self.aggregates.stats(dimension)
+    
+    def _order_count(self) -> int:
+        return self.aggregates.order_count
+    
+    def _scan(self, predicate: Callable[[SalesRecord], bool]) -> List[SalesRecord]:
+        return [
+            record
+            for chunk in RecordChunks(self.csv_file_path, self.chunk_size, exact=self.exact)
+            for record in filter(predicate, chunk)
+        ]
+
+
+class PartitionedSalesAnalyzer(SalesMetrics):
+    """Answers every report metric over many CSV partitions without combining their rows.
+    
+    source is a directory (searched recursively for *.csv), a glob pattern or a
+    list of either. Partitions whose path puts them outside start_date..end_date
+    or regions (see partition_keys) are skipped unopened; rows of partitions
+    whose path does not settle it are checked one by one. Each partition is
+    aggregated on its own, in a process pool when workers > 1, and the partial
+    sums, counts, minima and maxima are merged in path order. Malformed rows
+    are skipped; with quarantine they are written there as file:line.
+    """
+    
+    def __init__(self, source: Union[str, Sequence[str]], start_date: Optional[str] = None,
+                 end_date: Optional[str] = None, regions: Optional[Iterable[str]] = None,
+                 workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE, exact: bool = False,
+                 quarantine: Optional[str] = None):
+        self.partitions = discover_partitions(source)
+        if not self.partitions:
+            raise FileNotFoundError(f"No CSV partitions found in {source}")
+        self.first_day = to_epoch_day(start_date) if start_date else None
+        self.last_day = to_epoch_day(end_date) if end_date else None
+        self.regions = frozenset(regions) if regions is not None else None
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.exact = exact
+        self.quarantine = quarantine
+        self.aggregates = SalesAggregates(exact)
+        self.daily_revenue: Dict[int, Union[float, int]] = {}
+        self.selected: List[Tuple[str, Dict[str, str]]] = [
+            (path, keys) for path, keys in ((path, partition_keys(path)) for path in self.partitions)
+            if self._overlaps(keys, self.first_day, self.last_day)
+        ]
+        self._load_data()
+    
+    @profiled
+    def _load_data(self) -> None:
+        tasks = [(path, self._row_scope(path, keys), self.chunk_size, self.exact, self.quarantine is not None)
+                 for path, keys in self.selected]
+        rejected_rows = []
+        for aggregates, daily_revenue, partition_rejected in self._map(aggregate_partition, tasks):
+            self.aggregates.merge(aggregates)
+            for day, revenue in daily_revenue.items():
+                self.daily_revenue[day] = self.daily_revenue.get(day, 0) + revenue
+            rejected_rows.extend(partition_rejected)
+        if self.quarantine is not None and rejected_rows:
+            write_quarantine(self.quarantine, list(ROW_FIELDS), rejected_rows)
+        warn_rejected(self.aggregates.rejected, f"{len(self.selected)} partitions", self.quarantine)
+    
+    def get_total_revenue(self) -> float:
+        return self.aggregates.revenue()
+    
+    def get_revenue_between(self, start_date: str, end_date: str) -> float:
+        first, last = to_epoch_day(start_date), to_epoch_day(end_date)
+        revenue = sum(revenue for day, revenue in sorted(self.daily_revenue.items()) if first <= day <= last)
+        return revenue / 100 if self.exact else float(revenue)
+    
+    def filter_by_category(self, category: str) -> List[SalesRecord]:
+        return self._scan(('category', category))
+    
+    def filter_by_date_range(self, start_date: str, end_date: str) -> List[SalesRecord]:
+        first, last = to_epoch_day(start_date), to_epoch_day(end_date)
+        return self._scan(('date_range', first, last), first, last)
+    
+    def filter_by_minimum_amount(self, min_amount: float) -> List[SalesRecord]:
+        return self._scan(('minimum_amount', min_amount))
+    
+    def _group_stats(self, dimension: str) -> Dict[str, GroupStats]:
+        return self.aggregates.stats(dimension)
+    
+    def _order_count(self) -> int:
+        return self.aggregates.order_count
+    
+    def _scan(self, condition: Tuple, first_day: Optional[int] = None,
+              last_day: Optional[int] = None) -> List[SalesRecord]:
+        """Records matching condition, skipping partitions outside first_day..last_day."""
+        tasks = [(path, self._row_scope(path, keys), condition, self.chunk_size, self.exact)
+                 for path, keys in self.selected if self._overlaps(keys, first_day, last_day)]
+        return [record for records in self._map(filter_partition, tasks) for record in records]
+    
+    def _overlaps(self, keys: Dict[str, str], first_day: Optional[int], last_day: Optional[int]) -> bool:
+        """False when the path puts the partition outside the days or regions; unknown keys overlap."""
+        if 'region' in keys and self.regions is not None and keys['region'] not in self.regions:
+            return False
+        day = partition_day(keys)
+        if day is None:
+            return True
+        return (first_day is None or day >= first_day) and (last_day is None or day <= last_day)
+    
+    def _row_scope(self, path: str, keys: Dict[str, str]) -> Optional[Tuple]:
+        """(first_day, last_day, regions) to check rows against, or None if the path settles it.
         
-        jan = analyzer.filter_by_date_range('2024-01-01', '2024-01-31')
-        print(f"January sales count: {len(jan)}")
+        Only a date= segment settles the dates; a date taken from the file
+        name prunes partitions but its rows are still checked.
+        """
+        dated = ((self.first_day is None and self.last_day is None)
+                 or partition_day(partition_keys(path, infer_date=False)) is not None)
+        placed = 'region' in keys or self.regions is None
+        return None if dated and placed else (self.first_day, self.last_day, self.regions)
+    
+    def _map(self, func: Callable, tasks: List[Tuple]) -> Iterator:
+        """func(*task) for each task in order, in a process pool when workers > 1."""
+        if self.workers <= 1 or len(tasks) <= 1:
+            yield from (func(*task) for task in tasks)
+            return
+        chunksize = max(1, len(tasks) // (self.workers * 4))
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            yield from pool.map(func, *zip(*tasks), chunksize=chunksize)
+
+
+def split_line_ranges(csv_file_path: str, parts: int) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """Return the header fields and byte ranges of the data rows, cut on line boundaries.
+    
+    Rows must not contain quoted newlines, since ranges are cut at raw newlines.
+    """
+    with open(csv_file_path, 'rb') as file:
+        header = file.readline()
+        data_start = file.tell()
+        size = os.fstat(file.fileno()).st_size
+        cuts = [data_start]
+        for part in range(1, parts):
+            target = max(data_start + (size - data_start) * part // parts, cuts[-1])
+            file.seek(target)
+            if target > data_start:
+                file.readline()
+            cuts.append(min(file.tell(), size))
+        cuts.append(size)
+    
+    fieldnames = next(csv.reader([header.decode()]))
+    ranges = [(start, end) for start, end in zip(cuts, cuts[1:]) if end > start]
+    return fieldnames, ranges
+
+
+def parse_line_range(csv_file_path: str, fieldnames: List[str], start: int, end: int,
+                     exact: bool = False) -> Tuple[ColumnStore, List[List], int]:
+    """Parse a byte range with the validating reader, skipping malformed rows like a serial load.
+    
+    Returns the columns, the skipped rows as [line, error, *fields] with
+    lines counted from the start of the range, and the range's line count.
+    """
+    with open(csv_file_path, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode()
+    reader = SalesCsvReader(csv_file_path, exact=exact, keep_rejected=True)
+    rows = csv.reader(io.StringIO(text, newline=''))
+    columns = ColumnStore.from_values(reader.parse_chunks(rows, fieldnames))
+    columns.rejected = reader.rejected
+    return columns, reader.rejected_rows, rows.line_num
+
+
+@profiled
+def load_columns_parallel(csv_file_path: str, workers: int, quarantine_path: Optional[str] = None,
+                          exact: bool = False) -> ColumnStore:
+    """Parse byte ranges of the file in a process pool and merge the column partials.
+    
+    Malformed rows are skipped as in a serial load; their count is left in
+    the result's rejected and, with quarantine_path, the parent writes them
+    there with their line numbers in the file.
+    """
+    fieldnames, ranges = split_line_ranges(csv_file_path, workers)
+    columns = ColumnStore()
+    if not ranges:
+        columns.source_bytes = os.path.getsize(csv_file_path)
+        return columns
+    starts, ends = zip(*ranges)
+    rejected_rows = []
+    lines_before = 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial, partial_rejected, lines in pool.map(parse_line_range, repeat(csv_file_path),
+                                                         repeat(fieldnames), starts, ends, repeat(exact)):
+            columns.extend(partial)
+            columns.rejected += partial.rejected
+            rejected_rows.extend([lines_before + line] + rest for line, *rest in partial_rejected)
+            lines_before += lines
+    columns.source_bytes = ends[-1]
+    if quarantine_path is not None and rejected_rows:
+        write_quarantine(quarantine_path, fieldnames, rejected_rows)
+    return columns
+
+
+@profiled
+def load_cached_columns(csv_file_path: str, workers: int = 1, cache_path: Optional[str] = None,
+                        quarantine_path: Optional[str] = None, exact: bool = False) -> ColumnStore:
+    """Map the sidecar column file if it matches the CSV, else parse and rewrite it.
+    
+    Rows are validated like any load. The cache records how many rows were
+    skipped and whether sub-cent prices were, so it is only reused by loads
+    in the same mode, and it is rebuilt to write quarantine_path when the
+    file has malformed rows.
+    """
+    cache_path = cache_path or csv_file_path + CACHE_SUFFIX
+    column_file = read_column_file(cache_path)
+    if column_file is not None and column_file_matches(column_file, csv_file_path):
+        rejected = column_file.meta.get('rejected', 0)
+        if column_file.meta.get('exact', False) == exact and not (quarantine_path and rejected):
+            columns = ColumnStore.from_column_file(column_file)
+            columns.rejected = rejected
+            return columns
+    
+    signature = source_signature(csv_file_path)
+    if workers > 1:
+        columns = load_columns_parallel(csv_file_path, workers, quarantine_path, exact)
+    else:
+        reader = SalesCsvReader(csv_file_path, quarantine_path, exact=exact)
+        columns = ColumnStore.from_values(reader.chunks())
+        columns.source_bytes = reader.bytes_read
+        columns.rejected = reader.rejected
+    try:
+        columns.write_column_file(cache_path, {'source': signature, 'exact': exact,
+                                               'rejected': columns.rejected})
+    except OSError as e:
+        warnings.warn(f"Could not write column cache {cache_path}: {e}")
+    return columns
+
+
+def load_sales_columns(path: str) -> ColumnStore:
+    """Map a file written by write_sales_columns; the columns are views, not copies."""
+    column_file = read_column_file(path)
+    if column_file is None or column_file.meta.get('kind') != 'sales_columns':
+        raise ValueError(f"Not a sales column file: {path}")
+    return ColumnStore.from_column_file(column_file)
+
+
+def write_sales_columns(columns: ColumnStore, path: str) -> None:
+    columns.write_column_file(path, {'kind': 'sales_columns'})
+
+
+@contextlib.contextmanager
+def paused_gc() -> Iterator[None]:
+    """Suspend cyclic garbage collection while building many acyclic objects.
+    
+    Every record allocated during a load survives, so collections triggered by
+    the allocations would only traverse the growing list again and again.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class RecordChunks:
+    """Validated SalesRecords of a CSV, JSON Lines or column file, chunk_size at a time.
+    
+    Rows are read with sales_reader, so malformed ones (and with exact=True
+    those priced in fractions of a cent) are skipped, counted in rejected
+    and written to quarantine_path if given; keep_rejected also keeps them in
+    rejected_rows. Every iteration reads the file again.
+    """
+    
+    def __init__(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 quarantine_path: Optional[str] = None, exact: bool = False,
+                 keep_rejected: bool = False):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.quarantine_path = quarantine_path
+        self.exact = exact
+        self.keep_rejected = keep_rejected
+        self.header: List[str] = list(ROW_FIELDS)
+        self.rejected = 0
+        self.rejected_rows: Optional[List[List]] = [] if keep_rejected else None
+    
+    def __iter__(self) -> Iterator[List[SalesRecord]]:
+        records = self._records()
+        chunk = list(islice(records, self.chunk_size))
+        while chunk:
+            yield chunk
+            chunk = list(islice(records, self.chunk_size))
+    
+    def _records(self) -> Iterator[SalesRecord]:
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"CSV file not found: {self.path}")
+        self.rejected = 0
+        if input_format(self.path)[0] == 'columns':
+            for record in RecordView(load_sales_columns(self.path)):
+                if self.exact and not is_whole_cents(record.price):
+                    self.rejected += 1
+                else:
+                    yield record
+            return
+        reader = sales_reader(self.path, self.quarantine_path, exact=self.exact,
+                              keep_rejected=self.keep_rejected)
+        self.rejected_rows = reader.rejected_rows
+        yield from starmap(SalesRecord.from_values, reader)
+        self.header = reader.header
+        self.rejected = reader.rejected
+
+
+PARTITION_DATE = re.compile(r'(\d{4}-\d{2}-\d{2})')
+
+PARTITION_CONDITIONS: Dict[str, Callable[..., Callable[[SalesRecord], bool]]] = {
+    'category': lambda category: lambda r: r.category == category,
+    'date_range': lambda first, last: lambda r: first <= r.day <= last,
+    'minimum_amount': lambda min_amount: lambda r: r.total_amount >= min_amount,
+}
+
+
+def discover_partitions(source: Union[str, Sequence[str]]) -> List[str]:
+    """Input files under a directory, matching a glob pattern, or both for a list, sorted.
+    
+    Directories are searched for CSV, JSON Lines and column files, compressed or not.
+    """
+    if not isinstance(source, str):
+        return sorted({path for item in source for path in discover_partitions(item)})
+    if os.path.isdir(source):
+        return sorted(os.path.join(root, name)
+                      for root, _, names in os.walk(source)
+                      for name in names if is_input_file(name))
+    if glob.has_magic(source):
+        return sorted(path for path in glob.glob(source, recursive=True) if os.path.isfile(path))
+    return [source]
+
+
+def partition_keys(csv_file_path: str, infer_date: bool = True) -> Dict[str, str]:
+    """Partition values encoded in the path.
+    
+    key=value path segments (date=2024-01-15/region=North/part.csv) are read
+    as-is. Without a date segment and with infer_date, the last YYYY-MM-DD
+    in the file's own name (as in north/sales_2024-01-15.csv) is taken as the
+    partition's date; dates in directory names are ignored.
+    """
+    keys = {}
+    for segment in os.path.splitext(csv_file_path)[0].replace(os.sep, '/').split('/'):
+        name, sep, value = segment.partition('=')
+        if sep:
+            keys[name] = value
+    if 'date' not in keys and infer_date:
+        dates = PARTITION_DATE.findall(os.path.basename(csv_file_path))
+        if dates:
+            keys['date'] = dates[-1]
+    return keys
+
+
+def partition_day(keys: Dict[str, str]) -> Optional[int]:
+    """Epoch day of the partition's date, or None when it has none or it is not a full valid date."""
+    date = keys.get('date', '')
+    if not PARTITION_DATE.fullmatch(date):
+        return None
+    try:
+        return to_epoch_day(date)
+    except ValueError:
+        return None
+
+
+def _in_scope(record: SalesRecord, scope: Optional[Tuple]) -> bool:
+    if scope is None:
+        return True
+    first_day, last_day, regions = scope
+    if regions is not None and record.region not in regions:
+        return False
+    return (first_day is None or record.day >= first_day) and (last_day is None or record.day <= last_day)
+
+
+def aggregate_partition(csv_file_path: str, scope: Optional[Tuple],
+                        chunk_size: int = DEFAULT_CHUNK_SIZE, exact: bool = False,
+                        keep_rejected: bool = False
+                        ) -> Tuple[SalesAggregates, Dict[int, Union[float, int]], List[List]]:
+    """One partition's aggregates, revenue per day (in cents when exact) and skipped rows.
+    
+    scope is (first_day, last_day, regions) for partitions whose rows need
+    checking. With keep_rejected the skipped rows come back as
+    file_quarantine_rows.
+    """
+    aggregates = SalesAggregates(exact)
+    daily_revenue: Dict[int, Union[float, int]] = defaultdict(int)
+    chunks = RecordChunks(csv_file_path, chunk_size, exact=exact, keep_rejected=keep_rejected)
+    for chunk in chunks:
+        for record in chunk:
+            if _in_scope(record, scope) and aggregates.add_record(record):
+                daily_revenue[record.day] += (
+                    (to_cents(record.price) if exact else record.price) * record.quantity)
+    aggregates.rejected += chunks.rejected
+    
+    return aggregates, dict(daily_revenue), file_quarantine_rows(csv_file_path, chunks.header,
+                                                                 chunks.rejected_rows or [])
+
+
+def rejected_file_rows(csv_file_path: str, exact: bool = False) -> List[List]:
+    """The file_quarantine_rows of one file, read again with the validating reader."""
+    chunks = RecordChunks(csv_file_path, exact=exact, keep_rejected=True)
+    for _ in chunks:
+        pass
+    return file_quarantine_rows(csv_file_path, chunks.header, chunks.rejected_rows or [])
+
+
+def file_quarantine_rows(csv_file_path: str, header: List[str], rejected_rows: Iterable[List]) -> List[List]:
+    """Quarantine rows of one of several files: file:line, the error, then the fields
+    in ROW_FIELDS order when the row had the header's width."""
+    positions = [header.index(field) for field in ROW_FIELDS]
+    rows = []
+    for line, error, *fields in rejected_rows:
+        if len(fields) == len(header):
+            fields = [fields[i] for i in positions]
+        rows.append([f"{csv_file_path}:{line}", error] + fields)
+    return rows
+
+
+def filter_partition(csv_file_path: str, scope: Optional[Tuple], condition: Tuple,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE, exact: bool = False) -> List[SalesRecord]:
+    """Records of one partition matching condition, e.g. ('category', 'Electronics')."""
+    predicate = PARTITION_CONDITIONS[condition[0]](*condition[1:])
+    return [
+        record
+        for chunk in RecordChunks(csv_file_path, chunk_size, exact=exact)
+        for record in filter(predicate, (record for record in chunk if _in_scope(record, scope)))
+    ]
+
+
+class ReportResult(SalesMetrics):
+    """Aggregates and filter counts produced by one ReportPlan scan."""
+    
+    def __init__(self, filters: Dict[str, Callable[[str, int, float], bool]], exact: bool = False):
+        self.aggregates = SalesAggregates(exact)
+        self.filters = filters
+        self.filter_counts: Dict[str, int] = dict.fromkeys(filters, 0)
+        self.passes = 0
+        self.elapsed = 0.0
+        self.recomputed: List[str] = []
+    
+    def add(self, price: float, quantity: int, day: int, keys: Dict[str, str]) -> None:
+        if not self.aggregates.add(price, quantity, **keys):
+            return
+        amount = price * quantity
+        for label, predicate in self.filters.items():
+            if predicate(keys['category'], day, amount):
+                self.filter_counts[label] += 1
+    
+    def merge(self, other: 'ReportResult') -> None:
+        self.aggregates.merge(other.aggregates)
+        for label, count in other.filter_counts.items():
+            self.filter_counts[label] += count
+    
+    def get_total_revenue(self) -> float:
+        return self.aggregates.revenue()
+    
+    def _group_stats(self, dimension: str) -> Dict[str, GroupStats]:
+        return self.aggregates.stats(dimension)
+    
+    def _order_count(self) -> int:
+        return self.aggregates.order_count
+
+
+class ReportPlan:
+    """Collects report metrics and filter counts and computes them in one scan.
+    
+    Every grouping of the report is filled from shared SalesAggregates state
+    while the rows are walked once, instead of once per analyzer method.
+    """
+    
+    def __init__(self):
+        self.filters: Dict[str, Callable[[str, int, float], bool]] = {}
+        self.specs: Dict[str, List[Any]] = {}
+    
+    def count_category(self, category: str, label: Optional[str] = None) -> 'ReportPlan':
+        label = label or f"category={category}"
+        self.filters[label] = lambda cat, day, amount: cat == category
+        self.specs[label] = ['category', category]
+        return self
+    
+    def count_date_range(self, start_date: str, end_date: str,
+                         label: Optional[str] = None) -> 'ReportPlan':
+        first = to_epoch_day(start_date)
+        last = to_epoch_day(end_date)
+        label = label or f"date={start_date}..{end_date}"
+        self.filters[label] = lambda cat, day, amount: first <= day <= last
+        self.specs[label] = ['date_range', start_date, end_date]
+        return self
+    
+    def count_minimum_amount(self, min_amount: float, label: Optional[str] = None) -> 'ReportPlan':
+        label = label or f"amount>={min_amount}"
+        self.filters[label] = lambda cat, day, amount: amount >= min_amount
+        self.specs[label] = ['minimum_amount', min_amount]
+        return self
+    
+    @profiled
+    def execute(self, analyzer: SalesDataAnalyzer) -> ReportResult:
+        start = time.perf_counter()
+        result = ReportResult(self.filters, analyzer.exact)
+        if analyzer.columns is not None:
+            self._scan_columns(analyzer.columns, result)
+        else:
+            for r in analyzer.sales_data:
+                result.add(r.price, r.quantity, r.day,
+                           {dim: key_func(r) for dim, key_func in GROUP_KEYS.items()})
+        analyzer._record_scan(len(analyzer.sales_data))
+        return self._finish(result, start)
+    
+    @profiled
+    def execute_csv(self, csv_file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    exact: bool = False, quarantine_path: Optional[str] = None) -> ReportResult:
+        start = time.perf_counter()
+        result = ReportResult(self.filters, exact)
+        chunks = RecordChunks(csv_file_path, chunk_size, quarantine_path, exact)
+        for chunk in chunks:
+            for r in chunk:
+                result.add(r.price, r.quantity, r.day,
+                           {dim: key_func(r) for dim, key_func in GROUP_KEYS.items()})
+        result.aggregates.rejected += chunks.rejected
+        warn_rejected(result.aggregates.rejected, csv_file_path, quarantine_path)
+        return self._finish(result, start)
+    
+    @profiled
+    def execute_partitions(self, csv_file_paths: Sequence[str], store_dir: Optional[str] = None,
+                           quarantine_path: Optional[str] = None, **analyzer_options: Any) -> ReportResult:
+        """Report over several CSV files, one partition per file, merged in file order.
         
-        high_sales = analyzer.filter_by_minimum_amount(500.0)
-        print(f"Sales over $500: {len(high_sales)}")
-        print()
+        With store_dir, each partition's result is kept in a summary file and
+        reused until its CSV changes, so only changed files are scanned again.
+        Partitions are merged the same way whether they were reused or not, so
+        the merged report equals a run without a store. With quarantine_path
+        the malformed rows of the files scanned are written there as file:line;
+        files with such rows are read a second time to collect them.
+        """
+        start = time.perf_counter()
+        exact = analyzer_options.get('exact', False)
+        result = ReportResult(self.filters, exact)
+        rejected_rows: List[List] = []
+        for csv_file_path in csv_file_paths:
+            summary_path = None
+            partition = None
+            if store_dir is not None:
+                summary_path = partition_summary_path(store_dir, csv_file_path)
+                partition = read_report_summary(summary_path, self, csv_file_path, exact)
+            if partition is None:
+                signature = source_signature(csv_file_path) if summary_path else None
+                analyzer = SalesDataAnalyzer(csv_file_path, **analyzer_options)
+                partition = self.execute(analyzer)
+                if quarantine_path is not None and analyzer.rejected_rows:
+                    rejected_rows.extend(rejected_file_rows(csv_file_path, exact))
+                result.recomputed.append(csv_file_path)
+                if summary_path is not None:
+                    try:
+                        write_report_summary(summary_path, self, partition, signature)
+                    except OSError as e:
+                        warnings.warn(f"Could not write report summary {summary_path}: {e}")
+            result.merge(partition)
+        if quarantine_path is not None and rejected_rows:
+            write_quarantine(quarantine_path, list(ROW_FIELDS), rejected_rows)
         
+        result.passes = len(result.recomputed)
+        result.elapsed = time.perf_counter() - start
+        return result
+    
+    @staticmethod
+    def _scan_columns(columns: ColumnStore, result: ReportResult) -> None:
+        decoders = [(field, columns.codes[field], columns.dictionaries[field]) for field in KEY_FIELDS]
+        for i, (price, quantity, day) in enumerate(zip(columns.price, columns.quantity, columns.day)):
+            keys = {field: values[codes[i]] for field, codes, values in decoders}
+            keys['month'] = month_label(month_key(day))
+            result.add(price, quantity, day, keys)
+    
+    @staticmethod
+    def _finish(result: ReportResult, start: float) -> ReportResult:
+        result.passes = 1
+        result.elapsed = time.perf_counter() - start
+        return result
+
+
+def partition_summary_path(store_dir: str, csv_file_path: str) -> str:
+    source = os.path.abspath(csv_file_path)
+    digest = hashlib.sha1(source.encode()).hexdigest()[:12]
+    return os.path.join(store_dir, f"{os.path.basename(source)}.{digest}{SUMMARY_SUFFIX}")
+
+
+def write_report_summary(summary_path: str, plan: ReportPlan, result: ReportResult,
+                         signature: Dict[str, Any]) -> None:
+    """Persist one partition's report aggregates, with groups in first-seen order.
+    
+    Exact aggregates keep their cent amounts in integer columns; the order
+    extremes stay floats because empty groups hold infinities.
+    """
+    os.makedirs(os.path.dirname(summary_path) or '.', exist_ok=True)
+    aggregates = result.aggregates
+    money = 'q' if aggregates.exact else 'd'
+    columns = {}
+    for dimension, groups in aggregates.groups.items():
+        columns[f"{dimension}.revenue"] = array(money, (s.revenue for s in groups.values()))
+        columns[f"{dimension}.orders"] = array('q', (s.orders for s in groups.values()))
+        columns[f"{dimension}.quantity"] = array('q', (s.quantity for s in groups.values()))
+        columns[f"{dimension}.price_total"] = array(money, (s.price_total for s in groups.values()))
+        columns[f"{dimension}.max_order"] = array('d', (s.max_order for s in groups.values()))
+        columns[f"{dimension}.min_order"] = array('d', (s.min_order for s in groups.values()))
+    meta = {
+        'kind': 'report_summary',
+        'source': signature,
+        'exact': aggregates.exact,
+        'filters': plan.specs,
+        'filter_counts': result.filter_counts,
+        'total_revenue': aggregates.total_revenue,
+        'order_count': aggregates.order_count,
+    }
+    strings = {dimension: list(groups) for dimension, groups in aggregates.groups.items()}
+    write_column_file(summary_path, columns, strings, {}, meta)
+
+
+def read_report_summary(summary_path: str, plan: ReportPlan, csv_file_path: str,
+                        exact: bool = False) -> Optional[ReportResult]:
+    """The stored partition result, or None if it is missing, stale or from another plan or mode."""
+    column_file = read_column_file(summary_path)
+    if column_file is None:
+        return None
+    meta = column_file.meta
+    if (meta.get('kind') != 'report_summary' or meta.get('filters') != plan.specs
+            or meta.get('exact', False) != exact
+            or not column_file_matches(column_file, csv_file_path)):
+        return None
+    
+    result = ReportResult(plan.filters, exact)
+    result.filter_counts.update(meta['filter_counts'])
+    result.aggregates.total_revenue = meta['total_revenue']
+    result.aggregates.order_count = meta['order_count']
+    for dimension in GROUP_KEYS:
+        measures = zip(*(column_file.columns[f"{dimension}.{name}"] for name in (
+            'revenue', 'orders', 'quantity', 'price_total', 'max_order', 'min_order')))
+        result.aggregates.groups[dimension] = {
+            key: GroupStats.from_totals(*values)
+            for key, values in zip(column_file.strings[dimension], measures)
+        }
+    return result
+
+
+def default_report_plan() -> ReportPlan:
+    return (ReportPlan()
+            .count_category('Electronics', label='electronics')
+            .count_date_range('2024-01-01', '2024-01-31', label='january')
+            .count_minimum_amount(500.0, label='over_500'))
+
+
+def benchmark_report(analyzer: SalesDataAnalyzer) -> Dict[str, Dict[str, float]]:
+    """Compare the fused report scan with calling each analyzer method in turn."""
+    analyzer.invalidate()
+    start = time.perf_counter()
+    scans_before = analyzer.scan_count
+    analyzer.get_total_revenue()
+    analyzer.get_revenue_by_category()
+    analyzer.get_revenue_by_region()
+    analyzer.get_top_products(5)
+    analyzer.get_sales_by_month()
+    analyzer.get_average_order_value()
+    analyzer.get_sales_by_salesperson()
+    analyzer.get_category_statistics()
+    analyzer.get_high_value_customers(1000.0)
+    analyzer.filter_by_category('Electronics')
+    analyzer.filter_by_date_range('2024-01-01', '2024-01-31')
+    analyzer.filter_by_minimum_amount(500.0)
+    per_method = {
+        'passes': analyzer.scan_count - scans_before,
+        'seconds': time.perf_counter() - start,
+    }
+    
+    fused = default_report_plan().execute(analyzer)
+    return {
+        'per_method': per_method,
+        'fused': {'passes': fused.passes, 'seconds': fused.elapsed},
+    }
+
+
+def load_report(path: str, **analyzer_options: Any) -> Tuple[ReportResult, int]:
+    """Load one dataset for run_batch: its default-plan report result and its row count."""
+    analyzer = SalesDataAnalyzer(path, **analyzer_options)
+    return default_report_plan().execute(analyzer), len(analyzer.sales_data)
+
+
+def run_batch(paths: Sequence[str], output_dir: str, output_format: str = 'json', jobs: int = 1,
+              threads: int = 1, quarantine_dir: Optional[str] = None,
+              **analyzer_options: Any) -> Dict[str, Any]:
+    """reports.run_batch over SalesDataAnalyzer loads with analyzer_options."""
+    return reports.run_batch(paths, output_dir, load_report, output_format, jobs, threads, quarantine_dir,
+                             **analyzer_options)
+
+
+def print_approximate_results(sketches: SalesSketches) -> None:
+    print("11. APPROXIMATE METRICS")
+    print("-" * 80)
+    for dimension in SalesSketches.DIMENSIONS:
+        counts = sketches.distinct_customers(dimension)
+        print(f"Distinct customers by {dimension}: "
+              + ", ".join(f"{key} ~{count}" for key, count in sorted(counts.items())))
+    print("Order amount p50 / p95 / p99 by category:")
+    for category, quantiles in sorted(sketches.order_quantiles().items()):
+        print(f"{category:20s}: " + " / ".join(f"${value:,.2f}" for value in quantiles.values()))
+    top = sketches.get_top_customers(5)
+    print(f"Top customers (each total low by at most ${sketches.spending.error:,.2f}):")
+    for c in top:
+        print(f"{c['customer_id']}: ${c['total_spending']:,.2f}")
+    print()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Sales data analysis report")
+    parser.add_argument('csv_files', nargs='*',
+                        default=[os.path.join(current_dir, '..', 'data', 'sales.csv')],
+                        help="sales CSV files, directories or glob patterns to analyze, "
+                             "one partition per file")
+    parser.add_argument('--backend', choices=BACKENDS, default='records',
+                        help="in-memory storage backend")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="processes used to parse the CSV")
+    parser.add_argument('--quarantine', metavar='PATH',
+                        help="write malformed rows with their line numbers to PATH instead of "
+                             "only skipping them; with several files lines read file:line, and "
+                             f"with --batch PATH is a directory of <file>{QUARANTINE_SUFFIX} files")
+    parser.add_argument('--exact', action='store_true',
+                        help="sum money in integer cents so totals do not depend on row order "
+                             "or partitioning")
+    parser.add_argument('--cache', action='store_true',
+                        help=f"reuse a binary column cache ({CACHE_SUFFIX}) next to the CSV")
+    parser.add_argument('--stream', action='store_true',
+                        help="compute the report in one chunked pass without loading the rows")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="rows per chunk in streaming mode")
+    parser.add_argument('--store', metavar='DIR',
+                        help=f"keep per-file report summaries ({SUMMARY_SUFFIX}) in DIR and "
+                             "rescan only files that changed")
+    parser.add_argument('--approximate', action='store_true',
+                        help="also print sketch-based distinct counts, quantiles and top customers")
+    parser.add_argument('--profile', action='store_true',
+                        help="print wall time, rows scanned, groups and peak memory per method to stderr")
+    parser.add_argument('--profile-output', metavar='PATH',
+                        help="also write the profile as JSON, or Prometheus text if PATH ends in .prom")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="compare the fused report scan with per-method scans")
+    parser.add_argument('--format', choices=REPORT_FORMATS, default='text',
+                        help="report format; json and csv hold the same numbers as the text report")
+    parser.add_argument('--output', metavar='PATH', help="write the report to PATH instead of stdout")
+    parser.add_argument('--threads', type=int, default=1,
+                        help="threads computing the report sections")
+    parser.add_argument('--batch', metavar='DIR',
+                        help="write one report per input file into DIR instead of one combined report")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="processes reporting on input files at once in batch mode")
+    args = parser.parse_args(argv)
+    if args.format != 'text' and args.output is None and (args.approximate or args.benchmark):
+        parser.error("--approximate and --benchmark print text; use --output for json or csv reports")
+    if args.stream and (args.workers > 1 or args.cache):
+        parser.error("--workers and --cache speed up loading the rows, which --stream does not keep")
+    return args
+
+
+def run_report(args: argparse.Namespace) -> Optional[int]:
+    args.csv_files = [path for source in args.csv_files for path in discover_partitions(source)]
+    if not args.csv_files:
+        raise FileNotFoundError("No CSV files matched")
+    if args.batch:
+        return run_batch_report(args)
+    plan = default_report_plan()
+    partitioned = args.store is not None or len(args.csv_files) > 1
+    if partitioned:
+        report = plan.execute_partitions(args.csv_files, store_dir=args.store,
+                                         quarantine_path=args.quarantine, backend=args.backend,
+                                         workers=args.workers, cache=args.cache, exact=args.exact)
+    elif args.stream:
+        report = plan.execute_csv(args.csv_files[0], chunk_size=args.chunk_size, exact=args.exact,
+                                  quarantine_path=args.quarantine)
+    else:
+        analyzer = SalesDataAnalyzer(args.csv_files[0], backend=args.backend,
+                                     workers=args.workers, cache=args.cache,
+                                     quarantine=args.quarantine, exact=args.exact)
+        report = plan.execute(analyzer)
+    if args.output:
+        with open(args.output, 'w', newline='') as file:
+            print_analysis_results(report, args.format, file, args.threads)
+    else:
+        print_analysis_results(report, args.format, threads=args.threads)
+    
+    if args.approximate:
+        sketches = reduce(lambda acc, path: acc.merge(sketch_csv(path, args.chunk_size)),
+                          args.csv_files, SalesSketches())
+        print_approximate_results(sketches)
+    
+    if args.benchmark and not (args.stream or partitioned):
+        for path, stats in benchmark_report(analyzer).items():
+            print(f"{path:10s}: {stats['passes']} passes in {stats['seconds'] * 1000:.2f} ms")
+
+
+def run_batch_report(args: argparse.Namespace) -> int:
+    result = run_batch(args.csv_files, args.batch, args.format, jobs=args.jobs, threads=args.threads,
+                       quarantine_dir=args.quarantine, backend=args.backend, workers=args.workers,
+                       cache=args.cache, exact=args.exact)
+    print(f"Wrote {result['datasets']} reports ({result['rows']:,} rows) to {args.batch} in "
+          f"{result['seconds']:.2f} s ({result['datasets_per_minute']:,.1f} datasets/minute)")
+    for path, error in result['failed'].items():
+        print(f"Failed {path}: {error}")
+    return 1 if result['failed'] else 0
+
+
+def write_profile(profiler: Profiler, output_path: Optional[str]) -> None:
+    """Print the per-method table to stderr and optionally write JSON or Prometheus text."""
+    print(profiler.format_table(), file=sys.stderr)
+    if output_path:
+        text = profiler.to_prometheus() if output_path.endswith('.prom') else profiler.to_json()
+        with open(output_path, 'w') as file:
+            file.write(text)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    profiler = Profiler(memory=True) if args.profile or args.profile_output else None
+    
+    try:
+        with profiler or contextlib.nullcontext():
+            status = run_report(args) or 0
     except FileNotFoundError as e:
         print(f"Error: {e}")
         return 1
@@ -254,7 +2206,9 @@ def main():
         print(f"An error occurred: {e}")
         return 1
     
-    return 0
+    if profiler is not None:
+        write_profile(profiler, args.profile_output)
+    return status
 
 
 if __name__ == "__main__":
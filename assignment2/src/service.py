@@ -0,0 +1,311 @@
+"""
+Asyncio serving layer: one warm analyzer per dataset shared by all requests.
+
+Analyzer methods run in a thread pool so the event loop keeps accepting
+requests. Identical queries that arrive while one is running wait for the same
+result. Results are kept in an LRU cache with a TTL, and a dataset is reloaded
+and its cached results dropped once its CSV changes on disk.
+
+Run a local instance with
+    python service.py --dataset sales=../data/sales.csv --port 8080
+and query it with GET /<dataset>/<method>?param=value, e.g.
+    /sales/get_top_products?n=3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from sales_analysis import BACKENDS, SalesDataAnalyzer, SalesRecord
+
+ENDPOINTS: Dict[str, Dict[str, Callable[[str], Any]]] = {
+    'get_total_revenue': {},
+    'get_revenue_by_category': {},
+    'get_revenue_by_region': {},
+    'get_top_products': {'n': int},
+    'get_top': {'dimension': str, 'n': int, 'metric': str},
+    'get_top_customers': {'n': int, 'metric': str},
+    'get_top_salespeople': {'n': int, 'metric': str},
+    'get_top_categories': {'n': int, 'metric': str},
+    'get_sales_by_month': {},
+    'get_average_order_value': {},
+    'get_sales_by_salesperson': {},
+    'get_category_statistics': {},
+    'get_high_value_customers': {'min_spending': float},
+    'get_revenue_between': {'start_date': str, 'end_date': str},
+    'filter_by_category': {'category': str},
+    'filter_by_date_range': {'start_date': str, 'end_date': str},
+    'filter_by_minimum_amount': {'min_amount': float},
+}
+
+
+class TTLCache:
+    """Least-recently-used mapping whose entries also expire ttl seconds after insertion."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if entry[0] <= self.clock():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        for key in [key for key in self._entries if predicate(key)]:
+            del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class Dataset:
+    """A CSV file, its current analyzer and the file state the analyzer was loaded from."""
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.analyzer: Optional[SalesDataAnalyzer] = None
+        self.signature: Optional[Tuple[int, int]] = None
+        self.generation = 0
+        self.checked_at = float('-inf')
+        self.loading: Optional['asyncio.Task'] = None
+
+
+class AnalysisService:
+    """Coalescing, caching front end over one warm SalesDataAnalyzer per dataset.
+
+    State is only touched from the event loop thread; executor threads run
+    analyzer methods and loads. A changed CSV is loaded into a new analyzer
+    that replaces the old one, so queries already running finish on the
+    data they started with.
+    """
+
+    def __init__(self, datasets: Dict[str, str], backend: str = 'records',
+                 executor: Optional[Executor] = None, cache_size: int = 256,
+                 ttl: float = 60.0, check_interval: float = 1.0):
+        self.datasets = {name: Dataset(name, path) for name, path in datasets.items()}
+        self.backend = backend
+        self.executor = executor or ThreadPoolExecutor(max_workers=4)
+        self.cache = TTLCache(cache_size, ttl)
+        self.check_interval = check_interval
+        self._in_flight: Dict[Hashable, 'asyncio.Future'] = {}
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'computed': 0, 'reloads': 0}
+
+    async def warm(self) -> None:
+        """Load every dataset before serving."""
+        await asyncio.gather(*(self._analyzer(dataset) for dataset in self.datasets.values()))
+
+    async def query(self, dataset_name: str, method: str, **params: Any) -> Any:
+        if dataset_name not in self.datasets:
+            raise KeyError(f"Unknown dataset '{dataset_name}'")
+        if method not in ENDPOINTS:
+            raise KeyError(f"Unknown method '{method}'")
+        unknown = set(params) - set(ENDPOINTS[method])
+        if unknown:
+            raise ValueError(f"Unknown parameter(s) for {method}: {', '.join(sorted(unknown))}")
+
+        self.stats['requests'] += 1
+        dataset = self.datasets[dataset_name]
+        analyzer, generation = await self._analyzer(dataset)
+        key = (dataset_name, generation, method, tuple(sorted(params.items())))
+        missing = object()
+        value = self.cache.get(key, missing)
+        if value is not missing:
+            self.stats['cache_hits'] += 1
+            return value
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, partial(getattr(analyzer, method), **params))
+        self._in_flight[key] = future
+        self.stats['computed'] += 1
+        try:
+            value = await asyncio.shield(future)
+        finally:
+            del self._in_flight[key]
+        if generation == dataset.generation:
+            self.cache.put(key, value)
+        return value
+
+    async def _analyzer(self, dataset: Dataset) -> Tuple[SalesDataAnalyzer, int]:
+        """The dataset's analyzer, reloaded first if the CSV changed since it was loaded."""
+        now = time.monotonic()
+        if dataset.analyzer is not None and now - dataset.checked_at < self.check_interval:
+            return dataset.analyzer, dataset.generation
+        dataset.checked_at = now
+        stat = os.stat(dataset.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if dataset.analyzer is None or signature != dataset.signature:
+            if dataset.loading is None:
+                dataset.loading = asyncio.ensure_future(self._load(dataset, signature))
+            await asyncio.shield(dataset.loading)
+        return dataset.analyzer, dataset.generation
+
+    async def _load(self, dataset: Dataset, signature: Tuple[int, int]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            analyzer = await loop.run_in_executor(
+                self.executor, partial(SalesDataAnalyzer, dataset.path, backend=self.backend))
+            dataset.analyzer = analyzer
+            dataset.signature = signature
+            dataset.generation += 1
+            self.stats['reloads'] += 1
+            self.cache.discard_where(lambda key: key[0] == dataset.name)
+        finally:
+            dataset.loading = None
+
+    async def handle_request(self, target: str) -> Tuple[int, Any]:
+        """Route an HTTP target to a query; returns (status, JSON-ready body)."""
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip('/').split('/') if part]
+        if parts == ['stats']:
+            return 200, dict(self.stats, cached=len(self.cache))
+        if len(parts) != 2:
+            return 404, {'error': "expected /<dataset>/<method>"}
+        dataset_name, method = parts
+        try:
+            types = ENDPOINTS.get(method, {})
+            params = {name: types[name](value) if name in types else value
+                      for name, value in parse_qsl(url.query)}
+            return 200, to_jsonable(await self.query(dataset_name, method, **params))
+        except KeyError as e:
+            return 404, {'error': str(e.args[0])}
+        except (ValueError, TypeError) as e:
+            return 400, {'error': str(e)}
+        except FileNotFoundError as e:
+            return 503, {'error': str(e)}
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter) -> None:
+        """Minimal HTTP/1.1 with keep-alive: GET requests only, JSON responses."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    verb, target, _ = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                if verb != 'GET':
+                    status, body = 405, {'error': "only GET is supported"}
+                else:
+                    status, body = await self.handle_request(target)
+                payload = json.dumps(body).encode()
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'Error')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                503: 'Service Unavailable'}
+
+
+def to_jsonable(value: Any) -> Any:
+    """Analyzer results as plain JSON types; records become dicts of their CSV columns."""
+    if isinstance(value, SalesRecord):
+        return {
+            'order_id': value.order_id,
+            'date': value.date.strftime('%Y-%m-%d'),
+            'product': value.product,
+            'category': value.category,
+            'price': value.price,
+            'quantity': value.quantity,
+            'region': value.region,
+            'customer_id': value.customer_id,
+            'salesperson': value.salesperson,
+        }
+    if isinstance(value, dict):
+        return {key: to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, Sequence) and not isinstance(value, str):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def serve(service: AnalysisService, host: str = '127.0.0.1', port: int = 8080,
+                ready: Optional[Callable[[int], None]] = None) -> None:
+    await service.warm()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    if ready is not None:
+        ready(server.sockets[0].getsockname()[1])
+    async with server:
+        await server.serve_forever()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve sales analyses over HTTP")
+    parser.add_argument('--dataset', action='append', required=True, metavar='NAME=CSV',
+                        help="dataset to serve; repeat for several")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080, help="0 picks a free port")
+    parser.add_argument('--backend', choices=BACKENDS, default='records')
+    parser.add_argument('--threads', type=int, default=4, help="executor threads for analyzer calls")
+    parser.add_argument('--cache-size', type=int, default=256)
+    parser.add_argument('--ttl', type=float, default=60.0, help="seconds a cached result stays valid")
+    parser.add_argument('--check-interval', type=float, default=1.0,
+                        help="seconds between checks of the CSV for changes")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    datasets = dict(spec.split('=', 1) for spec in args.dataset)
+    service = AnalysisService(datasets, backend=args.backend,
+                              executor=ThreadPoolExecutor(max_workers=args.threads),
+                              cache_size=args.cache_size, ttl=args.ttl,
+                              check_interval=args.check_interval)
+    try:
+        asyncio.run(serve(service, args.host, args.port,
+                          ready=lambda port: print(f"Listening on {args.host}:{port}", flush=True)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
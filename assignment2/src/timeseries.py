@@ -0,0 +1,212 @@
+"""
+Revenue time series: dense per-day arrays bucketed once from an analyzer.
+
+SalesTimeSeries.build scans the rows one time and keeps revenue per day, from
+the first to the last order date, for the whole dataset and for every key of
+the chosen dimensions. Coarser granularities, rolling windows and
+period-over-period growth are differences of running totals over those days,
+so each query costs O(days) whatever the number of rows.
+"""
+
+import operator
+from array import array
+from datetime import datetime
+from itertools import accumulate
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+import numpy_backend
+from sales_analysis import KEY_FIELDS, SalesDataAnalyzer, to_cents, to_datetime, to_epoch_day
+
+Series = Dict[str, Any]
+
+GRANULARITIES: Dict[str, Callable[[datetime], str]] = {
+    'day': lambda date: date.strftime('%Y-%m-%d'),
+    'week': lambda date: '{:04d}-W{:02d}'.format(*date.isocalendar()[:2]),
+    'month': lambda date: f"{date.year:04d}-{date.month:02d}",
+    'quarter': lambda date: f"{date.year:04d}-Q{(date.month - 1) // 3 + 1}",
+    'year': lambda date: f"{date.year:04d}",
+}
+
+
+class SalesTimeSeries:
+    """Revenue per day for the total and for each key of some dimensions.
+
+    Queries pick a series with dimension and key: no dimension is the total,
+    and a dimension without a key gives one result per key. A key without
+    sales reads as zero on every day. Running totals are computed per series
+    on first use. The series are a snapshot; build again after the analyzer's
+    rows change.
+    """
+
+    def __init__(self, first_day: int, days: int,
+                 daily: Dict[Optional[str], Dict[Optional[str], Sequence]], exact: bool = False):
+        self.first_day = first_day
+        self.days = days
+        self.daily = daily
+        self.exact = exact
+        self._cumulative: Dict[Tuple[Optional[str], Optional[str]], array] = {}
+        self._periods: Dict[str, Tuple[List[int], List[str]]] = {}
+        self._zeros = array('q' if exact else 'd', bytes(8 * days))
+
+    @classmethod
+    def build(cls, analyzer: SalesDataAnalyzer,
+              dimensions: Sequence[str] = ('category', 'region')) -> 'SalesTimeSeries':
+        """Bucket the analyzer's rows by day in one scan; exact analyzers keep cents."""
+        unknown = [d for d in dimensions if d not in KEY_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown dimension '{unknown[0]}', expected one of {KEY_FIELDS}")
+        analyzer._record_scan(len(analyzer.sales_data))
+        columns = analyzer.columns
+        if columns is not None:
+            day, price, quantity = columns.day, columns.price, columns.quantity
+            keys = {d: (columns.codes[d], columns.dictionaries[d]) for d in dimensions}
+        else:
+            records = analyzer.sales_data
+            day = [r.day for r in records]
+            price = [r.price for r in records]
+            quantity = [r.quantity for r in records]
+            keys = {d: _encode(getattr(r, d) for r in records) for d in dimensions}
+        if not len(day):
+            return cls(0, 0, {None: {None: array('d')}, **{d: {} for d in dimensions}}, analyzer.exact)
+
+        first_day = min(day)
+        days = max(day) - first_day + 1
+        if analyzer.backend == 'numpy':
+            total = numpy_backend.daily_revenue(None, 1, day, first_day, days, price, quantity)[0]
+            daily = {None: {None: array('d', total)}}
+            for dimension, (codes, labels) in keys.items():
+                per_key = numpy_backend.daily_revenue(codes, len(labels), day, first_day, days,
+                                                      price, quantity)
+                daily[dimension] = {label: array('d', values) for label, values in zip(labels, per_key)}
+            return cls(first_day, days, daily)
+
+        typecode = 'q' if analyzer.exact else 'd'
+        prices = map(to_cents, price) if analyzer.exact else price
+        amounts = list(map(operator.mul, prices, quantity))
+        offsets = [d - first_day for d in day]
+        total = array(typecode, bytes(8 * days))
+        for offset, amount in zip(offsets, amounts):
+            total[offset] += amount
+        daily = {None: {None: total}}
+        for dimension, (codes, labels) in keys.items():
+            per_key = [array(typecode, bytes(8 * days)) for _ in labels]
+            for code, offset, amount in zip(codes, offsets, amounts):
+                per_key[code][offset] += amount
+            daily[dimension] = dict(zip(labels, per_key))
+        return cls(first_day, days, daily, analyzer.exact)
+
+    def keys(self, dimension: str) -> List[str]:
+        self._check_dimension(dimension)
+        return list(self.daily[dimension])
+
+    def revenue(self, granularity: str = 'day', dimension: Optional[str] = None,
+                key: Optional[str] = None) -> Union[Series, Dict[str, Series]]:
+        """Revenue per period, labelled '2024-01-15', '2024-W03', '2024-01', '2024-Q1' or '2024'.
+
+        The first and last periods only cover the days that have data.
+        """
+        starts, labels = self.periods(granularity)
+        if granularity == 'day':
+            return self._each(dimension, key, lambda series: dict(zip(labels, map(self._money, series))))
+
+        def compute(series: Hashable) -> Series:
+            return dict(zip(labels, map(self._money, self._period_totals(series, starts))))
+        return self._each(dimension, key, compute, cumulative=True)
+
+    def rolling(self, window: int, dimension: Optional[str] = None,
+                key: Optional[str] = None) -> Union[Series, Dict[str, Series]]:
+        """Revenue of the window days ending on each day, e.g. rolling(7) or rolling(30).
+
+        Days before the first order count as zero, so the first window - 1
+        sums cover fewer days.
+        """
+        if window < 1:
+            raise ValueError(f"Rolling window must be at least one day, got {window}")
+        _, labels = self.periods('day')
+
+        def compute(series: Hashable) -> Series:
+            cumulative = self._cumulative[series]
+            return {label: self._money(cumulative[end] - cumulative[max(0, end - window)])
+                    for end, label in enumerate(labels, 1)}
+        return self._each(dimension, key, compute, cumulative=True)
+
+    def growth(self, granularity: str = 'month', dimension: Optional[str] = None,
+               key: Optional[str] = None) -> Union[Series, Dict[str, Series]]:
+        """Change of each period's revenue over the previous period as a fraction (0.25 is +25%).
+
+        The first period, and a period following one without revenue, are None.
+        """
+        starts, labels = self.periods(granularity)
+
+        def compute(series: Hashable) -> Series:
+            totals = self._period_totals(series, starts)
+            changes = [None] + [(current - previous) / previous if previous else None
+                                for previous, current in zip(totals, totals[1:])]
+            return dict(zip(labels, changes))
+        return self._each(dimension, key, compute, cumulative=True)
+
+    def total(self, start_date: str, end_date: str, dimension: Optional[str] = None,
+              key: Optional[str] = None) -> Union[float, Dict[str, float]]:
+        """Revenue from start_date through end_date, from two running totals."""
+        first = min(max(to_epoch_day(start_date) - self.first_day, 0), self.days)
+        last = min(max(to_epoch_day(end_date) - self.first_day + 1, first), self.days)
+
+        def compute(series: Hashable) -> float:
+            cumulative = self._cumulative[series]
+            return self._money(cumulative[last] - cumulative[first])
+        return self._each(dimension, key, compute, cumulative=True)
+
+    def periods(self, granularity: str) -> Tuple[List[int], List[str]]:
+        """Day offsets where each period starts and the period labels, computed once."""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}', expected one of {tuple(GRANULARITIES)}")
+        periods = self._periods.get(granularity)
+        if periods is None:
+            label_of = GRANULARITIES[granularity]
+            starts: List[int] = []
+            labels: List[str] = []
+            for offset in range(self.days):
+                label = label_of(to_datetime(self.first_day + offset))
+                if not labels or label != labels[-1]:
+                    starts.append(offset)
+                    labels.append(label)
+            periods = self._periods[granularity] = (starts, labels)
+        return periods
+
+    def _period_totals(self, series: Hashable, starts: List[int]) -> List[Union[int, float]]:
+        cumulative = self._cumulative[series]
+        bounds = starts + [self.days]
+        return [cumulative[end] - cumulative[start] for start, end in zip(bounds, bounds[1:])]
+
+    def _each(self, dimension: Optional[str], key: Optional[str], compute: Callable[[Any], Any],
+              cumulative: bool = False) -> Any:
+        """compute for the selected series, or per key when only a dimension is given.
+
+        compute gets the daily array, or with cumulative=True a handle into
+        the running totals, which are filled in the first time.
+        """
+        self._check_dimension(dimension)
+        if dimension is not None and key is None:
+            return {k: self._each(dimension, k, compute, cumulative) for k in self.daily[dimension]}
+        series = (dimension, key) if dimension is not None else (None, None)
+        daily = self.daily[series[0]].get(series[1], self._zeros)
+        if not cumulative:
+            return compute(daily)
+        if series not in self._cumulative:
+            self._cumulative[series] = array(daily.typecode, accumulate(daily, initial=0))
+        return compute(series)
+
+    def _check_dimension(self, dimension: Optional[str]) -> None:
+        if dimension not in self.daily:
+            built = tuple(d for d in self.daily if d is not None)
+            raise ValueError(f"No series for dimension '{dimension}'; built for {built}")
+
+    def _money(self, value: Union[int, float]) -> float:
+        return value / 100 if self.exact else value
+
+
+def _encode(values) -> Tuple[List[int], List[str]]:
+    """Codes and labels of values in first-seen order."""
+    lookup: Dict[str, int] = {}
+    codes = [lookup.setdefault(value, len(lookup)) for value in values]
+    return codes, list(lookup)
@@ -0,0 +1,148 @@
+"""
+Unit tests for the binary column cache
+
+Tests the memory-mapped sidecar file including:
+- Column file round trips
+- Reuse and invalidation against the source CSV
+- Analyzer integration
+"""
+
+import pytest
+import os
+import sys
+import shutil
+from array import array
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import column_cache
+from column_cache import (read_column_file, write_column_file, matches_source, source_signature,
+                          column_file_matches)
+from sales_analysis import SalesDataAnalyzer, CACHE_SUFFIX
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'sales.csv')
+
+
+@pytest.fixture
+def csv_copy(tmp_path):
+    """Copy the sample data so cache files land in a temporary directory."""
+    path = str(tmp_path / 'sales.csv')
+    shutil.copyfile(DATA_FILE, path)
+    return path
+
+
+class TestColumnFile:
+    """Test the column file format."""
+    
+    def test_round_trip(self, tmp_path):
+        """Test that columns, string tables and texts survive a round trip."""
+        path = str(tmp_path / 'columns.bin')
+        write_column_file(
+            path,
+            {'price': array('d', [1.5, 2.25]), 'day': array('q', [19737, 19738])},
+            {'category': ['Electronics', 'Furniture']},
+            {'order_id': ['1001', 'ORD-é']},
+            {'rows': 2}
+        )
+        
+        column_file = read_column_file(path)
+        
+        assert list(column_file.columns['price']) == [1.5, 2.25]
+        assert list(column_file.columns['day']) == [19737, 19738]
+        assert column_file.strings['category'] == ['Electronics', 'Furniture']
+        assert list(column_file.texts['order_id']) == ['1001', 'ORD-é']
+        assert column_file.texts['order_id'][-1] == 'ORD-é'
+        assert column_file.meta == {'rows': 2}
+    
+    def test_unreadable_file(self, tmp_path):
+        """Test that missing or corrupt files are reported as None."""
+        path = tmp_path / 'broken.bin'
+        assert read_column_file(str(path)) is None
+        
+        path.write_bytes(b'not a column file at all')
+        assert read_column_file(str(path)) is None
+    
+    def test_matches_source(self, csv_copy):
+        """Test the mtime/size/hash staleness check."""
+        signature = source_signature(csv_copy)
+        assert matches_source(signature, csv_copy)
+        
+        os.utime(csv_copy, ns=(0, 0))
+        assert matches_source(signature, csv_copy)
+        
+        with open(csv_copy, 'a') as file:
+            file.write('1051,2024-03-31,Mouse,Electronics,25.50,1,North,C051,SP001\n')
+        assert not matches_source(signature, csv_copy)
+    
+    def test_moved_mtime_is_written_back(self, csv_copy, tmp_path):
+        """Test that a hash match stores the new mtime in the column file."""
+        path = str(tmp_path / 'cols.bin')
+        write_column_file(path, {'price': array('d', [1.5])}, {}, {},
+                          {'source': source_signature(csv_copy)})
+        os.utime(csv_copy, ns=(0, 0))
+        
+        assert column_file_matches(read_column_file(path), csv_copy)
+        
+        column_file = read_column_file(path)
+        assert column_file.meta['source']['mtime_ns'] == 0
+        assert list(column_file.columns['price']) == [1.5]
+
+
+class TestAnalyzerCache:
+    """Test SalesDataAnalyzer with cache=True."""
+    
+    @pytest.mark.parametrize('backend', ['records', 'columnar'])
+    def test_cache_is_written_and_reused(self, csv_copy, backend):
+        """Test that the first load writes the sidecar and the second maps it."""
+        fresh = SalesDataAnalyzer(csv_copy, backend=backend, cache=True)
+        assert os.path.exists(csv_copy + CACHE_SUFFIX)
+        
+        cached = SalesDataAnalyzer(csv_copy, backend='columnar', cache=True)
+        
+        assert isinstance(cached.columns.price, memoryview)
+        assert cached.get_total_revenue() == fresh.get_total_revenue()
+        assert cached.get_category_statistics() == fresh.get_category_statistics()
+        assert cached.get_top_products(5) == fresh.get_top_products(5)
+        assert [r.order_id for r in cached.sales_data] == [r.order_id for r in fresh.sales_data]
+    
+    def test_cache_rebuilt_when_source_changes(self, csv_copy):
+        """Test that appending to the CSV invalidates the sidecar."""
+        before = SalesDataAnalyzer(csv_copy, cache=True)
+        with open(csv_copy, 'a') as file:
+            file.write('1051,2024-03-31,Mouse,Electronics,25.50,2,North,C051,SP001\n')
+        
+        after = SalesDataAnalyzer(csv_copy, backend='columnar', cache=True)
+        
+        assert len(after.sales_data) == len(before.sales_data) + 1
+        assert pytest.approx(after.get_total_revenue() - before.get_total_revenue()) == 51.0
+    
+    def test_touched_source_is_hashed_once(self, csv_copy, monkeypatch):
+        """Test that only the first load after a touch hashes the unchanged CSV."""
+        SalesDataAnalyzer(csv_copy, cache=True)
+        os.utime(csv_copy, ns=(0, 0))
+        hashed = []
+        file_sha256 = column_cache.file_sha256
+        monkeypatch.setattr(column_cache, 'file_sha256', lambda path: hashed.append(path) or file_sha256(path))
+        
+        first = SalesDataAnalyzer(csv_copy, backend='columnar', cache=True)
+        second = SalesDataAnalyzer(csv_copy, backend='columnar', cache=True)
+        
+        assert hashed == [csv_copy]
+        assert isinstance(second.columns.price, memoryview)
+        assert second.get_total_revenue() == first.get_total_revenue()
+    
+    def test_mapped_store_accepts_appends(self, csv_copy):
+        """Test that a mapped store is copied into arrays before it is modified."""
+        SalesDataAnalyzer(csv_copy, cache=True)
+        analyzer = SalesDataAnalyzer(csv_copy, backend='columnar', cache=True)
+        
+        analyzer.columns.append_row({
+            'order_id': '1051', 'date': '2024-03-31', 'product': 'Mouse',
+            'category': 'Electronics', 'price': '25.50', 'quantity': '2',
+            'region': 'North', 'customer_id': 'C051', 'salesperson': 'SP001'
+        })
+        
+        assert isinstance(analyzer.columns.price, array)
+        assert len(analyzer.columns) == 51
+        assert analyzer.columns.record(50).customer_id == 'C051'
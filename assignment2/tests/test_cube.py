@@ -0,0 +1,175 @@
+"""
+Unit tests for multi-dimensional sales cubes
+
+Tests the cube subsystem including:
+- One-scan cube construction over both storage backends
+- Rollups and slices derived from the cells
+- Saving and loading cubes
+"""
+
+import pytest
+import os
+import sys
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from cube import SalesCube
+from sales_analysis import SalesDataAnalyzer
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'sales.csv')
+
+
+@pytest.fixture(params=['records', 'columnar'])
+def analyzer(request):
+    """Create an analyzer over the sample data for each storage backend."""
+    return SalesDataAnalyzer(DATA_FILE, backend=request.param)
+
+
+@pytest.fixture
+def cube(analyzer):
+    """Build a region x category x month cube."""
+    return SalesCube.build(analyzer, ['region', 'category', 'month'])
+
+
+class TestCubeBuild:
+    """Test building cubes from an analyzer."""
+    
+    def test_single_scan(self, analyzer):
+        """Test that a cube reads the rows once."""
+        scans = analyzer.scan_count
+        SalesCube.build(analyzer, ['salesperson', 'region'])
+        
+        assert analyzer.scan_count == scans + 1
+    
+    def test_cells_partition_rows(self, cube, analyzer):
+        """Test that cell counts and revenue add up to the whole dataset."""
+        assert sum(s.orders for s in cube.cells.values()) == len(analyzer.sales_data)
+        assert cube.get_total_revenue() == pytest.approx(analyzer.get_total_revenue())
+    
+    def test_cell_values(self, cube, analyzer):
+        """Test one cell against the matching raw rows."""
+        rows = [r for r in analyzer.sales_data
+                if (r.region, r.category, r.date.strftime('%Y-%m')) == ('North', 'Electronics', '2024-01')]
+        cell = cube.cells[('North', 'Electronics', '2024-01')]
+        
+        assert cell.orders == len(rows)
+        assert cell.revenue == pytest.approx(sum(r.total_amount for r in rows))
+        assert cell.max_order == max(r.total_amount for r in rows)
+        assert cell.min_order == min(r.total_amount for r in rows)
+    
+    def test_invalid_dimensions(self, analyzer):
+        """Test that unknown, repeated and missing dimensions are rejected."""
+        for dimensions in (['color'], ['region', 'region'], []):
+            with pytest.raises(ValueError):
+                SalesCube.build(analyzer, dimensions)
+
+
+class TestRollupsAndSlices:
+    """Test views derived from cube cells."""
+    
+    def test_rollups_match_analyzer(self, cube, analyzer):
+        """Test that one-dimensional rollups match the analyzer's groupings."""
+        assert cube.get_revenue_by_region() == pytest.approx(analyzer.get_revenue_by_region())
+        assert cube.get_sales_by_month() == pytest.approx(analyzer.get_sales_by_month())
+        for category, stats in cube.get_category_statistics().items():
+            assert stats == pytest.approx(analyzer.get_category_statistics()[category])
+        assert cube.get_average_order_value() == pytest.approx(analyzer.get_average_order_value())
+    
+    def test_two_dimensional_rollup(self, cube, analyzer):
+        """Test a region x category rollup against grouping the rows directly."""
+        expected = {}
+        for r in analyzer.sales_data:
+            key = (r.region, r.category)
+            expected[key] = expected.get(key, 0.0) + r.total_amount
+        
+        assert cube.rollup('region', 'category').measure() == pytest.approx(expected)
+        assert cube.rollup('category', 'region').dimensions == ('category', 'region')
+    
+    def test_rollup_reads_no_rows(self, cube, analyzer):
+        """Test that rollups come from cells, not rows."""
+        scans = analyzer.scan_count
+        cube.rollup('month')
+        cube.get_top_categories(2)
+        
+        assert analyzer.scan_count == scans
+    
+    def test_slice(self, cube, analyzer):
+        """Test fixing dimension values and dropping them from the cube."""
+        north = cube.slice(region='North')
+        
+        assert north.dimensions == ('category', 'month')
+        assert north.get_total_revenue() == pytest.approx(analyzer.get_revenue_by_region()['North'])
+        assert cube.slice(region='North', category='Furniture', month='2024-02').dimensions == ()
+        assert cube.slice(region='Nowhere').cells == {}
+    
+    def test_unknown_names(self, cube):
+        """Test rollups, slices and measures over names the cube lacks."""
+        with pytest.raises(ValueError):
+            cube.rollup('product')
+        with pytest.raises(ValueError):
+            cube.slice(product='Laptop')
+        with pytest.raises(ValueError):
+            cube.measure('margin')
+        with pytest.raises(ValueError):
+            cube.get_top_products()
+
+
+class TestExactCube:
+    """Test cubes built from exact-mode analyzers."""
+    
+    def test_cells_in_cents(self, analyzer):
+        """Test that exact cubes sum cents and report the analyzer's exact results."""
+        exact = SalesDataAnalyzer(DATA_FILE, backend=analyzer.backend, exact=True)
+        cube = SalesCube.build(exact, ['region', 'category'])
+        
+        assert all(isinstance(stats.revenue, int) for stats in cube.cells.values())
+        assert cube.get_total_revenue() == exact.get_total_revenue() == 28473.5
+        assert cube.get_revenue_by_region() == exact.get_revenue_by_region()
+        assert cube.rollup('category').get_category_statistics() == exact.get_category_statistics()
+        assert cube.slice(region='North').measure('revenue') == {
+            (category,): revenue for (region, category), revenue in cube.measure('revenue').items()
+            if region == 'North'}
+    
+    def test_round_trip(self, tmp_path):
+        """Test that an exact cube keeps its cents through a save and load."""
+        cube = SalesCube.build(SalesDataAnalyzer(DATA_FILE, exact=True), ['region'])
+        path = str(tmp_path / 'exact.cube')
+        cube.save(path)
+        loaded = SalesCube.load(path)
+        
+        assert loaded.exact
+        assert loaded.measure('revenue') == cube.measure('revenue')
+        assert loaded.get_revenue_by_region() == cube.get_revenue_by_region()
+
+
+class TestCubeFiles:
+    """Test saving and loading cubes."""
+    
+    def test_round_trip(self, cube, tmp_path):
+        """Test that every cell and measure survives a save and load."""
+        path = str(tmp_path / 'sales.cube')
+        cube.save(path, meta={'source': 'sales.csv'})
+        loaded = SalesCube.load(path)
+        
+        assert loaded.dimensions == cube.dimensions
+        assert loaded.meta == {'source': 'sales.csv'}
+        for name in ('revenue', 'orders', 'quantity', 'price_total', 'max_order', 'min_order'):
+            assert loaded.measure(name) == cube.measure(name)
+    
+    def test_empty_cube(self, tmp_path):
+        """Test saving a cube without cells."""
+        path = str(tmp_path / 'empty.cube')
+        SalesCube(['region'], {}).save(path)
+        
+        loaded = SalesCube.load(path)
+        assert loaded.cells == {}
+        assert loaded.get_total_revenue() == 0.0
+    
+    def test_not_a_cube(self, tmp_path):
+        """Test that other files are rejected."""
+        path = tmp_path / 'sales.cube'
+        path.write_bytes(b'region,revenue\n')
+        
+        with pytest.raises(ValueError):
+            SalesCube.load(str(path))
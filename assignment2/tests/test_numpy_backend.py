@@ -0,0 +1,108 @@
+"""
+Unit tests for the NumPy execution mode
+
+Tests the vectorized backend including:
+- Grouped reductions over integer key codes
+- Boolean mask filters
+- Fallback when NumPy is not installed
+"""
+
+import pytest
+import os
+import sys
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy_backend
+from sales_analysis import SalesDataAnalyzer
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'sales.csv')
+
+
+def test_falls_back_without_numpy(monkeypatch):
+    """Test that the numpy backend degrades to the columnar backend."""
+    monkeypatch.setattr(numpy_backend, 'AVAILABLE', False)
+    
+    with pytest.warns(UserWarning, match='NumPy is not installed'):
+        analyzer = SalesDataAnalyzer(DATA_FILE, backend='numpy')
+    
+    assert analyzer.backend == 'columnar'
+    assert analyzer.get_total_revenue() == SalesDataAnalyzer(DATA_FILE).get_total_revenue()
+
+
+class TestVectorizedAnalyzer:
+    """Test that the numpy backend matches the record backend."""
+    
+    @pytest.fixture(autouse=True)
+    def require_numpy(self):
+        pytest.importorskip('numpy')
+    
+    @pytest.fixture
+    def analyzers(self):
+        return SalesDataAnalyzer(DATA_FILE), SalesDataAnalyzer(DATA_FILE, backend='numpy')
+    
+    def test_aggregations_match(self, analyzers):
+        """Test every grouped reduction within float tolerance."""
+        records, vectorized = analyzers
+        
+        assert vectorized.backend == 'numpy'
+        assert vectorized.get_total_revenue() == pytest.approx(records.get_total_revenue())
+        assert vectorized.get_revenue_by_category() == pytest.approx(records.get_revenue_by_category())
+        assert vectorized.get_revenue_by_region() == pytest.approx(records.get_revenue_by_region())
+        assert vectorized.get_sales_by_month() == pytest.approx(records.get_sales_by_month())
+        assert list(vectorized.get_sales_by_month()) == list(records.get_sales_by_month())
+        
+        for key, stats in records.get_category_statistics().items():
+            assert vectorized.get_category_statistics()[key] == pytest.approx(stats)
+        for key, stats in records.get_sales_by_salesperson().items():
+            assert vectorized.get_sales_by_salesperson()[key] == pytest.approx(stats)
+    
+    def test_rankings_match(self, analyzers):
+        """Test that group order and rankings are unchanged."""
+        records, vectorized = analyzers
+        
+        assert list(vectorized.get_revenue_by_region()) == list(records.get_revenue_by_region())
+        assert ([p['product'] for p in vectorized.get_top_products(5)]
+                == [p['product'] for p in records.get_top_products(5)])
+        assert ([c['customer_id'] for c in vectorized.get_high_value_customers(1000.0)]
+                == [c['customer_id'] for c in records.get_high_value_customers(1000.0)])
+    
+    def test_mask_filters(self, analyzers):
+        """Test that mask filters return the same records in the same order."""
+        records, vectorized = analyzers
+        
+        def order_ids(rows):
+            return [r.order_id for r in rows]
+        
+        assert (order_ids(vectorized.filter_by_category('Electronics'))
+                == order_ids(records.filter_by_category('Electronics')))
+        assert (order_ids(vectorized.filter_by_date_range('2024-01-01', '2024-01-31'))
+                == order_ids(records.filter_by_date_range('2024-01-01', '2024-01-31')))
+        assert (order_ids(vectorized.filter_by_minimum_amount(500.0))
+                == order_ids(records.filter_by_minimum_amount(500.0)))
+        assert vectorized.filter_by_category('NonExistent') == []
+    
+    def test_date_range_order(self, tmp_path):
+        """Test that every backend returns out-of-order rows sorted by date, ties in file order."""
+        path = tmp_path / 'unsorted.csv'
+        with open(DATA_FILE) as file:
+            header = file.readline()
+        path.write_text(header
+                        + "1,2024-01-20,Pen,Stationery,1.00,1,North,C001,SP001\n"
+                        + "2,2024-01-10,Pen,Stationery,1.00,1,North,C001,SP001\n"
+                        + "3,2024-01-20,Pen,Stationery,1.00,1,North,C001,SP001\n")
+        
+        for backend in ('records', 'columnar', 'numpy'):
+            rows = SalesDataAnalyzer(str(path), backend=backend).filter_by_date_range('2024-01-01', '2024-01-31')
+            assert [r.order_id for r in rows] == ['2', '1', '3']
+    
+    def test_append_after_vectorized_query(self, analyzers):
+        """Test that ndarray views do not pin the columns against appends."""
+        records, vectorized = analyzers
+        vectorized.get_category_statistics()
+        
+        vectorized.append([records.sales_data[0]])
+        
+        assert len(vectorized.sales_data) == len(records.sales_data) + 1
+        assert vectorized.get_category_statistics()['Electronics']['total_orders'] == 27
@@ -0,0 +1,130 @@
+"""
+Unit tests for the opt-in profiling instrumentation
+
+Tests per-call profiling including:
+- Wall time, rows scanned, groups and peak memory per call
+- Hooks and nesting
+- JSON, Prometheus and CLI output
+"""
+
+import pytest
+import os
+import sys
+import json
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import profiling
+from profiling import Profiler, profiled
+from sales_analysis import SalesDataAnalyzer, main, print_analysis_results
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'sales.csv')
+
+
+@pytest.fixture(params=['records', 'columnar'])
+def analyzer(request):
+    """Create an analyzer over the sample data for each storage backend."""
+    return SalesDataAnalyzer(DATA_FILE, backend=request.param)
+
+
+class TestProfiler:
+    """Test recording calls."""
+    
+    def test_inactive_by_default(self, analyzer):
+        """Test that nothing is recorded without an active profiler."""
+        profiler = Profiler()
+        analyzer.get_revenue_by_region()
+        
+        assert profiling.active() is None
+        assert profiler.calls == []
+    
+    def test_records_rows_and_groups(self, analyzer):
+        """Test rows scanned and groups produced for analyzer methods."""
+        with Profiler() as profiler:
+            analyzer.get_revenue_by_region()
+            analyzer.filter_by_minimum_amount(500.0)
+        
+        calls = {call.name: call for call in profiler.calls}
+        by_region = calls['SalesDataAnalyzer.get_revenue_by_region']
+        assert by_region.groups == 4
+        assert by_region.rows_scanned == 50
+        assert by_region.seconds > 0
+        assert calls['SalesDataAnalyzer.filter_by_minimum_amount'].rows_scanned == 50
+        assert profiling.active() is None
+    
+    def test_nested_calls_and_hooks(self, analyzer):
+        """Test that hooks see inner calls first with their nesting depth."""
+        seen = []
+        with Profiler() as profiler:
+            profiler.add_hook(lambda call: seen.append((call.name, call.depth)))
+            analyzer.get_category_statistics()
+        
+        assert seen[-1] == ('SalesDataAnalyzer.get_category_statistics', 0)
+        assert all(depth > 0 for _, depth in seen[:-1])
+        assert len(seen) > 1
+    
+    def test_peak_memory(self, analyzer):
+        """Test that memory mode records a peak allocation per call."""
+        with Profiler(memory=True) as profiler:
+            analyzer._load_data()
+            analyzer.filter_by_category('Electronics')
+        
+        peaks = {call.name: call.peak_bytes for call in profiler.calls}
+        assert peaks['SalesDataAnalyzer._load_data'] > 0
+        assert peaks['SalesDataAnalyzer.filter_by_category'] > 0
+    
+    def test_profiled_function(self):
+        """Test plain functions and exceptions."""
+        @profiled
+        def fail():
+            raise ValueError("boom")
+        
+        with Profiler() as profiler:
+            with pytest.raises(ValueError):
+                fail()
+            print_analysis_results(SalesDataAnalyzer(DATA_FILE))
+        
+        names = [call.name for call in profiler.calls]
+        assert 'fail' not in names
+        assert 'print_analysis_results' in names
+
+
+class TestProfileOutput:
+    """Test machine-readable summaries."""
+    
+    def test_summary_and_json(self, analyzer):
+        """Test per-method totals and the JSON document."""
+        with Profiler() as profiler:
+            analyzer.get_top_products(3)
+            analyzer.get_top_products(3)
+        
+        summary = profiler.summary()['SalesDataAnalyzer.get_top_products']
+        assert summary['calls'] == 2
+        assert summary['seconds'] >= summary['max_seconds']
+        
+        document = json.loads(profiler.to_json())
+        assert document['summary']['SalesDataAnalyzer.get_top_products']['calls'] == 2
+        assert len(document['calls']) == len(profiler.calls)
+    
+    def test_prometheus(self, analyzer):
+        """Test the Prometheus text exposition format."""
+        with Profiler() as profiler:
+            analyzer.get_total_revenue()
+        
+        lines = profiler.to_prometheus().splitlines()
+        assert '# TYPE sales_analysis_seconds_total counter' in lines
+        assert 'sales_analysis_calls_total{method="SalesDataAnalyzer.get_total_revenue"} 1' in lines
+    
+    def test_cli_profile(self, tmp_path, capsys):
+        """Test that --profile-output writes JSON and keeps the report unchanged."""
+        output = tmp_path / 'profile.json'
+        assert main([DATA_FILE]) == 0
+        plain = capsys.readouterr().out
+        assert main([DATA_FILE, '--profile-output', str(output)]) == 0
+        captured = capsys.readouterr()
+        
+        assert captured.out == plain
+        assert 'print_analysis_results' in captured.err
+        summary = json.loads(output.read_text())['summary']
+        assert summary['SalesDataAnalyzer._load_data']['rows_scanned'] == 50
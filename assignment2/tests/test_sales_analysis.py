@@ -13,11 +13,32 @@ import sys
 from datetime import datetime
 import tempfile
 import csv
+import bz2
+import gzip
+import json
+import lzma
+import random
+import shutil
+from decimal import Decimal
 
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from sales_analysis import SalesRecord, SalesDataAnalyzer
+from sales_analysis import (
+    BACKENDS, SalesRecord, SalesDataAnalyzer, ColumnStore, RecordView, StreamingSalesAnalyzer,
+    PartitionedSalesAnalyzer, REPORT_SECTIONS, ReportPlan, SalesCsvReader, SalesJsonLinesReader,
+    SalesMetrics, SequenceSlice, benchmark_report, build_report, default_report_plan,
+    discover_partitions, input_format, main, partition_keys, print_analysis_results, render_csv,
+    render_json, render_text, run_batch, split_line_ranges, to_epoch_day, month_key, month_label,
+    sketch_csv, top_n_from_csv, write_report, write_sales_columns
+)
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'sales.csv')
+
+
+def record_values(record):
+    """Return every public field of a record as a tuple for comparisons."""
+    return tuple(getattr(record, name) for name in SalesRecord.__slots__ if not name.startswith('_'))
 
 
 @pytest.fixture
@@ -47,10 +68,10 @@ def sample_csv_file():
     os.unlink(temp_file.name)
 
 
-@pytest.fixture
-def analyzer(sample_csv_file):
-    """Create a SalesDataAnalyzer instance with sample data."""
-    return SalesDataAnalyzer(sample_csv_file)
+@pytest.fixture(params=['records', 'columnar'])
+def analyzer(request, sample_csv_file):
+    """Create a SalesDataAnalyzer instance with sample data for each backend."""
+    return SalesDataAnalyzer(sample_csv_file, backend=request.param)
 
 
 class TestSalesRecord:
@@ -99,6 +120,27 @@ class TestSalesRecord:
         record = SalesRecord(row)
         assert record.total_amount == 2400.00
     
+    def test_sales_record_is_compact(self):
+        """Test that records use slots, interned strings and a precomputed amount."""
+        row = {
+            'order_id': '1001',
+            'date': '2024-01-15',
+            'product': 'Laptop',
+            'category': ''.join(['Electro', 'nics']),
+            'price': '1200.00',
+            'quantity': '2',
+            'region': 'North',
+            'customer_id': 'C001',
+            'salesperson': 'SP001'
+        }
+        
+        record = SalesRecord(row)
+        
+        assert not hasattr(record, '__dict__')
+        assert record.category is sys.intern('Electronics')
+        assert 'total_amount' in SalesRecord.__slots__
+        assert record.total_amount == 2400.00
+    
     def test_sales_record_repr(self):
         """Test string representation of SalesRecord."""
         row = {
@@ -121,6 +163,46 @@ class TestSalesRecord:
         assert '2400.00' in repr_str
 
 
+class TestDateDecoding:
+    """Test the cached fixed-format date decoder."""
+    
+    def test_to_epoch_day(self):
+        """Test decoding ISO dates to days since the epoch."""
+        assert to_epoch_day('1970-01-01') == 0
+        assert to_epoch_day('2024-01-15') == (datetime(2024, 1, 15) - datetime(1970, 1, 1)).days
+        assert to_epoch_day('2024-1-5') == to_epoch_day('2024-01-05')
+    
+    def test_invalid_dates_raise(self):
+        """Test that malformed dates still raise ValueError."""
+        with pytest.raises(ValueError):
+            to_epoch_day('2024-02-30')
+        with pytest.raises(ValueError):
+            to_epoch_day('15/01/2024')
+    
+    def test_month_keys(self):
+        """Test integer month keys and their labels."""
+        key = month_key(to_epoch_day('2024-12-31'))
+        
+        assert key == 2024 * 12 + 11
+        assert month_label(key) == '2024-12'
+        assert month_label(key + 1) == '2025-01'
+    
+    def test_record_date_is_lazy(self):
+        """Test that SalesRecord keeps an integer day and builds the datetime on demand."""
+        record = SalesRecord({
+            'order_id': '1001', 'date': '2024-03-15', 'product': 'Laptop',
+            'category': 'Electronics', 'price': '1200.00', 'quantity': '2',
+            'region': 'North', 'customer_id': 'C001', 'salesperson': 'SP001'
+        })
+        
+        assert record._date is None
+        assert record.month_key == month_key(record.day)
+        assert record.date == datetime(2024, 3, 15)
+        
+        record.date = datetime(2024, 4, 1)
+        assert month_label(record.month_key) == '2024-04'
+
+
 class TestSalesDataAnalyzer:
     """Test SalesDataAnalyzer class functionality."""
     
@@ -335,6 +417,1298 @@ class TestSalesDataAnalyzer:
         assert pytest.approx(electronics_revenue, 0.01) == category_revenue['Electronics']
 
 
+class TestColumnarBackend:
+    """Test the array-backed columnar storage engine."""
+    
+    def test_columns_are_dictionary_encoded(self, sample_csv_file):
+        """Test that string fields are stored as integer codes."""
+        analyzer = SalesDataAnalyzer(sample_csv_file, backend='columnar')
+        columns = analyzer.columns
+        
+        assert isinstance(columns, ColumnStore)
+        assert len(columns) == 8
+        assert columns.dictionaries['category'] == ['Electronics', 'Furniture', 'Stationery']
+        assert list(columns.codes['category']) == [0, 0, 1, 2, 0, 1, 2, 0]
+        assert columns.day[0] == (datetime(2024, 1, 15) - datetime(1970, 1, 1)).days
+    
+    def test_records_are_built_lazily(self, sample_csv_file):
+        """Test that sales_data is a view that only builds records on access."""
+        analyzer = SalesDataAnalyzer(sample_csv_file, backend='columnar')
+        
+        assert isinstance(analyzer.sales_data, RecordView)
+        record = analyzer.sales_data[0]
+        assert isinstance(record, SalesRecord)
+        assert record.order_id == '1001'
+        assert record.date == datetime(2024, 1, 15)
+        assert len(analyzer.sales_data[2:5]) == 3
+    
+    def test_backends_return_identical_results(self):
+        """Test that every query matches the record-based backend exactly."""
+        records = SalesDataAnalyzer(DATA_FILE)
+        columnar = SalesDataAnalyzer(DATA_FILE, backend='columnar')
+        
+        assert columnar.get_total_revenue() == records.get_total_revenue()
+        assert columnar.get_revenue_by_category() == records.get_revenue_by_category()
+        assert columnar.get_revenue_by_region() == records.get_revenue_by_region()
+        assert columnar.get_top_products(5) == records.get_top_products(5)
+        assert columnar.get_sales_by_month() == records.get_sales_by_month()
+        assert columnar.get_sales_by_salesperson() == records.get_sales_by_salesperson()
+        assert columnar.get_category_statistics() == records.get_category_statistics()
+        assert columnar.get_high_value_customers() == records.get_high_value_customers()
+        assert (list(map(repr, columnar.filter_by_minimum_amount(500.0)))
+                == list(map(repr, records.filter_by_minimum_amount(500.0))))
+    
+    def test_unknown_backend(self, sample_csv_file):
+        """Test that an unknown backend name is rejected."""
+        with pytest.raises(ValueError):
+            SalesDataAnalyzer(sample_csv_file, backend='parquet')
+
+
+class TestStreamingAnalyzer:
+    """Test the single-pass streaming analyzer."""
+    
+    def test_streaming_matches_in_memory(self):
+        """Test that streaming aggregates match the fully loaded analyzer."""
+        loaded = SalesDataAnalyzer(DATA_FILE)
+        streaming = StreamingSalesAnalyzer(DATA_FILE, chunk_size=7)
+        
+        assert streaming.get_total_revenue() == loaded.get_total_revenue()
+        assert streaming.get_average_order_value() == loaded.get_average_order_value()
+        assert streaming.get_revenue_by_category() == loaded.get_revenue_by_category()
+        assert streaming.get_revenue_by_region() == loaded.get_revenue_by_region()
+        assert streaming.get_top_products(5) == loaded.get_top_products(5)
+        assert streaming.get_sales_by_month() == pytest.approx(loaded.get_sales_by_month())
+        assert streaming.get_sales_by_salesperson() == loaded.get_sales_by_salesperson()
+        assert streaming.get_category_statistics() == loaded.get_category_statistics()
+        assert streaming.get_high_value_customers() == loaded.get_high_value_customers()
+    
+    def test_streaming_keeps_no_rows(self, sample_csv_file):
+        """Test that only per-key aggregates are kept in memory."""
+        streaming = StreamingSalesAnalyzer(sample_csv_file, chunk_size=3)
+        
+        assert not hasattr(streaming, 'sales_data')
+        assert streaming.aggregates.order_count == 8
+        assert len(streaming.aggregates.groups['category']) == 3
+    
+    def test_streaming_filters_rescan_file(self, sample_csv_file):
+        """Test that streaming filters return the matching records."""
+        streaming = StreamingSalesAnalyzer(sample_csv_file, chunk_size=3)
+        
+        assert len(streaming.filter_by_category('Electronics')) == 4
+        assert len(streaming.filter_by_date_range('2024-01-01', '2024-01-31')) == 4
+        assert all(r.total_amount >= 500.0 for r in streaming.filter_by_minimum_amount(500.0))
+    
+    def test_streaming_report_output(self, capsys):
+        """Test that the printed report is identical in streaming mode."""
+        print_analysis_results(SalesDataAnalyzer(DATA_FILE))
+        expected = capsys.readouterr().out
+        print_analysis_results(StreamingSalesAnalyzer(DATA_FILE))
+        assert capsys.readouterr().out == expected
+    
+    def test_streaming_file_not_found(self):
+        """Test that a missing file raises FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            StreamingSalesAnalyzer('nonexistent_file.csv')
+
+
+class TestPartitionedAnalyzer:
+    """Test analyzing a directory or glob of partition files."""
+    
+    @pytest.fixture
+    def hive_dir(self, tmp_path):
+        """Write one file per day and region under date=.../region=... directories."""
+        with open(DATA_FILE) as file:
+            rows = list(csv.DictReader(file))
+        for row in rows:
+            directory = tmp_path / 'hive' / f"date={row['date']}" / f"region={row['region']}"
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / 'part.csv'
+            new_file = not path.exists()
+            with open(path, 'a', newline='') as file:
+                writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+                if new_file:
+                    writer.writeheader()
+                writer.writerow(row)
+        return str(tmp_path / 'hive')
+    
+    @staticmethod
+    def order_ids(records):
+        return sorted(r.order_id for r in records)
+    
+    def test_matches_single_file(self, hive_dir):
+        """Test that every method over the partitions matches the combined file."""
+        loaded = SalesDataAnalyzer(DATA_FILE)
+        partitioned = PartitionedSalesAnalyzer(hive_dir)
+        
+        assert len(partitioned.partitions) > 40
+        assert partitioned.get_total_revenue() == pytest.approx(loaded.get_total_revenue())
+        assert partitioned.get_average_order_value() == pytest.approx(loaded.get_average_order_value())
+        assert partitioned.get_revenue_by_category() == pytest.approx(loaded.get_revenue_by_category())
+        assert partitioned.get_revenue_by_region() == pytest.approx(loaded.get_revenue_by_region())
+        assert partitioned.get_sales_by_month() == pytest.approx(loaded.get_sales_by_month())
+        assert partitioned.get_top_products(3) == loaded.get_top_products(3)
+        assert partitioned.get_top_customers(5, 'orders') == loaded.get_top_customers(5, 'orders')
+        for category, stats in loaded.get_category_statistics().items():
+            assert partitioned.get_category_statistics()[category] == pytest.approx(stats)
+        assert partitioned.get_revenue_between('2024-01-10', '2024-02-10') == pytest.approx(
+            loaded.get_revenue_between('2024-01-10', '2024-02-10'))
+        for method, args in [('filter_by_category', ('Furniture',)),
+                             ('filter_by_date_range', ('2024-01-10', '2024-02-10')),
+                             ('filter_by_minimum_amount', (500.0,))]:
+            assert self.order_ids(getattr(partitioned, method)(*args)) == \
+                self.order_ids(getattr(loaded, method)(*args))
+    
+    def test_prunes_by_path(self, hive_dir):
+        """Test that partitions outside the dates and regions are not selected."""
+        partitioned = PartitionedSalesAnalyzer(hive_dir, start_date='2024-02-01',
+                                               end_date='2024-02-29', regions=['North', 'East'])
+        expected = SalesDataAnalyzer(DATA_FILE).query().between('2024-02-01', '2024-02-29')
+        
+        assert all(partition_keys(path)['region'] in ('North', 'East')
+                   for path, _ in partitioned.selected)
+        assert len(partitioned.selected) < len(partitioned.partitions)
+        assert partitioned.get_revenue_by_region() == pytest.approx({
+            region: revenue for region, revenue in expected.group_by('region').sum_revenue().items()
+            if region in ('North', 'East')})
+    
+    def test_checks_rows_without_path_keys(self):
+        """Test that a file without partition keys is filtered row by row."""
+        partitioned = PartitionedSalesAnalyzer(DATA_FILE, start_date='2024-01-01',
+                                               end_date='2024-01-31', regions=['South'])
+        loaded = SalesDataAnalyzer(DATA_FILE)
+        expected = loaded.query().between('2024-01-01', '2024-01-31').where(region='South')
+        
+        assert partitioned.get_total_revenue() == pytest.approx(expected.sum_revenue())
+        assert partitioned._order_count() == expected.count()
+        assert self.order_ids(partitioned.filter_by_category('Electronics')) == self.order_ids(
+            expected.where(category='Electronics').records())
+    
+    def test_inferred_and_invalid_dates(self, tmp_path):
+        """Test that directory dates are ignored, file-name dates keep row checks and bad dates are unknown."""
+        with open(DATA_FILE) as file:
+            header = file.readline()
+        rows = ("1,2024-01-15,Pen,Stationery,10.00,1,North,C1,Alice\n"
+                "2,2024-06-10,Pen,Stationery,5.00,1,North,C1,Alice\n")
+        paths = [tmp_path / 'exports' / '2024-06-01' / 'north.csv',
+                 tmp_path / 'exports' / 'sales_2024-06-10.csv',
+                 tmp_path / 'exports' / 'date=2024-01' / 'part.csv',
+                 tmp_path / 'exports' / '2024-13-01' / 'part.csv']
+        for path in paths:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(header + rows)
+        
+        for path in map(str, paths):
+            june = PartitionedSalesAnalyzer(path, start_date='2024-06-01', end_date='2024-06-30')
+            january = PartitionedSalesAnalyzer(path, start_date='2024-01-01', end_date='2024-01-31')
+            assert june.get_total_revenue() == 5.0
+            assert january.get_total_revenue() == (0.0 if 'sales_2024-06-10' in path else 10.0)
+        assert partition_keys(str(paths[0])) == {}
+    
+    def test_process_pool(self, hive_dir):
+        """Test that aggregating in a process pool gives the same results."""
+        serial = PartitionedSalesAnalyzer(hive_dir)
+        pooled = PartitionedSalesAnalyzer(hive_dir, workers=2)
+        
+        assert pooled.get_sales_by_salesperson() == serial.get_sales_by_salesperson()
+        assert pooled.get_category_statistics() == serial.get_category_statistics()
+        assert self.order_ids(pooled.filter_by_minimum_amount(500.0)) == self.order_ids(
+            serial.filter_by_minimum_amount(500.0))
+    
+    def test_discovery_and_keys(self, hive_dir):
+        """Test directory and glob discovery and path key parsing."""
+        by_glob = discover_partitions(os.path.join(hive_dir, 'date=2024-01-*', '*', '*.csv'))
+        
+        assert set(by_glob) < set(discover_partitions(hive_dir))
+        assert all('date=2024-01-' in path for path in by_glob)
+        assert partition_keys('/data/date=2024-01-15/region=North/part.csv') == {
+            'date': '2024-01-15', 'region': 'North'}
+        assert partition_keys('/data/north/sales_2024-01-15.csv') == {'date': '2024-01-15'}
+        with pytest.raises(FileNotFoundError):
+            PartitionedSalesAnalyzer(os.path.join(hive_dir, 'missing', '*.csv'))
+    
+    def test_cli_accepts_directory(self, hive_dir, capsys):
+        """Test that the CLI expands a directory into its partitions."""
+        assert main([DATA_FILE]) == 0
+        total = next(line for line in capsys.readouterr().out.splitlines() if 'Total Revenue' in line)
+        assert main([hive_dir]) == 0
+        assert total in capsys.readouterr().out
+
+
+class TestReportPlan:
+    """Test the fused one-pass report planner."""
+    
+    def test_fused_report_matches_methods(self, analyzer):
+        """Test that one scan reproduces every per-method result."""
+        report = ReportPlan().execute(analyzer)
+        
+        assert report.passes == 1
+        assert report.get_total_revenue() == analyzer.get_total_revenue()
+        assert report.get_revenue_by_category() == analyzer.get_revenue_by_category()
+        assert report.get_top_products(3) == analyzer.get_top_products(3)
+        assert report.get_sales_by_month() == analyzer.get_sales_by_month()
+        assert report.get_category_statistics() == analyzer.get_category_statistics()
+        assert report.get_high_value_customers() == analyzer.get_high_value_customers()
+    
+    def test_filter_counts(self, analyzer):
+        """Test that filter counts are computed in the same scan."""
+        plan = (ReportPlan()
+                .count_category('Electronics', label='electronics')
+                .count_date_range('2024-01-01', '2024-01-31', label='january')
+                .count_minimum_amount(500.0))
+        scans_before = analyzer.scan_count
+        report = plan.execute(analyzer)
+        
+        assert analyzer.scan_count - scans_before == 1
+        assert report.filter_counts['electronics'] == len(analyzer.filter_by_category('Electronics'))
+        assert report.filter_counts['january'] == 4
+        assert report.filter_counts['amount>=500.0'] == len(analyzer.filter_by_minimum_amount(500.0))
+    
+    def test_execute_csv(self, sample_csv_file, analyzer):
+        """Test the streaming variant of the fused scan."""
+        report = ReportPlan().count_category('Furniture').execute_csv(sample_csv_file, chunk_size=3)
+        
+        assert report.filter_counts['category=Furniture'] == 2
+        assert report.get_sales_by_salesperson() == analyzer.get_sales_by_salesperson()
+    
+    def test_benchmark_report(self, analyzer):
+        """Test that the benchmark reports fewer passes for the fused path."""
+        result = benchmark_report(analyzer)
+        
+        assert result['fused']['passes'] == 1
+        assert result['per_method']['passes'] > result['fused']['passes']
+        assert result['fused']['seconds'] >= 0
+
+
+class TestPartitionedReports:
+    """Test per-file report partitions and the persistent summary store."""
+    
+    @pytest.fixture
+    def partitions(self, tmp_path):
+        """Split the sample data into one file per region."""
+        with open(DATA_FILE) as file:
+            rows = list(csv.DictReader(file))
+        paths = []
+        for region in ('North', 'South', 'East', 'West'):
+            path = tmp_path / f"{region.lower()}.csv"
+            with open(path, 'w', newline='') as file:
+                writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(r for r in rows if r['region'] == region)
+            paths.append(str(path))
+        return paths
+    
+    @staticmethod
+    def render(report, capsys):
+        print_analysis_results(report)
+        print(report.filter_counts)
+        return capsys.readouterr().out
+    
+    def test_reuses_unchanged_partitions(self, partitions, tmp_path, capsys):
+        """Test that a second run reads every partition from the store."""
+        store = str(tmp_path / 'store')
+        first = default_report_plan().execute_partitions(partitions, store_dir=store)
+        second = default_report_plan().execute_partitions(partitions, store_dir=store)
+        
+        assert first.recomputed == partitions
+        assert second.recomputed == []
+        assert second.passes == 0
+        assert self.render(second, capsys) == self.render(first, capsys)
+    
+    def test_rescans_only_changed_partition(self, partitions, tmp_path, capsys):
+        """Test that a changed file is rescanned and the report matches a full run."""
+        store = str(tmp_path / 'store')
+        default_report_plan().execute_partitions(partitions, store_dir=store)
+        with open(partitions[1], 'a') as file:
+            file.write('2001,2024-03-20,Desk,Furniture,600.00,3,South,C099,SP004\n')
+        
+        cached = default_report_plan().execute_partitions(partitions, store_dir=store)
+        full = default_report_plan().execute_partitions(partitions)
+        
+        assert cached.recomputed == [partitions[1]]
+        assert self.render(cached, capsys) == self.render(full, capsys)
+        assert cached.get_sales_by_salesperson()['SP004']['total_orders'] == 1
+    
+    def test_single_file_matches_direct_report(self, tmp_path, capsys):
+        """Test that a stored single-file report equals the direct one exactly."""
+        store = str(tmp_path / 'store')
+        default_report_plan().execute_partitions([DATA_FILE], store_dir=store)
+        stored = default_report_plan().execute_partitions([DATA_FILE], store_dir=store)
+        direct = default_report_plan().execute(SalesDataAnalyzer(DATA_FILE))
+        
+        assert stored.recomputed == []
+        assert stored.get_category_statistics() == direct.get_category_statistics()
+        assert self.render(stored, capsys) == self.render(direct, capsys)
+    
+    def test_plan_change_invalidates_store(self, partitions, tmp_path):
+        """Test that summaries written for other filters are not reused."""
+        store = str(tmp_path / 'store')
+        default_report_plan().execute_partitions(partitions, store_dir=store)
+        report = ReportPlan().count_category('Furniture').execute_partitions(partitions, store_dir=store)
+        
+        assert report.recomputed == partitions
+        assert report.filter_counts['category=Furniture'] == 12
+
+
+class TestGroupIndexCache:
+    """Test the memoized per-dimension group indexes."""
+    
+    def test_repeated_queries_hit_cache(self, analyzer):
+        """Test that repeated queries reuse the index instead of rescanning."""
+        first = analyzer.get_revenue_by_category()
+        analyzer.filter_by_category('Furniture')
+        scans = analyzer.scan_count
+        misses = analyzer.cache_misses
+        
+        assert analyzer.get_revenue_by_category() == first
+        analyzer.get_category_statistics()
+        analyzer.filter_by_category('Electronics')
+        
+        assert analyzer.scan_count == scans
+        assert analyzer.cache_misses == misses
+        assert analyzer.cache_hits >= 3
+    
+    @pytest.mark.parametrize('backend', BACKENDS)
+    def test_assigning_sales_data_invalidates(self, sample_csv_file, backend):
+        """Test that replacing sales_data bumps the generation counter and drops the old rows."""
+        analyzer = SalesDataAnalyzer(sample_csv_file, backend=backend)
+        assert len(analyzer.filter_by_category('Electronics')) == 4
+        assert analyzer.get_total_revenue() == pytest.approx(5827.5)
+        generation = analyzer.cache_stats()['generation']
+        
+        analyzer.sales_data = analyzer.sales_data[:2]
+        
+        assert analyzer.cache_stats()['generation'] == generation + 1
+        assert len(analyzer.sales_data) == 2
+        assert len(analyzer.filter_by_category('Electronics')) == 2
+        assert pytest.approx(analyzer.get_total_revenue(), 0.01) == 2527.50
+        assert analyzer.get_average_order_value() == pytest.approx(2527.50 / 2)
+        assert analyzer.get_revenue_by_region() == pytest.approx({'North': 2400.0, 'South': 127.5})
+    
+    def test_invalidate_after_in_place_change(self, sample_csv_file):
+        """Test that invalidate() picks up in-place mutations."""
+        analyzer = SalesDataAnalyzer(sample_csv_file)
+        analyzer.get_revenue_by_region()
+        
+        analyzer.sales_data.pop()
+        analyzer.invalidate()
+        
+        assert 'West' in analyzer.get_revenue_by_region()
+        assert pytest.approx(analyzer.get_revenue_by_region()['West'], 0.01) == 100.00
+    
+    def test_cache_stats_export(self, analyzer):
+        """Test that cache counters are exported as a plain dict."""
+        analyzer.get_revenue_by_region()
+        analyzer.get_revenue_by_region()
+        stats = analyzer.cache_stats()
+        
+        assert stats['hits'] >= 1
+        assert stats['misses'] >= 1
+        assert "('stats', 'region')" in stats['entries']
+
+
+class TestDateIndex:
+    """Test the sorted date index behind date range queries."""
+    
+    def test_date_range_returns_view(self, analyzer):
+        """Test that range filters return a view rather than a copied list."""
+        january = analyzer.filter_by_date_range('2024-01-01', '2024-01-31')
+        
+        assert not isinstance(january, list)
+        assert len(january) == 4
+        assert len(january[1:3]) == 2
+        assert [r.order_id for r in january] == ['1001', '1002', '1003', '1004']
+    
+    def test_date_range_is_bisected(self, analyzer):
+        """Test that repeated range queries do not rescan the data."""
+        analyzer.filter_by_date_range('2024-01-01', '2024-01-31')
+        scans = analyzer.scan_count
+        
+        analyzer.filter_by_date_range('2024-02-01', '2024-02-28')
+        analyzer.get_revenue_between('2024-01-16', '2024-02-16')
+        
+        assert analyzer.scan_count == scans
+    
+    def test_revenue_between(self, analyzer):
+        """Test range revenue computed from prefix sums."""
+        # 2024-01-16 .. 2024-02-16: 127.50 + 350 + 100 + 900 + 600
+        assert pytest.approx(analyzer.get_revenue_between('2024-01-16', '2024-02-16'), 0.01) == 2077.50
+        assert analyzer.get_revenue_between('2025-01-01', '2025-12-31') == 0.0
+        assert (pytest.approx(analyzer.get_revenue_between('2024-01-01', '2024-12-31'), 0.01)
+                == analyzer.get_total_revenue())
+    
+    def test_monthly_sales_from_prefix_sums(self, analyzer):
+        """Test that monthly revenue matches the group-by result."""
+        monthly = analyzer.get_sales_by_month()
+        
+        assert list(monthly) == ['2024-01', '2024-02', '2024-03']
+        assert pytest.approx(monthly['2024-01'], 0.01) == 2977.50
+        assert pytest.approx(monthly['2024-02'], 0.01) == 1650.00
+        assert pytest.approx(monthly['2024-03'], 0.01) == 1200.00
+    
+    def test_sequence_slice(self):
+        """Test slicing and indexing of the zero-copy window."""
+        window = SequenceSlice(list(range(10)), 2, 7)
+        
+        assert list(window) == [2, 3, 4, 5, 6]
+        assert window[-1] == 6
+        assert list(window[1:3]) == [3, 4]
+        assert window[::2] == [2, 4, 6]
+
+
+class TestParallelLoading:
+    """Test multi-process CSV ingestion."""
+    
+    def test_ranges_align_to_lines(self, sample_csv_file):
+        """Test that byte ranges start right after a newline and cover every row."""
+        fieldnames, ranges = split_line_ranges(sample_csv_file, 3)
+        with open(sample_csv_file, 'rb') as file:
+            content = file.read()
+        
+        assert fieldnames[0] == 'order_id'
+        assert ranges[0][0] == content.index(b'\n') + 1
+        assert ranges[-1][1] == len(content)
+        assert all(content[start - 1:start] == b'\n' for start, _ in ranges)
+        assert sum(content[start:end].count(b'\n') for start, end in ranges) == 8
+    
+    @pytest.mark.parametrize('backend', ['records', 'columnar'])
+    def test_parallel_matches_serial(self, backend):
+        """Test that the parallel loader produces identical data."""
+        serial = SalesDataAnalyzer(DATA_FILE, backend=backend)
+        parallel = SalesDataAnalyzer(DATA_FILE, backend=backend, workers=3)
+        
+        assert list(map(record_values, parallel.sales_data)) == list(map(record_values, serial.sales_data))
+        assert parallel.get_category_statistics() == serial.get_category_statistics()
+        assert parallel.get_top_products(5) == serial.get_top_products(5)
+    
+    def test_parallel_matches_serial_on_odd_rows(self, tmp_path):
+        """Test that separator-like characters in fields and malformed rows load as in one process."""
+        path = tmp_path / 'odd.csv'
+        with open(DATA_FILE) as file:
+            lines = file.read().splitlines()
+        lines[5] = lines[5].replace('Electronics', 'Elec\ftro\x1cnics\u2028\x85')
+        lines[9:9] = ['2001,2024-01-20,Desk,Furniture,oops,1,North,C001,SP001']
+        path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        
+        with pytest.warns(UserWarning, match='Skipped 1 malformed rows'):
+            serial = SalesDataAnalyzer(str(path))
+        with pytest.warns(UserWarning, match='Skipped 1 malformed rows'):
+            parallel = SalesDataAnalyzer(str(path), workers=3)
+        
+        assert len(parallel.sales_data) == 50
+        assert list(map(record_values, parallel.sales_data)) == list(map(record_values, serial.sales_data))
+        assert parallel.rejected_rows == serial.rejected_rows == 1
+    
+    def test_parallel_empty_file(self):
+        """Test parallel loading of a file with only a header."""
+        temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv')
+        temp_file.write('order_id,date,product,category,price,quantity,region,customer_id,salesperson\n')
+        temp_file.close()
+        
+        try:
+            analyzer = SalesDataAnalyzer(temp_file.name, workers=2)
+            assert len(analyzer.sales_data) == 0
+        finally:
+            os.unlink(temp_file.name)
+
+
+class TestCsvReader:
+    """Test the validating tuple reader and bad-row quarantine."""
+    
+    @pytest.fixture
+    def messy_csv_file(self, tmp_path):
+        """Write the sample rows with malformed ones and a blank line mixed in."""
+        path = tmp_path / 'messy.csv'
+        with open(DATA_FILE) as file:
+            lines = file.read().splitlines()
+        lines[3:3] = [
+            '2001,2024-01-20,Desk,Furniture,abc,1,North,C001,SP001',
+            '2002,2024-02-30,Desk,Furniture,10.00,1,North,C001,SP001',
+            '',
+            '2003,2024-01-20,Desk,Furniture,10.00,1.5,North,C001,SP001',
+            '2004,2024-01-20,Desk,Furniture,10.00',
+            '2005,2024-01-20,Desk,Furniture,nan,1,North,C001,SP001',
+        ]
+        path.write_text('\n'.join(lines) + '\n')
+        return str(path)
+    
+    def test_matches_dict_reader(self):
+        """Test that parsed tuples build the same records as csv.DictReader rows."""
+        with open(DATA_FILE) as file:
+            expected = [record_values(SalesRecord(row)) for row in csv.DictReader(file)]
+        for chunk_size in (1, 7, 256):
+            reader = SalesCsvReader(DATA_FILE, chunk_size=chunk_size)
+            records = [SalesRecord.from_values(*values) for values in reader]
+            
+            assert list(map(record_values, records)) == expected
+            assert reader.rows == 50
+            assert reader.rejected == 0
+    
+    @pytest.mark.parametrize('chunk_size', [4, 256])
+    def test_quarantines_bad_rows(self, messy_csv_file, tmp_path, chunk_size):
+        """Test that bad rows are skipped and written with their line numbers."""
+        quarantine = str(tmp_path / 'bad.csv')
+        reader = SalesCsvReader(messy_csv_file, quarantine, chunk_size=chunk_size)
+        order_ids = [values[0] for values in reader]
+        with open(quarantine) as file:
+            bad = list(csv.DictReader(file))
+        
+        assert len(order_ids) == 50
+        assert not any(order_id.startswith('200') for order_id in order_ids)
+        assert reader.rejected == 5
+        assert [row['line'] for row in bad] == ['4', '5', '7', '8', '9']
+        assert [row['order_id'] for row in bad] == ['2001', '2002', '2003', '2004', '2005']
+        assert 'expected 9 fields' in bad[3]['error']
+    
+    def test_line_numbers_after_quoted_newlines(self, tmp_path):
+        """Test that rows isolated from a failing chunk keep their lines past multi-line fields."""
+        rows = [[str(1000 + i), '2024-01-20', 'Desk', 'Furniture', '10.00', '1', 'North', 'C001', 'SP001']
+                for i in range(40)]
+        rows[5][2] = 'Desk\nwith drawers'
+        rows[30][4] = 'abc'
+        path = tmp_path / 'quoted.csv'
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['order_id', 'date', 'product', 'category', 'price', 'quantity',
+                             'region', 'customer_id', 'salesperson'])
+            writer.writerows(rows)
+        
+        reader = SalesCsvReader(str(path), keep_rejected=True)
+        
+        assert sum(1 for _ in reader) == 39
+        assert [row[0] for row in reader.rejected_rows] == [33]
+        assert reader.rejected_rows[0][2] == '1030'
+    
+    @pytest.mark.parametrize('backend', ['records', 'columnar'])
+    def test_analyzer_keeps_going(self, messy_csv_file, tmp_path, backend):
+        """Test that the analyzer loads the good rows and warns about the rest."""
+        quarantine = str(tmp_path / 'bad.csv')
+        with pytest.warns(UserWarning, match='Skipped 5 malformed rows'):
+            analyzer = SalesDataAnalyzer(messy_csv_file, backend=backend, quarantine=quarantine)
+        clean = SalesDataAnalyzer(DATA_FILE, backend=backend)
+        
+        assert analyzer.rejected_rows == 5
+        assert os.path.exists(quarantine)
+        assert list(map(record_values, analyzer.sales_data)) == list(map(record_values, clean.sales_data))
+        assert analyzer.get_category_statistics() == clean.get_category_statistics()
+    
+    def test_single_pass_paths_keep_going(self, messy_csv_file, tmp_path):
+        """Test that streaming, report, sketch and top-N passes skip and quarantine bad rows."""
+        serial_quarantine = str(tmp_path / 'serial.csv')
+        with pytest.warns(UserWarning, match='Skipped 5 malformed rows'):
+            serial = SalesDataAnalyzer(messy_csv_file, quarantine=serial_quarantine)
+        quarantine = str(tmp_path / 'bad.csv')
+        passes = [lambda: StreamingSalesAnalyzer(messy_csv_file, chunk_size=3, quarantine=quarantine),
+                  lambda: default_report_plan().execute_csv(messy_csv_file, quarantine_path=quarantine),
+                  lambda: sketch_csv(messy_csv_file, quarantine_path=quarantine),
+                  lambda: top_n_from_csv(messy_csv_file, 'region', quarantine_path=quarantine)]
+        for run in passes:
+            with pytest.warns(UserWarning, match=f'Skipped 5 malformed rows .*; see {quarantine}'):
+                result = run()
+            with open(quarantine) as file, open(serial_quarantine) as expected:
+                assert file.read() == expected.read()
+            os.remove(quarantine)
+            if isinstance(result, SalesMetrics):
+                assert result.get_category_statistics() == serial.get_category_statistics()
+        
+        with pytest.warns(UserWarning, match='Skipped 5 malformed rows'):
+            messy = StreamingSalesAnalyzer(messy_csv_file)
+        assert len(messy.filter_by_category('Furniture')) == len(
+            StreamingSalesAnalyzer(DATA_FILE).filter_by_category('Furniture'))
+    
+    def test_partitions_keep_going(self, messy_csv_file, tmp_path):
+        """Test that partitions skip bad rows and quarantine them as file:line."""
+        quarantine = str(tmp_path / 'bad.csv')
+        copy = str(tmp_path / 'messy_copy.csv')
+        shutil.copyfile(messy_csv_file, copy)
+        with pytest.warns(UserWarning, match='Skipped 10 malformed rows in 3 partitions'):
+            partitioned = PartitionedSalesAnalyzer([messy_csv_file, DATA_FILE, copy],
+                                                   workers=2, quarantine=quarantine)
+        with open(quarantine) as file:
+            bad = list(csv.DictReader(file))
+        
+        assert partitioned.get_total_revenue() == pytest.approx(
+            StreamingSalesAnalyzer(DATA_FILE).get_total_revenue() * 3)
+        assert len(bad) == 10
+        assert [row['line'] for row in bad[:2]] == [f"{messy_csv_file}:4", f"{messy_csv_file}:5"]
+        assert bad[5]['line'] == f"{copy}:4"
+        assert bad[0]['order_id'] == '2001'
+    
+    @pytest.mark.parametrize('options', [{'workers': 2}, {'cache': True}, {'cache': True, 'workers': 2}])
+    def test_parallel_and_cached_keep_going(self, messy_csv_file, tmp_path, options):
+        """Test that parallel and cached loads skip and quarantine the same rows as a serial load."""
+        serial_quarantine = str(tmp_path / 'serial.csv')
+        quarantine = str(tmp_path / 'bad.csv')
+        with pytest.warns(UserWarning, match='Skipped 5 malformed rows'):
+            serial = SalesDataAnalyzer(messy_csv_file, quarantine=serial_quarantine)
+        for _ in range(2):
+            with pytest.warns(UserWarning, match='Skipped 5 malformed rows'):
+                analyzer = SalesDataAnalyzer(messy_csv_file, quarantine=quarantine, **options)
+            with open(quarantine) as file, open(serial_quarantine) as expected:
+                assert file.read() == expected.read()
+            os.remove(quarantine)
+            
+            assert analyzer.rejected_rows == 5
+            assert list(map(record_values, analyzer.sales_data)) == list(map(record_values, serial.sales_data))
+    
+    @pytest.mark.parametrize('options', [{'workers': 2}, {'cache': True}])
+    def test_exact_rejects_sub_cent_rows(self, tmp_path, options):
+        """Test that parallel and cached exact loads skip sub-cent prices like a serial load."""
+        path = tmp_path / 'cents.csv'
+        with open(DATA_FILE) as file:
+            path.write_text(file.read() + '2001,2024-01-20,Pen,Stationery,0.005,2,North,C001,SP001\n')
+        
+        if options.get('cache'):
+            assert len(SalesDataAnalyzer(str(path), **options).sales_data) == 51
+        with pytest.warns(UserWarning, match='Skipped 1 malformed rows'):
+            analyzer = SalesDataAnalyzer(str(path), exact=True, **options)
+        assert len(analyzer.sales_data) == 50
+        assert analyzer.get_total_revenue() == 28473.5
+    
+    def test_missing_column(self, tmp_path):
+        """Test that a header without a required column is rejected up front."""
+        path = tmp_path / 'short.csv'
+        path.write_text('order_id,date,product\n1001,2024-01-15,Laptop\n')
+        
+        with pytest.raises(ValueError, match='missing category'):
+            list(SalesCsvReader(str(path)))
+    
+    def test_cli_quarantine(self, messy_csv_file, tmp_path, capsys):
+        """Test that the CLI report completes and writes the quarantine file."""
+        quarantine = tmp_path / 'bad.csv'
+        with pytest.warns(UserWarning):
+            assert main([messy_csv_file, '--quarantine', str(quarantine)]) == 0
+        
+        assert 'Total Revenue' in capsys.readouterr().out
+        assert len(quarantine.read_text().splitlines()) == 6
+    
+    @pytest.mark.parametrize('flags', [['--stream'], ['--workers', '2'], ['--cache', '--exact']])
+    def test_cli_quarantine_every_mode(self, messy_csv_file, tmp_path, flags):
+        """Test that --quarantine is honoured when streaming and over several files."""
+        quarantine = tmp_path / 'bad.csv'
+        copy = str(tmp_path / 'copy.csv')
+        shutil.copyfile(messy_csv_file, copy)
+        runs = [([messy_csv_file], ['']), ([messy_csv_file, copy], [f"{messy_csv_file}:", f"{copy}:"])]
+        for paths, prefixes in runs:
+            with pytest.warns(UserWarning):
+                assert main(paths + ['--quarantine', str(quarantine)] + flags) == 0
+            with open(quarantine) as file:
+                lines = [row['line'] for row in csv.DictReader(file)]
+            quarantine.unlink()
+            
+            assert lines == [prefix + line for prefix in prefixes for line in ('4', '5', '7', '8', '9')]
+    
+    def test_cli_store_quarantines_rescanned_files(self, messy_csv_file, tmp_path):
+        """Test that --store quarantines the rows of the files it scans, not of reused summaries."""
+        quarantine = tmp_path / 'bad.csv'
+        copy = str(tmp_path / 'copy.csv')
+        shutil.copyfile(messy_csv_file, copy)
+        store = ['--store', str(tmp_path / 'store'), '--quarantine', str(quarantine)]
+        with pytest.warns(UserWarning):
+            assert main([messy_csv_file] + store) == 0
+        with pytest.warns(UserWarning):
+            assert main([messy_csv_file, copy] + store) == 0
+        with open(quarantine) as file:
+            lines = [row['line'] for row in csv.DictReader(file)]
+        
+        assert lines == [f"{copy}:{line}" for line in ('4', '5', '7', '8', '9')]
+    
+    def test_cli_batch_quarantine(self, messy_csv_file, tmp_path, capsys):
+        """Test that --batch writes one quarantine file per dataset into the --quarantine directory."""
+        clean = str(tmp_path / 'clean.csv')
+        shutil.copyfile(DATA_FILE, clean)
+        with pytest.warns(UserWarning):
+            assert main([messy_csv_file, clean, '--batch', str(tmp_path / 'out'), '--quarantine',
+                         str(tmp_path / 'bad'), '--workers', '2']) == 0
+        
+        assert 'Wrote 2 reports' in capsys.readouterr().out
+        assert os.listdir(tmp_path / 'bad') == ['messy.csv.rejected.csv']
+        assert len((tmp_path / 'bad' / 'messy.csv.rejected.csv').read_text().splitlines()) == 6
+    
+    def test_cli_rejects_stream_with_loader_options(self, capsys):
+        """Test that --stream refuses --workers and --cache instead of ignoring them."""
+        with pytest.raises(SystemExit):
+            main([DATA_FILE, '--stream', '--cache'])
+        assert '--stream does not keep' in capsys.readouterr().err
+
+
+class TestInputFormats:
+    """Test compressed CSV, JSON Lines and column file inputs chosen by extension."""
+    
+    @pytest.fixture
+    def format_files(self, tmp_path):
+        """Write the sample data in every supported format."""
+        with open(DATA_FILE, 'rb') as file:
+            data = file.read()
+        with open(DATA_FILE, newline='') as file:
+            rows = list(csv.DictReader(file))
+        lines = ''.join(json.dumps(dict(row, price=float(row['price']), quantity=int(row['quantity'])))
+                        + '\n' for row in rows).encode()
+        files = {
+            'csv.gz': gzip.compress(data),
+            'csv.bz2': bz2.compress(data),
+            'csv.xz': lzma.compress(data),
+            'jsonl': lines,
+            'ndjson.gz': gzip.compress(lines),
+        }
+        paths = {}
+        for suffix, content in files.items():
+            paths[suffix] = tmp_path / f"sales.{suffix}"
+            paths[suffix].write_bytes(content)
+        paths['salescol'] = tmp_path / 'sales.salescol'
+        write_sales_columns(SalesDataAnalyzer(DATA_FILE, backend='columnar').columns,
+                            str(paths['salescol']))
+        return {suffix: str(path) for suffix, path in paths.items()}
+    
+    def test_input_format(self):
+        """Test that the format and compression come from the file name."""
+        assert input_format('a/sales.csv') == ('csv', None)
+        assert input_format('a/SALES.CSV.GZ') == ('csv', '.gz')
+        assert input_format('a/sales.jsonl.zst') == ('jsonl', '.zst')
+        assert input_format('a/sales.salescol') == ('columns', None)
+        assert input_format('a/sales') == ('csv', None)
+        with pytest.raises(ValueError):
+            input_format('a/sales.salescol.gz')
+    
+    @pytest.mark.parametrize('backend', ['records', 'columnar'])
+    def test_formats_match_csv(self, format_files, backend):
+        """Test that every format loads the same records and statistics as the CSV."""
+        expected = SalesDataAnalyzer(DATA_FILE, backend=backend)
+        for path in format_files.values():
+            analyzer = SalesDataAnalyzer(path, backend=backend)
+            
+            assert list(map(record_values, analyzer.sales_data)) == list(map(record_values, expected.sales_data))
+            assert analyzer.get_category_statistics() == expected.get_category_statistics()
+    
+    def test_streaming_and_directories(self, format_files, tmp_path):
+        """Test chunked readers and directory discovery over every format."""
+        expected = StreamingSalesAnalyzer(DATA_FILE, chunk_size=7)
+        for path in format_files.values():
+            assert (StreamingSalesAnalyzer(path, chunk_size=7).get_sales_by_salesperson()
+                    == expected.get_sales_by_salesperson())
+        (tmp_path / 'notes.txt').write_text('not sales data')
+        
+        assert discover_partitions(str(tmp_path)) == sorted(format_files.values())
+        partitioned = PartitionedSalesAnalyzer(str(tmp_path))
+        assert partitioned.get_total_revenue() == pytest.approx(6 * expected.get_total_revenue())
+    
+    def test_column_file_is_mapped(self, format_files):
+        """Test that column files are mapped rather than copied, and cannot be tailed."""
+        analyzer = SalesDataAnalyzer(format_files['salescol'], backend='columnar')
+        
+        assert isinstance(analyzer.columns.price, memoryview)
+        with pytest.raises(ValueError, match='plain CSV'):
+            analyzer.refresh()
+        with pytest.warns(UserWarning, match='one process'):
+            SalesDataAnalyzer(format_files['csv.gz'], workers=2)
+    
+    def test_json_lines_quarantine(self, tmp_path):
+        """Test that bad JSON lines are skipped and quarantined with their line numbers."""
+        path = tmp_path / 'messy.jsonl'
+        good = {'order_id': '1', 'date': '2024-01-15', 'product': 'Desk', 'category': 'Furniture',
+                'price': 10.5, 'quantity': 2, 'region': 'North', 'customer_id': 'C001',
+                'salesperson': 'SP001'}
+        path.write_text('\n'.join([
+            json.dumps(good),
+            '{"order_id": "2", "date": ',
+            '',
+            json.dumps({key: value for key, value in good.items() if key != 'region'}),
+            json.dumps(dict(good, quantity='many')),
+            '[1, 2]',
+            json.dumps(dict(good, order_id='3')),
+        ]) + '\n')
+        quarantine = str(tmp_path / 'bad.csv')
+        reader = SalesJsonLinesReader(str(path), quarantine, chunk_size=3)
+        order_ids = [values[0] for values in reader]
+        with open(quarantine) as file:
+            bad = list(csv.DictReader(file))
+        
+        assert order_ids == ['1', '3']
+        assert reader.rejected == 4
+        assert [row['line'] for row in bad] == ['2', '4', '5', '6']
+        assert 'expected 9 fields, found 8' in bad[1]['error']
+    
+    def test_zstandard(self, tmp_path):
+        """Test zstd-compressed CSV when the zstandard package is installed."""
+        zstandard = pytest.importorskip('zstandard')
+        path = tmp_path / 'sales.csv.zst'
+        with open(DATA_FILE, 'rb') as file:
+            path.write_bytes(zstandard.ZstdCompressor().compress(file.read()))
+        
+        assert (SalesDataAnalyzer(str(path)).get_total_revenue()
+                == SalesDataAnalyzer(DATA_FILE).get_total_revenue())
+
+
+class TestExactMode:
+    """Test integer-cent aggregation that does not depend on row order or partitioning."""
+    
+    @staticmethod
+    def write_rows(path, rows):
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['order_id', 'date', 'product', 'category', 'price', 'quantity',
+                             'region', 'customer_id', 'salesperson'])
+            writer.writerows(rows)
+        return str(path)
+    
+    @pytest.fixture
+    def cent_rows(self):
+        """Rows whose float revenue sums depend on the order they are added in."""
+        rng = random.Random(7)
+        return [
+            [str(1000 + i), f"2024-0{rng.randint(1, 3)}-1{rng.randint(0, 9)}", f"P{i % 7}",
+             rng.choice(['Electronics', 'Furniture']), f"{rng.randint(1, 99999) / 100:.2f}",
+             str(rng.randint(1, 9)), rng.choice(['North', 'South']), f"C{i % 13:03d}", 'SP001']
+            for i in range(500)
+        ]
+    
+    @staticmethod
+    def results(analyzer):
+        return (analyzer.get_total_revenue(), analyzer.get_revenue_by_category(),
+                analyzer.get_category_statistics(), analyzer.get_sales_by_salesperson(),
+                analyzer.get_top_customers(5), analyzer.get_sales_by_month())
+    
+    @pytest.mark.parametrize('backend', ['records', 'columnar'])
+    def test_order_independent(self, cent_rows, tmp_path, backend):
+        """Test that shuffled copies of the data give identical results to the cent."""
+        expected = sum(Decimal(row[4]) * int(row[5]) for row in cent_rows)
+        outcomes = []
+        for seed in range(3):
+            rows = cent_rows[:]
+            random.Random(seed).shuffle(rows)
+            path = self.write_rows(tmp_path / f"shuffled{seed}.csv", rows)
+            outcomes.append(self.results(SalesDataAnalyzer(path, backend=backend, exact=True)))
+        
+        assert outcomes[0][0] == float(expected)
+        assert outcomes[1] == outcomes[0]
+        assert outcomes[2] == outcomes[0]
+    
+    def test_partition_independent(self, cent_rows, tmp_path):
+        """Test that merged partitions equal a single-file load in every mode."""
+        single = self.write_rows(tmp_path / 'all.csv', cent_rows)
+        (tmp_path / 'parts').mkdir()
+        for i in range(4):
+            self.write_rows(tmp_path / 'parts' / f"part{i}.csv", cent_rows[i::4])
+        expected = self.results(SalesDataAnalyzer(single, exact=True))
+        
+        partitioned = PartitionedSalesAnalyzer(str(tmp_path / 'parts'), exact=True)
+        
+        assert self.results(StreamingSalesAnalyzer(single, chunk_size=33, exact=True)) == expected
+        assert self.results(partitioned) == expected
+        assert (partitioned.get_revenue_between('2024-02-01', '2024-03-31')
+                == SalesDataAnalyzer(single, exact=True).get_revenue_between('2024-02-01', '2024-03-31'))
+    
+    def test_same_output_shapes(self, analyzer, sample_csv_file):
+        """Test that exact results have the float output shapes and values of the default mode."""
+        exact = SalesDataAnalyzer(sample_csv_file, backend=analyzer.backend, exact=True)
+        
+        assert exact.get_total_revenue() == analyzer.get_total_revenue()
+        assert isinstance(exact.get_total_revenue(), float)
+        assert exact.get_category_statistics() == analyzer.get_category_statistics()
+        assert exact.get_sales_by_month() == analyzer.get_sales_by_month()
+        assert exact.get_high_value_customers(500) == analyzer.get_high_value_customers(500)
+        assert (exact.query().group_by('region').sum_revenue()
+                == analyzer.query().group_by('region').sum_revenue())
+    
+    def test_append_stays_exact(self, cent_rows, tmp_path):
+        """Test that appended rows extend the cent caches like a fresh load."""
+        path = self.write_rows(tmp_path / 'all.csv', cent_rows)
+        head = SalesDataAnalyzer(self.write_rows(tmp_path / 'head.csv', cent_rows[:300]), exact=True)
+        self.results(head)
+        with open(path) as file:
+            head.append(list(csv.DictReader(file))[300:])
+        
+        assert self.results(head) == self.results(SalesDataAnalyzer(path, exact=True))
+    
+    @pytest.mark.parametrize('backend', ['records', 'columnar'])
+    def test_append_skips_sub_cent_rows(self, cent_rows, tmp_path, backend):
+        """Test that appended sub-cent rows are skipped and quarantined like on a load."""
+        rows = cent_rows[:20] + [['9', '2024-03-01', 'Pen', 'Stationery', '1.005', '1', 'North', 'C001', 'SP001']]
+        path = self.write_rows(tmp_path / 'all.csv', rows)
+        quarantine = str(tmp_path / 'bad.csv')
+        head = SalesDataAnalyzer(self.write_rows(tmp_path / 'head.csv', rows[:10]), backend=backend,
+                                 exact=True, quarantine=quarantine)
+        self.results(head)
+        with open(path) as file:
+            appended = list(csv.DictReader(file))[10:]
+        
+        with pytest.warns(UserWarning, match='Skipped 1 malformed rows in appended records'):
+            assert head.append(appended) == 10
+        
+        with pytest.warns(UserWarning, match='Skipped 1 malformed rows'):
+            fresh = SalesDataAnalyzer(path, backend=backend, exact=True)
+        assert self.results(head) == self.results(fresh)
+        assert head.rejected_rows == 1
+        with open(quarantine, newline='') as file:
+            assert list(csv.reader(file)) == [
+                ['line', 'error', 'order_id', 'date', 'product', 'category', 'price', 'quantity',
+                 'region', 'customer_id', 'salesperson'],
+                ['', 'price has fractional cents: 1.005', '9', '2024-03-01', 'Pen', 'Stationery',
+                 '1.005', '1', 'North', 'C001', 'SP001']]
+    
+    def test_rejects_fractional_cents(self, tmp_path):
+        """Test that sub-cent prices are quarantined by serial and parallel loads."""
+        path = self.write_rows(tmp_path / 'sub.csv', [
+            ['1', '2024-01-01', 'Pen', 'Stationery', '1.005', '1', 'North', 'C001', 'SP001'],
+            ['2', '2024-01-02', 'Pen', 'Stationery', '1.25', '2', 'North', 'C001', 'SP001'],
+        ])
+        with pytest.warns(UserWarning, match='Skipped 1 malformed rows'):
+            analyzer = SalesDataAnalyzer(path, exact=True)
+        
+        assert analyzer.get_total_revenue() == 2.5
+        assert SalesDataAnalyzer(path).get_total_revenue() == pytest.approx(3.505)
+        with pytest.warns(UserWarning, match='Skipped 1 malformed rows'):
+            assert SalesDataAnalyzer(path, workers=2, exact=True).get_total_revenue() == 2.5
+    
+    def test_every_path_skips_sub_cent_rows(self, tmp_path):
+        """Test that streaming, partitioned, report and column-file paths skip sub-cent rows alike."""
+        path = self.write_rows(tmp_path / 'half.csv', [
+            ['1', '2024-01-01', 'Pen', 'Stationery', '0.005', '1', 'North', 'C001', 'SP001'],
+            ['2', '2024-01-02', 'Pen', 'Stationery', '0.005', '1', 'North', 'C001', 'SP001'],
+            ['3', '2024-01-03', 'Pen', 'Stationery', '1.25', '2', 'North', 'C001', 'SP001'],
+        ])
+        columns_path = str(tmp_path / 'half.salescol')
+        write_sales_columns(SalesDataAnalyzer(path, backend='columnar').columns, columns_path)
+        
+        loads = [lambda: StreamingSalesAnalyzer(path, exact=True),
+                 lambda: PartitionedSalesAnalyzer(path, exact=True),
+                 lambda: default_report_plan().execute_csv(path, exact=True),
+                 lambda: SalesDataAnalyzer(path, exact=True),
+                 lambda: SalesDataAnalyzer(columns_path, backend='columnar', exact=True)]
+        for load in loads:
+            with pytest.warns(UserWarning, match='Skipped 2 malformed rows'):
+                metrics = load()
+            assert metrics.get_total_revenue() == 2.5
+            assert metrics.get_sales_by_salesperson()['SP001']['total_orders'] == 1
+        assert StreamingSalesAnalyzer(path).get_total_revenue() == pytest.approx(2.51)
+    
+    def test_summaries_keep_mode(self, tmp_path):
+        """Test that stored summaries are only reused by runs in the same mode."""
+        store = str(tmp_path / 'store')
+        exact = default_report_plan().execute_partitions([DATA_FILE], store_dir=store, exact=True)
+        reused = default_report_plan().execute_partitions([DATA_FILE], store_dir=store, exact=True)
+        plain = default_report_plan().execute_partitions([DATA_FILE], store_dir=store)
+        
+        assert reused.recomputed == []
+        assert plain.recomputed == [DATA_FILE]
+        assert reused.get_category_statistics() == exact.get_category_statistics()
+        assert reused.aggregates.total_revenue == 2847350
+        assert exact.get_total_revenue() == plain.get_total_revenue() == 28473.5
+
+
+class TestTopN:
+    """Test heap-based top-N ranking."""
+    
+    def test_rank_by_metric(self, analyzer):
+        """Test ranking other dimensions by revenue, quantity and order count."""
+        by_orders = analyzer.get_top_customers(1, metric='orders')
+        assert by_orders[0]['customer_id'] == 'C001'
+        assert by_orders[0]['orders'] == 2
+        
+        by_quantity = analyzer.get_top_categories(1, metric='quantity')
+        assert by_quantity[0]['category'] == 'Stationery'
+        assert by_quantity[0]['quantity'] == 30
+        
+        categories = analyzer.get_top_categories(3)
+        assert [c['category'] for c in categories] == ['Electronics', 'Furniture', 'Stationery']
+    
+    def test_ties_are_ordered_by_key(self, analyzer):
+        """Test that equal metrics are ordered by key."""
+        salespeople = analyzer.get_top_salespeople(3, metric='orders')
+        
+        assert [(s['salesperson'], s['orders']) for s in salespeople] == [
+            ('SP001', 3), ('SP002', 3), ('SP003', 2)
+        ]
+    
+    def test_unknown_metric(self, analyzer):
+        """Test that an unknown metric is rejected."""
+        with pytest.raises(ValueError):
+            analyzer.get_top('product', 3, metric='margin')
+    
+    def test_top_n_edge_sizes(self, analyzer):
+        """Test zero and oversized requests."""
+        assert analyzer.get_top_products(0) == []
+        assert len(analyzer.get_top('region', 100)) == 4
+    
+    def test_streaming_top_n(self, sample_csv_file, analyzer):
+        """Test top-N over the raw CSV in one pass."""
+        top = top_n_from_csv(sample_csv_file, 'product', 3, chunk_size=2)
+        
+        assert [(key, s.revenue) for key, s in top] == [
+            (p['product'], p['revenue']) for p in analyzer.get_top_products(3)
+        ]
+        assert top_n_from_csv(sample_csv_file, 'month', 1)[0][0] == '2024-01'
+
+
+class TestQueryBuilder:
+    """Test lazy queries with fused predicates and index pushdown."""
+    
+    def test_builder_is_lazy(self, analyzer):
+        """Test that building a query reads no rows."""
+        scans = analyzer.scan_count
+        query = analyzer.query().where(category='Electronics').between('2024-01-01', '2024-02-28')
+        query.min_amount(500).group_by('region')
+        
+        assert analyzer.scan_count == scans
+    
+    def test_fused_query(self, analyzer):
+        """Test predicates and grouping evaluated together in one pass."""
+        scans = analyzer.scan_count
+        revenue = (analyzer.query()
+                   .where(category='Electronics')
+                   .between('2024-01-01', '2024-02-28')
+                   .min_amount(500)
+                   .group_by('region')
+                   .sum_revenue())
+        
+        assert revenue == {'North': 3300.0}
+        assert analyzer.scan_count == scans + 1
+    
+    def test_matches_chained_filters(self, analyzer):
+        """Test that records() equals intersecting the materializing filters."""
+        query = analyzer.query().where(category='Furniture').min_amount(400)
+        expected = [r.order_id for r in analyzer.filter_by_category('Furniture')
+                    if r.total_amount >= 400]
+        
+        assert [r.order_id for r in query.records()] == expected
+        assert query.count() == len(expected)
+        assert all(isinstance(r, SalesRecord) for r in query.records())
+    
+    def test_uses_built_index(self, analyzer):
+        """Test that candidate rows come from the smallest available index."""
+        analyzer.filter_by_category('Stationery')
+        query = analyzer.query().where(region='East', category='Stationery')
+        
+        rows, match = query._plan()
+        assert len(rows) == 2
+        assert [r.order_id for r in query.records()] == ['1007']
+    
+    def test_date_range_uses_prefix_sums(self, analyzer):
+        """Test that a plain date range is answered from the date index."""
+        expected = analyzer.get_revenue_between('2024-01-16', '2024-02-15')
+        scans = analyzer.scan_count
+        query = analyzer.query().between('2024-01-16', '2024-02-15')
+        
+        assert query.sum_revenue() == expected
+        assert query.count() == 4
+        assert analyzer.scan_count == scans
+    
+    def test_grouped_results(self, analyzer):
+        """Test grouped counts and stats against the analyzer's own groupings."""
+        assert analyzer.query().group_by('month').count() == {
+            '2024-01': 4, '2024-02': 3, '2024-03': 1
+        }
+        stats = analyzer.query().group_by('category').stats()
+        expected = analyzer.get_category_statistics()
+        
+        for category, s in stats.items():
+            assert s.revenue == pytest.approx(expected[category]['total_revenue'])
+            assert s.max_order == expected[category]['max_order']
+    
+    def test_narrowing_predicates(self, analyzer):
+        """Test repeated and contradictory predicates."""
+        query = analyzer.query().between('2024-01-01', '2024-02-16').between('2024-02-01', '2024-03-31')
+        assert query.count() == 2
+        
+        assert analyzer.query().where(category='Electronics').where(category='Furniture').count() == 0
+        assert analyzer.query().where(category='Toys').sum_revenue() == 0.0
+        assert analyzer.query().where(month='2024-03').records()[0].order_id == '1008'
+    
+    def test_unknown_dimension(self, analyzer):
+        """Test that an unknown dimension is rejected."""
+        with pytest.raises(ValueError):
+            analyzer.query().where(color='red')
+        with pytest.raises(ValueError):
+            analyzer.query().group_by('color')
+
+
+NEW_ROWS = [
+    '1009,2024-03-16,Mouse,Electronics,25.50,4,East,C008,SP003',
+    '1010,2024-03-18,Desk,Furniture,600.00,2,North,C001,SP001',
+    '1011,2024-04-02,Lamp,Furniture,45.00,3,West,C009,SP004',
+]
+
+
+def query_results(analyzer):
+    """Collect every aggregate query so two analyzers can be compared."""
+    return (
+        analyzer.get_total_revenue(),
+        analyzer.get_revenue_by_category(),
+        analyzer.get_revenue_by_region(),
+        analyzer.get_top_products(10),
+        analyzer.get_sales_by_month(),
+        analyzer.get_sales_by_salesperson(),
+        analyzer.get_category_statistics(),
+        analyzer.get_high_value_customers(1000.0),
+        [r.order_id for r in analyzer.filter_by_category('Furniture')],
+        [r.order_id for r in analyzer.filter_by_date_range('2024-03-01', '2024-04-30')],
+    )
+
+
+class TestIncrementalAppend:
+    """Test appending records and tailing the CSV without a full reload."""
+    
+    @pytest.fixture
+    def combined_csv_file(self, sample_csv_file):
+        """Create a copy of the sample file with the new rows appended."""
+        with open(sample_csv_file) as source:
+            content = source.read()
+        temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv')
+        temp_file.write(content + '\n'.join(NEW_ROWS) + '\n')
+        temp_file.close()
+        yield temp_file.name
+        os.unlink(temp_file.name)
+    
+    @staticmethod
+    def new_row_dicts():
+        header = ['order_id', 'date', 'product', 'category', 'price', 'quantity',
+                  'region', 'customer_id', 'salesperson']
+        return [dict(zip(header, line.split(','))) for line in NEW_ROWS]
+    
+    def test_append_matches_fresh_load(self, analyzer, combined_csv_file):
+        """Test that appending to a warm analyzer matches loading everything."""
+        query_results(analyzer)
+        misses = analyzer.cache_misses
+        
+        assert analyzer.append(self.new_row_dicts()) == 3
+        
+        fresh = SalesDataAnalyzer(combined_csv_file, backend=analyzer.backend)
+        assert query_results(analyzer) == query_results(fresh)
+        assert analyzer.cache_misses == misses
+    
+    def test_append_records(self, sample_csv_file, combined_csv_file):
+        """Test appending SalesRecord objects to a cold analyzer."""
+        analyzer = SalesDataAnalyzer(sample_csv_file, backend='columnar')
+        analyzer.append(SalesRecord(row) for row in self.new_row_dicts())
+        
+        fresh = SalesDataAnalyzer(combined_csv_file)
+        assert len(analyzer.sales_data) == 11
+        assert query_results(analyzer) == query_results(fresh)
+    
+    def test_out_of_order_append_rebuilds_date_index(self, analyzer):
+        """Test that rows older than the date index still show up in range queries."""
+        analyzer.filter_by_date_range('2024-01-01', '2024-12-31')
+        old = dict(self.new_row_dicts()[0], order_id='999', date='2023-12-31')
+        
+        analyzer.append([old])
+        
+        assert [r.order_id for r in analyzer.filter_by_date_range('2023-12-01', '2023-12-31')] == ['999']
+    
+    def test_refresh_tails_file(self, analyzer, sample_csv_file, combined_csv_file):
+        """Test that refresh() picks up complete rows appended to the CSV."""
+        query_results(analyzer)
+        with open(sample_csv_file, 'a') as file:
+            file.write('\n'.join(NEW_ROWS[:2]) + '\n' + NEW_ROWS[2][:10])
+        
+        assert analyzer.refresh() == 2
+        assert analyzer.refresh() == 0
+        
+        with open(sample_csv_file, 'a') as file:
+            file.write(NEW_ROWS[2][10:] + '\n')
+        
+        assert analyzer.refresh() == 1
+        fresh = SalesDataAnalyzer(combined_csv_file)
+        assert query_results(analyzer) == query_results(fresh)
+    
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_refresh_skips_bad_rows(self, sample_csv_file, combined_csv_file, tmp_path, workers):
+        """Test that a malformed appended row is quarantined without losing the valid ones."""
+        quarantine = str(tmp_path / 'bad.csv')
+        analyzer = SalesDataAnalyzer(sample_csv_file, workers=workers, quarantine=quarantine)
+        bad = '1099,2024-03-17,Mouse,Electronics,N/A,1,East,C008,SP003'
+        with open(sample_csv_file, 'a') as file:
+            file.write('\n'.join([NEW_ROWS[0], bad, NEW_ROWS[1]]) + '\n')
+        
+        with pytest.warns(UserWarning, match='Skipped 1 malformed rows'):
+            assert analyzer.refresh() == 2
+        with open(sample_csv_file, 'a') as file:
+            file.write(NEW_ROWS[2] + '\n')
+        assert analyzer.refresh() == 1
+        
+        with open(quarantine) as file:
+            rejected = list(csv.DictReader(file))
+        assert analyzer.rejected_rows == 1
+        assert [(row['line'], row['order_id']) for row in rejected] == [('11', '1099')]
+        assert query_results(analyzer) == query_results(SalesDataAnalyzer(combined_csv_file))
+
+
+class TestReportPipeline:
+    """Test building, rendering and batch-writing reports."""
+    
+    @pytest.fixture
+    def report(self):
+        """Build the CLI report over the sample data."""
+        return build_report(default_report_plan().execute(SalesDataAnalyzer(DATA_FILE)))
+    
+    def test_text_matches_cli(self, report, capsys):
+        """Test that the text renderer produces the CLI report including filter counts."""
+        assert main([DATA_FILE]) == 0
+        
+        text = render_text(report)
+        assert capsys.readouterr().out == text
+        assert text.startswith("=" * 80 + "\nSALES DATA ANALYSIS REPORT\n")
+        assert "10. FILTERING EXAMPLES\n" + "-" * 80 + "\nElectronics sales count: 26\n" in text
+    
+    def test_threads_give_same_report(self, report):
+        """Test that computing sections in a thread pool changes nothing."""
+        assert build_report(default_report_plan().execute(SalesDataAnalyzer(DATA_FILE)), threads=4) == report
+        assert list(report) == list(REPORT_SECTIONS) + ['filter_counts']
+    
+    def test_json_and_csv(self, report):
+        """Test that JSON and CSV hold the same numbers as the report."""
+        assert json.loads(render_json(report)) == report
+        
+        rows = list(csv.DictReader(render_csv(report).splitlines()))
+        values = {(r['section'], r['key'], r['field']): float(r['value']) for r in rows}
+        assert values[('total_revenue', '', '')] == report['total_revenue']
+        assert values[('top_products', 'Laptop', 'quantity_sold')] == 10
+        assert values[('category_statistics', 'Furniture', 'max_order')] == \
+            report['category_statistics']['Furniture']['max_order']
+        assert values[('filter_counts', 'over_500', '')] == 17
+        with pytest.raises(ValueError):
+            write_report(report, 'xml')
+    
+    def test_output_file(self, tmp_path, capsys):
+        """Test that --output writes the chosen format and leaves stdout empty."""
+        output = tmp_path / 'report.json'
+        
+        assert main([DATA_FILE, '--format', 'json', '--output', str(output)]) == 0
+        assert capsys.readouterr().out == ''
+        assert json.loads(output.read_text())['filter_counts']['january'] == 15
+    
+    @pytest.mark.parametrize('jobs', [1, 2])
+    def test_batch(self, tmp_path, jobs):
+        """Test that batch mode writes one report per dataset and records failures."""
+        (tmp_path / 'in' / 'east').mkdir(parents=True)
+        first = str(tmp_path / 'in' / 'sales.csv')
+        second = str(tmp_path / 'in' / 'east' / 'sales.csv.gz')
+        broken = str(tmp_path / 'in' / 'broken.csv')
+        with open(DATA_FILE, 'rb') as source:
+            data = source.read()
+        with open(first, 'wb') as file:
+            file.write(data)
+        with gzip.open(second, 'wb') as file:
+            file.write(data)
+        with open(broken, 'w') as file:
+            file.write("a,b\n1,2\n")
+        
+        result = run_batch([first, second, broken], str(tmp_path / 'out'), 'json', jobs=jobs)
+        
+        assert result['datasets'] == 2
+        assert result['rows'] == 100
+        assert list(result['failed']) == [broken]
+        assert result['datasets_per_minute'] > 0
+        for name in ('sales.csv.json', os.path.join('east', 'sales.csv.gz.json')):
+            with open(tmp_path / 'out' / name) as file:
+                assert json.load(file)['total_revenue'] == pytest.approx(28473.5)
+    
+    def test_batch_cli(self, tmp_path, capsys):
+        """Test that --batch reports throughput in datasets per minute."""
+        assert main([DATA_FILE, '--batch', str(tmp_path), '--format', 'csv']) == 0
+        
+        assert 'datasets/minute' in capsys.readouterr().out
+        assert (tmp_path / 'sales.csv.csv').read_text().startswith('section,key,field,value\n')
+
+
 class TestEdgeCases:
     """Test edge cases and error handling."""
     
@@ -352,6 +1726,32 @@ class TestEdgeCases:
         result = analyzer.filter_by_minimum_amount(1000000.0)
         assert len(result) == 0
     
+    @pytest.mark.parametrize('options', [{}, {'backend': 'columnar'}, {'workers': 2}, {'cache': True}])
+    def test_zero_byte_file(self, tmp_path, options):
+        """Test that a 0-byte CSV loads as an empty analyzer and picks up rows written later."""
+        path = tmp_path / 'empty.csv'
+        path.write_text('')
+        analyzer = SalesDataAnalyzer(str(path), **options)
+        
+        assert len(analyzer.sales_data) == 0
+        assert analyzer.get_total_revenue() == 0.0
+        assert StreamingSalesAnalyzer(str(path)).get_total_revenue() == 0.0
+        with open(DATA_FILE) as file:
+            path.write_text(file.read())
+        assert analyzer.refresh() == 50
+        assert analyzer.rejected_rows == 0
+    
+    def test_metrics_base_is_abstract(self):
+        """Test that SalesMetrics needs its abstract methods implemented."""
+        class TotalOnly(SalesMetrics):
+            def get_total_revenue(self):
+                return 0.0
+        
+        with pytest.raises(TypeError):
+            SalesMetrics()
+        with pytest.raises(TypeError, match='_group_stats'):
+            TotalOnly()
+    
     def test_high_value_customers_no_results(self, analyzer):
         """Test high value customers with threshold higher than any customer spending."""
         high_value = analyzer.get_high_value_customers(1000000.0)
@@ -0,0 +1,172 @@
+"""
+Unit tests for the asyncio serving layer
+
+Tests the service including:
+- Coalescing identical in-flight queries
+- LRU and TTL caching, invalidated when the CSV changes
+- The HTTP routing and JSON responses
+"""
+
+import pytest
+import os
+import sys
+import json
+import shutil
+import asyncio
+import threading
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from service import AnalysisService, TTLCache, serve
+from sales_analysis import SalesDataAnalyzer
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'sales.csv')
+
+
+@pytest.fixture
+def csv_copy(tmp_path):
+    """Copy the sample data so tests can modify it."""
+    path = tmp_path / 'sales.csv'
+    shutil.copy(DATA_FILE, path)
+    return str(path)
+
+
+class TestTTLCache:
+    """Test the result cache."""
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+        assert cache.get('c') == 3
+    
+    def test_expiry(self):
+        """Test that entries expire after the TTL."""
+        now = [0.0]
+        cache = TTLCache(ttl=10, clock=lambda: now[0])
+        cache.put('a', 1)
+        now[0] = 9.9
+        assert cache.get('a') == 1
+        now[0] = 10.0
+        assert cache.get('a') is None
+        assert len(cache) == 0
+
+
+class TestAnalysisService:
+    """Test querying through the service."""
+    
+    def test_matches_analyzer(self, csv_copy):
+        """Test that results equal direct analyzer calls."""
+        async def run():
+            service = AnalysisService({'sales': csv_copy})
+            return (await service.query('sales', 'get_revenue_by_region'),
+                    await service.query('sales', 'get_top_products', n=3))
+        
+        analyzer = SalesDataAnalyzer(csv_copy)
+        assert asyncio.run(run()) == (analyzer.get_revenue_by_region(), analyzer.get_top_products(3))
+    
+    def test_coalesces_in_flight(self, csv_copy):
+        """Test that concurrent identical queries run once."""
+        release = threading.Event()
+        
+        async def run():
+            service = AnalysisService({'sales': csv_copy})
+            await service.warm()
+            analyzer = service.datasets['sales'].analyzer
+            compute = analyzer.get_category_statistics
+            analyzer.get_category_statistics = lambda: release.wait(5) and compute()
+            tasks = [asyncio.ensure_future(service.query('sales', 'get_category_statistics'))
+                     for _ in range(5)]
+            await asyncio.sleep(0.05)
+            release.set()
+            results = await asyncio.gather(*tasks)
+            return service, results
+        
+        service, results = asyncio.run(run())
+        assert service.stats['computed'] == 1
+        assert service.stats['coalesced'] == 4
+        assert all(result == results[0] for result in results)
+    
+    def test_cache_hits(self, csv_copy):
+        """Test that repeated queries are served from the cache."""
+        async def run():
+            service = AnalysisService({'sales': csv_copy})
+            for _ in range(3):
+                await service.query('sales', 'get_top_products', n=2)
+            await service.query('sales', 'get_top_products', n=3)
+            return service
+        
+        service = asyncio.run(run())
+        assert service.stats['cache_hits'] == 2
+        assert service.stats['computed'] == 2
+    
+    def test_reload_on_change(self, csv_copy):
+        """Test that a changed CSV reloads the analyzer and drops cached results."""
+        async def run():
+            service = AnalysisService({'sales': csv_copy}, check_interval=0)
+            before = await service.query('sales', 'get_total_revenue')
+            with open(csv_copy, 'a') as file:
+                file.write("9999,2024-03-01,Desk,Furniture,100.00,2,North,C999,Alice\n")
+            after = await service.query('sales', 'get_total_revenue')
+            return service, before, after
+        
+        service, before, after = asyncio.run(run())
+        assert after == pytest.approx(before + 200.0)
+        assert service.stats['reloads'] == 2
+    
+    def test_rejects_unknown(self, csv_copy):
+        """Test unknown datasets, methods and parameters."""
+        async def run():
+            service = AnalysisService({'sales': csv_copy})
+            with pytest.raises(KeyError):
+                await service.query('other', 'get_total_revenue')
+            with pytest.raises(KeyError):
+                await service.query('sales', 'invalidate')
+            with pytest.raises(ValueError):
+                await service.query('sales', 'get_top_products', limit=3)
+        
+        asyncio.run(run())
+
+
+class TestHTTP:
+    """Test the HTTP front end."""
+    
+    def test_requests(self, csv_copy):
+        """Test JSON responses and status codes over a local connection."""
+        async def get(port, target):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(f"GET {target} HTTP/1.1\r\nConnection: close\r\n\r\n".encode())
+            response = await reader.read()
+            writer.close()
+            head, _, body = response.partition(b'\r\n\r\n')
+            return int(head.split()[1]), json.loads(body)
+        
+        async def run():
+            ready = asyncio.get_running_loop().create_future()
+            server = asyncio.ensure_future(
+                serve(AnalysisService({'sales': csv_copy}), port=0, ready=ready.set_result))
+            port = await ready
+            responses = [
+                await get(port, '/sales/get_top_products?n=2'),
+                await get(port, '/sales/filter_by_category?category=Furniture'),
+                await get(port, '/sales/get_top_products?n=two'),
+                await get(port, '/missing/get_total_revenue'),
+                await get(port, '/stats'),
+            ]
+            server.cancel()
+            return responses
+        
+        top, furniture, bad, missing, stats = asyncio.run(run())
+        assert top == (200, SalesDataAnalyzer(csv_copy).get_top_products(2))
+        assert furniture[0] == 200
+        assert {record['category'] for record in furniture[1]} == {'Furniture'}
+        assert bad[0] == 400
+        assert missing[0] == 404
+        assert stats[1]['requests'] == 2
@@ -0,0 +1,191 @@
+"""
+Unit tests for approximate streaming sketches
+
+Tests the mergeable sketches including:
+- HyperLogLog distinct counts
+- KLL quantiles
+- Weighted heavy hitters
+- Approximate sales metrics over analyzers and CSV files
+"""
+
+import pytest
+import os
+import sys
+import random
+from bisect import bisect_right
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sketches import HeavyHitters, HyperLogLog, KllSketch
+from sales_analysis import SalesDataAnalyzer, SalesSketches, sketch_csv
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'sales.csv')
+
+
+class TestHyperLogLog:
+    """Test distinct counting."""
+    
+    def test_small_counts_are_exact(self):
+        """Test that linear counting is exact for a handful of values."""
+        sketch = HyperLogLog()
+        for value in ['C001', 'C002', 'C003', 'C001']:
+            sketch.add(value)
+        
+        assert sketch.count() == 3
+    
+    def test_error_bound(self):
+        """Test a large count against three standard errors."""
+        sketch = HyperLogLog()
+        for i in range(50000):
+            sketch.add(f"C{i}")
+        
+        assert abs(sketch.count() - 50000) <= 3 * sketch.relative_error * 50000
+    
+    def test_merge_counts_union(self):
+        """Test that merging counts the union, not the sum."""
+        left, right, both = HyperLogLog(), HyperLogLog(), HyperLogLog()
+        for i in range(20000):
+            (left if i < 12000 else right).add(f"C{i}")
+            both.add(f"C{i}")
+        for i in range(5000):
+            right.add(f"C{i}")
+        
+        assert left.merge(right).registers == both.registers
+    
+    def test_parameter_checks(self):
+        """Test invalid precision and mismatched merges."""
+        with pytest.raises(ValueError):
+            HyperLogLog(precision=2)
+        with pytest.raises(ValueError):
+            HyperLogLog(10).merge(HyperLogLog(12))
+
+
+class TestKllSketch:
+    """Test quantile estimation."""
+    
+    def test_rank_error(self):
+        """Test that estimated quantiles land within a few percent of the true rank."""
+        rng = random.Random(7)
+        values = [rng.expovariate(0.01) for _ in range(50000)]
+        sketch = KllSketch()
+        for value in values:
+            sketch.add(value)
+        ordered = sorted(values)
+        
+        assert sum(map(len, sketch.levels)) < 1000
+        for q in (0.5, 0.95, 0.99):
+            rank = bisect_right(ordered, sketch.quantile(q)) / len(ordered)
+            assert rank == pytest.approx(q, abs=0.0165)
+    
+    def test_min_max_are_exact(self):
+        """Test the extreme quantiles."""
+        sketch = KllSketch(k=20)
+        for value in range(1000):
+            sketch.add(float(value))
+        
+        assert sketch.quantile(0) == 0.0
+        assert sketch.quantile(1) == 999.0
+    
+    def test_merge(self):
+        """Test that a merged sketch keeps the combined weight and accuracy."""
+        left, right = KllSketch(), KllSketch()
+        for value in range(20000):
+            (left if value % 3 else right).add(float(value))
+        merged = left.merge(right)
+        
+        assert merged.count == 20000
+        assert sum(len(items) << level for level, items in enumerate(merged.levels)) == 20000
+        assert merged.quantile(0.5) == pytest.approx(10000, abs=20000 * 0.0165)
+    
+    def test_empty_sketch(self):
+        """Test that an empty sketch has no quantiles."""
+        with pytest.raises(ValueError):
+            KllSketch().quantile(0.5)
+
+
+class TestHeavyHitters:
+    """Test weighted heavy hitters."""
+    
+    def test_lower_bounds_within_error(self):
+        """Test that estimates fall short by at most the reported error."""
+        rng = random.Random(3)
+        exact = {}
+        sketch = HeavyHitters(capacity=20)
+        for _ in range(20000):
+            key = f"C{int(rng.paretovariate(1.1)) % 500}"
+            weight = rng.uniform(1, 100)
+            exact[key] = exact.get(key, 0.0) + weight
+            sketch.add(key, weight)
+        
+        assert sketch.error <= sketch.total / (sketch.capacity + 1)
+        for key, estimate in sketch.top(5):
+            assert estimate <= exact[key] + 1e-6
+            assert exact[key] - estimate <= sketch.error + 1e-6
+        assert sketch.top(1)[0][0] == max(exact, key=exact.get)
+    
+    def test_merge(self):
+        """Test merging summaries of disjoint streams."""
+        left, right = HeavyHitters(capacity=2), HeavyHitters(capacity=2)
+        for key, weight in [('a', 10), ('b', 5), ('c', 1), ('d', 1), ('e', 1)]:
+            left.add(key, weight)
+        for key, weight in [('a', 3), ('b', 8)]:
+            right.add(key, weight)
+        merged = left.merge(right)
+        
+        assert merged.total == 29
+        assert [key for key, _ in merged.top(2)] == ['a', 'b']
+
+
+class TestSalesSketches:
+    """Test approximate sales metrics."""
+    
+    @pytest.fixture(params=['records', 'columnar'])
+    def analyzer(self, request):
+        """Create an analyzer over the sample data for each storage backend."""
+        return SalesDataAnalyzer(DATA_FILE, backend=request.param)
+    
+    def test_distinct_customers(self, analyzer):
+        """Test distinct customers per category and region against exact counts."""
+        sketches = analyzer.sketch()
+        for dimension in ('category', 'region'):
+            exact = {}
+            for r in analyzer.sales_data:
+                exact.setdefault(getattr(r, dimension), set()).add(r.customer_id)
+            assert sketches.distinct_customers(dimension) == {k: len(v) for k, v in exact.items()}
+    
+    def test_quantiles_and_top_customers(self, analyzer):
+        """Test order amount quantiles and top spenders on the sample data."""
+        sketches = analyzer.sketch()
+        stats = analyzer.get_category_statistics()
+        
+        for category, quantiles in sketches.order_quantiles().items():
+            assert stats[category]['min_order'] <= quantiles[0.5] <= stats[category]['max_order']
+            assert quantiles[0.99] == stats[category]['max_order']
+        assert [c['customer_id'] for c in sketches.get_top_customers(2)] == [
+            c['customer_id'] for c in analyzer.get_top_customers(2)
+        ]
+    
+    def test_csv_matches_analyzer(self, analyzer):
+        """Test that the streaming builder agrees with the in-memory one."""
+        streamed = sketch_csv(DATA_FILE, chunk_size=7)
+        loaded = analyzer.sketch()
+        
+        assert streamed.distinct_customers('region') == loaded.distinct_customers('region')
+        assert streamed.order_quantiles() == loaded.order_quantiles()
+    
+    def test_merge_partitions(self, analyzer):
+        """Test that per-partition sketches merge into the whole-data result."""
+        parts = [SalesSketches(), SalesSketches()]
+        for i, r in enumerate(analyzer.sales_data):
+            parts[i % 2].add_record(r)
+        merged = parts[0].merge(parts[1])
+        whole = analyzer.sketch()
+        
+        assert merged.distinct_customers('category') == whole.distinct_customers('category')
+        assert merged.get_top_customers(3) == whole.get_top_customers(3)
+    
+    def test_unknown_dimension(self):
+        """Test that only category and region are sketched."""
+        with pytest.raises(ValueError):
+            SalesSketches().distinct_customers('product')
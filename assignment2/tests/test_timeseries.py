@@ -0,0 +1,146 @@
+"""
+Unit tests for revenue time series
+
+Tests the time-series module including:
+- One-scan bucketing over every storage backend
+- Granularities, rolling windows and growth derived from running totals
+- Per-key series for category and region
+"""
+
+import pytest
+import os
+import sys
+from collections import defaultdict
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sales_analysis import SalesDataAnalyzer
+from timeseries import SalesTimeSeries
+import numpy_backend
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'sales.csv')
+BACKENDS = ['records', 'columnar'] + (['numpy'] if numpy_backend.AVAILABLE else [])
+
+
+@pytest.fixture(params=BACKENDS)
+def analyzer(request):
+    """Create an analyzer over the sample data for each backend."""
+    return SalesDataAnalyzer(DATA_FILE, backend=request.param)
+
+
+@pytest.fixture
+def series(analyzer):
+    """Build category and region series."""
+    return SalesTimeSeries.build(analyzer)
+
+
+def daily_by_hand(analyzer, dimension=None, key=None):
+    """Revenue per date label summed straight from the records."""
+    days = defaultdict(float)
+    for r in analyzer.sales_data:
+        if dimension is None or getattr(r, dimension) == key:
+            days[r.date.strftime('%Y-%m-%d')] += r.total_amount
+    return days
+
+
+class TestBuild:
+    """Test bucketing the rows by day."""
+    
+    def test_single_scan(self, analyzer):
+        """Test that building reads the rows once and queries read none."""
+        scans = analyzer.scan_count
+        series = SalesTimeSeries.build(analyzer)
+        series.revenue('week', 'region')
+        series.rolling(7, 'category')
+        series.growth('month')
+        
+        assert analyzer.scan_count == scans + 1
+    
+    def test_dense_days(self, analyzer, series):
+        """Test that every day from the first to the last order has a value."""
+        days = sorted(r.day for r in analyzer.sales_data)
+        daily = series.revenue('day')
+        expected = daily_by_hand(analyzer)
+        
+        assert series.days == days[-1] - days[0] + 1 == len(daily)
+        assert all(daily[label] == pytest.approx(expected.get(label, 0.0)) for label in daily)
+    
+    def test_unknown_inputs(self, analyzer, series):
+        """Test unknown dimensions and granularities, and keys without sales."""
+        with pytest.raises(ValueError):
+            SalesTimeSeries.build(analyzer, ['month'])
+        with pytest.raises(ValueError):
+            series.revenue('fortnight')
+        with pytest.raises(ValueError):
+            series.revenue('day', 'salesperson')
+        
+        assert set(series.revenue('month', 'region', 'Atlantis').values()) == {0.0}
+
+
+class TestQueries:
+    """Test granularities, windows and growth."""
+    
+    def test_month_matches_analyzer(self, analyzer, series):
+        """Test that monthly revenue equals get_sales_by_month."""
+        monthly = series.revenue('month')
+        
+        assert monthly == pytest.approx(analyzer.get_sales_by_month())
+        assert sum(series.revenue('week').values()) == pytest.approx(analyzer.get_total_revenue())
+        assert series.total('2024-01-01', '2024-02-15') == pytest.approx(
+            analyzer.get_revenue_between('2024-01-01', '2024-02-15'))
+    
+    def test_per_key(self, analyzer, series):
+        """Test that per-key series add up to each key's revenue."""
+        by_region = series.revenue('quarter', 'region')
+        
+        assert {key: sum(q.values()) for key, q in by_region.items()} == pytest.approx(
+            analyzer.get_revenue_by_region())
+        assert series.revenue('day', 'category', 'Furniture') == pytest.approx(
+            {label: daily_by_hand(analyzer, 'category', 'Furniture').get(label, 0.0)
+             for label in series.revenue('day')})
+    
+    @pytest.mark.parametrize('window', [1, 7, 30])
+    def test_rolling(self, analyzer, series, window):
+        """Test rolling sums against summing the window's days directly."""
+        rolling = series.rolling(window, 'region', 'North')
+        daily = list(series.revenue('day', 'region', 'North').values())
+        
+        assert list(rolling.values()) == pytest.approx(
+            [sum(daily[max(0, i + 1 - window):i + 1]) for i in range(len(daily))])
+        with pytest.raises(ValueError):
+            series.rolling(0)
+    
+    def test_growth(self, analyzer, series):
+        """Test month-over-month growth per category."""
+        growth = series.growth('month', 'category')
+        monthly = series.revenue('month', 'category', 'Electronics')
+        
+        assert growth['Electronics']['2024-01'] is None
+        assert growth['Electronics']['2024-02'] == pytest.approx(
+            monthly['2024-02'] / monthly['2024-01'] - 1)
+        assert set(growth) == set(analyzer.get_revenue_by_category())
+
+
+class TestExactSeries:
+    """Test series built from an exact-mode analyzer."""
+    
+    def test_cents(self):
+        """Test that exact series are summed in cents and returned in dollars."""
+        exact = SalesTimeSeries.build(SalesDataAnalyzer(DATA_FILE, exact=True))
+        plain = SalesTimeSeries.build(SalesDataAnalyzer(DATA_FILE))
+        
+        assert exact.daily[None][None].typecode == 'q'
+        assert exact.revenue('month', 'region') == plain.revenue('month', 'region')
+        assert exact.total('2024-01-01', '2024-12-31') == 28473.5
+    
+    def test_empty(self, tmp_path):
+        """Test that an analyzer without rows gives empty series."""
+        path = tmp_path / 'empty.csv'
+        with open(DATA_FILE) as file:
+            path.write_text(file.readline())
+        series = SalesTimeSeries.build(SalesDataAnalyzer(str(path)))
+        
+        assert series.revenue('month') == {}
+        assert series.rolling(7, 'region') == {}
+        assert series.total('2024-01-01', '2024-12-31') == 0.0